@@ -3,23 +3,40 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_cors import CORS
 from .config import Config
+from .db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 ma = Marshmallow()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from . import db_profiles, db_routing
+    db_profiles.configure_engine_options(app)
     db.init_app(app)
     ma.init_app(app)
     CORS(app)
 
     with app.app_context():
+        db_profiles.init_app(app, db.engine)
+        db_routing.init_app(app)
+
         # Import and register blueprints here
         from .routes import bp
         app.register_blueprint(bp)
         
         db.create_all()
 
+        from . import migrations
+        migrations.upgrade(db.engine)
+
+        from .services import event_service, summary_cache, principal_cache, llm_client, similarity_index, live_updates
+        event_service.init_app(app)
+        summary_cache.init_app(app)
+        principal_cache.init_app(app)
+        llm_client.init_app(app)
+        similarity_index.init_app(app)
+        live_updates.init_app(app)
+
     return app
@@ -40,3 +40,9 @@ For each member, analyze:
 4. Knowledge Islands (Unique areas they own)
 Focus on OUTCOMES, not just output.
 """
+
+CHUNK_SUMMARY_PROMPT = f"""
+{AI_RULES}
+You are condensing one slice of a longer project history so it can be combined with the others.
+Keep names, numbers, blockers, decisions and dates. Use dense bullet points, no preamble.
+"""
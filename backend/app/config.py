@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -6,5 +7,84 @@ load_dotenv()
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///project_journal.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Database performance profile: auto, sqlite, server or default (see app/db_profiles.py)
+    DB_PROFILE = os.getenv('DB_PROFILE', 'auto')
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64000)) # Negative: KiB, so ~64 MB
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+
+    # Optional read replica: GET requests and AI context reads go there (see app/db_routing.py)
+    DATABASE_READ_URL = os.getenv('DATABASE_READ_URL')
+    READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') # Any OpenAI-compatible endpoint; unset uses the default API
+
+    # Shared LLM client: concurrent calls, timeouts, retries and circuit breaker
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', 30))
+    LLM_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv('LLM_ACQUIRE_TIMEOUT_SECONDS', 30))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 2))
+    LLM_RETRY_BACKOFF_SECONDS = float(os.getenv('LLM_RETRY_BACKOFF_SECONDS', 0.5))
+    LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('LLM_CIRCUIT_FAILURE_THRESHOLD', 5))
+    LLM_CIRCUIT_RESET_SECONDS = float(os.getenv('LLM_CIRCUIT_RESET_SECONDS', 30))
+
+    # Prompt context budgets in tokens per report type; larger history is condensed map-reduce style.
+    # AI_TOKEN_BUDGETS takes a JSON object overriding single entries, e.g. {"weekly": 20000}
+    AI_TOKEN_BUDGETS = {
+        'default': 6000, 'daily': 4000, 'weekly': 12000, 'contributor_impact': 12000,
+        'contributor': 8000, 'handover': 6000,
+        **json.loads(os.getenv('AI_TOKEN_BUDGETS', '{}'))
+    }
+    AI_CONTEXT_CHUNK_TOKENS = int(os.getenv('AI_CONTEXT_CHUNK_TOKENS', 3000))
+    AI_CONTEXT_MAP_WORKERS = int(os.getenv('AI_CONTEXT_MAP_WORKERS', 4))
+
+    # Largest accepted bulk import request
+    BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 10000))
+    BULK_IMPORT_MAX_TASKS = int(os.getenv('BULK_IMPORT_MAX_TASKS', 50000)) # Whole backlogs moved from another tracker
+
+    # Background jobs (AI summaries / handovers)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_WORKER_AUTOSTART = os.getenv('JOB_WORKER_AUTOSTART', 'true').lower() == 'true'
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BACKOFF_SECONDS = float(os.getenv('JOB_RETRY_BACKOFF_SECONDS', 5))
+    JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 300)) # Renewed while a job runs
+
+    # Audit events written outside a caller transaction are buffered and flushed in bulk
+    EVENT_BATCH_SIZE = int(os.getenv('EVENT_BATCH_SIZE', 100))
+    EVENT_FLUSH_INTERVAL_SECONDS = float(os.getenv('EVENT_FLUSH_INTERVAL_SECONDS', 2))
+    EVENT_SPILL_PATH = os.getenv('EVENT_SPILL_PATH')
+    EVENT_DEAD_LETTER_PATH = os.getenv('EVENT_DEAD_LETTER_PATH') # Rows the database rejects; defaults to instance/
+
+    # Audit events older than EVENT_HOT_DAYS are compacted by month into gzip archives (see app/services/event_store.py)
+    EVENT_ARCHIVE_PATH = os.getenv('EVENT_ARCHIVE_PATH') # Defaults to instance/event_archive
+    EVENT_HOT_DAYS = int(os.getenv('EVENT_HOT_DAYS', 90))
+    EVENT_ARCHIVE_BLOCK_ROWS = int(os.getenv('EVENT_ARCHIVE_BLOCK_ROWS', 1000))
+
+    # Live project updates over SSE (see app/services/live_updates.py): local fans out within this process,
+    # sqlite shares messages between the workers on one host through a bus file
+    PUSH_BACKEND = os.getenv('PUSH_BACKEND', 'local')
+    PUSH_BUS_PATH = os.getenv('PUSH_BUS_PATH') # Defaults to instance/push_bus.db
+    PUSH_BUS_POLL_SECONDS = float(os.getenv('PUSH_BUS_POLL_SECONDS', 0.25))
+    PUSH_QUEUE_SIZE = int(os.getenv('PUSH_QUEUE_SIZE', 100)) # Per subscriber; overflowing drops the backlog for a resync
+    PUSH_HEARTBEAT_SECONDS = float(os.getenv('PUSH_HEARTBEAT_SECONDS', 15))
+
+    # In-process cache in front of the AISummary lookup
+    SUMMARY_CACHE_SIZE = int(os.getenv('SUMMARY_CACHE_SIZE', 512))
+    SUMMARY_CACHE_TTL_SECONDS = float(os.getenv('SUMMARY_CACHE_TTL_SECONDS', 300))
+
+    # Similarity index over decisions and logs (see app/services/similarity_index.py): a directory for
+    # memory-mapped .npy files shared by all workers; unset keeps a per-process copy built on first use
+    SIMILARITY_INDEX_PATH = os.getenv('SIMILARITY_INDEX_PATH')
+    SIMILARITY_DIMENSIONS = int(os.getenv('SIMILARITY_DIMENSIONS', 1024))
+
+    # Request principals (X-User-ID) resolved by requires_role; short TTL bounds cross-worker staleness
+    PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', 1024))
+    PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv('PRINCIPAL_CACHE_TTL_SECONDS', 30))
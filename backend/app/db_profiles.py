@@ -0,0 +1,61 @@
+"""
+Named database performance profiles, selected with DB_PROFILE:
+
+- sqlite: WAL journal, relaxed fsync (synchronous=NORMAL), memory-mapped
+  reads, a larger page cache, a busy timeout instead of immediate
+  "database is locked" errors, and enforced foreign keys. Set per connection.
+- server: connection pool sizing, pre-ping and recycling for PostgreSQL/MySQL.
+- default: driver defaults, no tuning.
+- auto (the default): sqlite or server depending on SQLALCHEMY_DATABASE_URI.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+def resolve_profile(config):
+    profile = config['DB_PROFILE']
+    if profile == 'auto':
+        backend = make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        return 'sqlite' if backend == 'sqlite' else 'server'
+    if profile not in ('sqlite', 'server', 'default'):
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; use auto, sqlite, server or default")
+    return profile
+
+def sqlite_pragmas(config):
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        ('foreign_keys', 'ON'),
+        ('temp_store', 'MEMORY'),
+    ]
+
+def configure_engine_options(app):
+    """Merges the profile's pool settings into SQLALCHEMY_ENGINE_OPTIONS; call before db.init_app."""
+    config = app.config
+    profile = resolve_profile(config)
+    config['DB_PROFILE_RESOLVED'] = profile
+    if profile != 'server':
+        return
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+    # Explicit engine options in the config win over the profile
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+def init_app(app, engine):
+    if app.config['DB_PROFILE_RESOLVED'] != 'sqlite' or engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
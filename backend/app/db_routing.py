@@ -0,0 +1,127 @@
+"""
+Read/write routing between the primary database and an optional read replica.
+
+With DATABASE_READ_URL set, a second engine is opened on the replica.
+GET/HEAD requests and AI context gathering (read_replica()) send their reads
+there; flushes and Core INSERT/UPDATE/DELETE always go to the primary, and a
+session that has written stays on the primary so it reads its own changes.
+
+Replicas lag behind. After a client's own successful write (any non-GET
+request), its reads are pinned to the primary for READ_YOUR_WRITES_SECONDS,
+tracked per client in-process and in a cookie so other workers honour it too.
+Background jobs younger than that window are pinned the same way.
+Without a replica every read goes to the primary as before.
+"""
+import time
+from contextlib import contextmanager
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from . import db_profiles
+from .cache import TTLCache
+
+STICKY_COOKIE = 'read_primary_until'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ROUTING_KEYS = ('use_replica', 'pin_primary', 'wrote')
+
+def is_write(clause):
+    return clause is not None and getattr(clause, 'is_dml', False)
+
+class RoutingSession(Session):
+    """db.session class: reads go to the replica while session.info['use_replica'] is set."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or is_write(clause):
+                self.info['wrote'] = True
+            elif self.info.get('use_replica') and not self.info.get('wrote'):
+                replica = current_app.extensions['read_router'].engine
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def reset_routing(session, pin_primary=False):
+    """Starts a new unit of work on a long-lived session, e.g. per request or job."""
+    for key in ROUTING_KEYS:
+        session.info.pop(key, None)
+    if pin_primary:
+        session.info['pin_primary'] = True
+
+@contextmanager
+def read_replica(session=None):
+    """Routes the session's reads to the replica for the block, unless it is pinned to the primary."""
+    if session is None:
+        from . import db
+        session = db.session
+    info = session.info
+    previous = info.get('use_replica', False)
+    if not info.get('pin_primary'):
+        info['use_replica'] = True
+    try:
+        yield session
+    finally:
+        info['use_replica'] = previous
+
+class ReadRouter:
+    def __init__(self, app):
+        url = app.config.get('DATABASE_READ_URL')
+        self.enabled = bool(url)
+        self.engine = create_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})) if url else None
+        if self.engine is not None:
+            db_profiles.init_app(app, self.engine)
+        self.window = app.config['READ_YOUR_WRITES_SECONDS']
+        self.recent_writers = TTLCache(maxsize=10000, ttl=self.window)
+        self.replica_reads = 0
+        self.sticky_reads = 0
+
+    def client_key(self):
+        return request.headers.get('X-User-ID') or request.remote_addr
+
+    def is_sticky(self):
+        if self.recent_writers.get(self.client_key()):
+            return True
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def before_request(self):
+        from . import db
+        sticky = self.enabled and self.is_sticky()
+        reset_routing(db.session, pin_primary=sticky)
+        if not self.enabled or request.method not in READ_METHODS:
+            return
+        if sticky:
+            self.sticky_reads += 1
+        else:
+            db.session.info['use_replica'] = True
+            self.replica_reads += 1
+
+    def after_request(self, response):
+        if self.enabled and request.method not in READ_METHODS and response.status_code < 400:
+            self.recent_writers.set(self.client_key(), True)
+            response.set_cookie(STICKY_COOKIE, str(time.time() + self.window), max_age=max(1, int(self.window) + 1))
+        return response
+
+    def teardown_request(self, exc=None):
+        from . import db
+        reset_routing(db.session)
+
+    def stats(self):
+        return {
+            "replica_configured": self.enabled,
+            "read_your_writes_seconds": self.window,
+            "replica_requests": self.replica_reads,
+            "sticky_requests": self.sticky_reads
+        }
+
+def init_app(app):
+    router = ReadRouter(app)
+    app.extensions['read_router'] = router
+    app.before_request(router.before_request)
+    app.after_request(router.after_request)
+    app.teardown_request(router.teardown_request)
+    return router
+
+def get_read_router():
+    return current_app.extensions['read_router']
@@ -0,0 +1,103 @@
+"""
+Minimal forward-only schema migrations.
+
+db.create_all() only creates missing tables, so column and index changes for
+databases that already exist are applied here, in order, exactly once.
+Applied versions are recorded in the schema_migrations table.
+"""
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+MIGRATIONS = []
+
+def migration(version, description):
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return decorator
+
+def add_missing_columns(connection, table, columns):
+    """columns: [(name, ddl)] - only the ones not present yet are added."""
+    existing = {c['name'] for c in inspect(connection).get_columns(table)}
+    for name, ddl in columns:
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+@migration(1, "Project task counters")
+def add_project_task_counters(connection):
+    from .services.task_service import COUNTER_COLUMNS, recount_project_counters, completion_expression
+    from .models import Project
+    from sqlalchemy import update
+
+    add_missing_columns(connection, 'project', [(c, "INTEGER NOT NULL DEFAULT 0") for c in COUNTER_COLUMNS])
+
+    project = Project.__table__
+    for project_id, counters in recount_project_counters(connection).items():
+        connection.execute(update(project).where(project.c.id == project_id).values(**counters))
+    connection.execute(update(project).values(completion_percentage=completion_expression(project)))
+
+@migration(2, "Hot query path indexes")
+def add_hot_path_indexes(connection):
+    # Declared on the models in __table_args__; create_all only adds them to new tables
+    from . import db
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+@migration(3, "Stats rollups")
+def build_stats_rollups(connection):
+    from .services import stats_service
+    stats_service.rebuild(connection)
+
+def applied_versions(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)"
+    ))
+    return set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+def upgrade(engine):
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in done:
+            continue
+        with engine.begin() as connection:
+            fn(connection)
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()}
+            )
+
+@migration(4, "Work log insert sentinel")
+def add_work_log_sentinel(connection):
+    add_missing_columns(connection, 'work_log', [('_sentinel', "INTEGER")])
+
+@migration(5, "Task insert sentinel")
+def add_task_sentinel(connection):
+    add_missing_columns(connection, 'task', [('_sentinel', "INTEGER")])
+
+@migration(6, "Stats rollups without foreign key")
+def drop_stats_rollup_foreign_key(connection):
+    # With foreign keys enforced (sqlite profile) the FK would block deleting projects;
+    # SQLite cannot drop a constraint, so the derived table is recreated and rebuilt
+    from .models import StatsRollup
+    from .services import stats_service
+    if not inspect(connection).get_foreign_keys('stats_rollup'):
+        return
+    StatsRollup.__table__.drop(connection)
+    StatsRollup.__table__.create(connection)
+    stats_service.rebuild(connection)
+
+@migration(7, "Full-text search index")
+def create_search_index(connection):
+    # Skipped where the database has no full-text support; /api/search then answers 501
+    from .services import search_service
+    search_service.create_index(connection)
+
+@migration(8, "Project filter index for the audit trail")
+def add_system_event_project_index(connection):
+    from .models import SystemEvent
+    for index in SystemEvent.__table__.indexes:
+        index.create(connection, checkfirst=True)
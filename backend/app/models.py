@@ -1,6 +1,6 @@
 from datetime import datetime
 from . import db
-from sqlalchemy import Enum, CheckConstraint
+from sqlalchemy import Enum, CheckConstraint, insert_sentinel
 import enum
 import hashlib
 
@@ -13,6 +13,10 @@ class UserStatus(enum.Enum):
     INACTIVE = "Inactive"
 
 class ProjectMember(db.Model):
+    __table_args__ = (
+        db.Index('ix_project_member_project_user', 'project_id', 'user_id'),
+        db.Index('ix_project_member_user', 'user_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -25,7 +29,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128)) # Added for secure auth
     role = db.Column(db.String(20), default='Member') # Keep as string for simple RBAC, but validated by Enum
-    status = db.Column(db.String(20), default='Active')
+    status = db.column_property(db.Column(db.String(20), default='Active'), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     logs = db.relationship('WorkLog', backref='user', lazy=True)
@@ -51,6 +55,13 @@ class Project(db.Model):
     status = db.Column(db.String(20), default='ACTIVE') # ACTIVE, COMPLETED
     completion_percentage = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Task counters, kept in sync by delta on every status transition (see task_service)
+    tasks_total = db.Column(db.Integer, nullable=False, default=0)
+    tasks_todo = db.Column(db.Integer, nullable=False, default=0)
+    tasks_in_progress = db.Column(db.Integer, nullable=False, default=0)
+    tasks_review = db.Column(db.Integer, nullable=False, default=0)
+    tasks_done = db.Column(db.Integer, nullable=False, default=0)
     
     tasks = db.relationship('Task', backref='project', lazy=True)
     decisions = db.relationship('Decision', backref='project', lazy=True)
@@ -64,16 +75,27 @@ class TaskStatus(enum.Enum):
     DONE = "DONE"
 
 class Task(db.Model):
+    __table_args__ = (
+        db.Index('ix_task_project_status', 'project_id', 'status'),
+        db.Index('ix_task_project_created', 'project_id', 'created_at', 'id'),
+        db.Index('ix_task_user_status', 'user_id', 'status'),
+        db.Index('ix_task_milestone', 'milestone_id'),
+        db.Index('ix_task_created', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    milestone_id = db.Column(db.Integer, db.ForeignKey('milestone.id'))
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    # active_history: counters and rollups need the previous value even when the attribute was expired
+    project_id = db.column_property(db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False), active_history=True)
+    milestone_id = db.column_property(db.Column(db.Integer, db.ForeignKey('milestone.id')), active_history=True)
+    user_id = db.column_property(db.Column(db.Integer, db.ForeignKey('user.id')), active_history=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     priority = db.Column(db.String(20), default='Medium') # Low, Medium, High
-    status = db.Column(db.String(20), default='TODO') # State Machine enforced in service
+    status = db.column_property(db.Column(db.String(20), default='TODO'), active_history=True) # State Machine enforced in service
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Lets SQLite batch multi-row INSERT .. RETURNING while keeping ids in input order
+    _sentinel = insert_sentinel('_sentinel')
+
     logs = db.relationship('WorkLog', backref='task', lazy=True)
     decisions = db.relationship('Decision', backref='task', lazy=True)
 
@@ -83,6 +105,10 @@ class Task(db.Model):
     }
 
 class SystemEvent(db.Model):
+    __table_args__ = (
+        db.Index('ix_system_event_timestamp', 'timestamp'),
+        db.Index('ix_system_event_project_timestamp', 'project_id', 'timestamp'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     event_type = db.Column(db.String(50), nullable=False) # STATUS_CHANGE, DECISION_CREATED, AI_GENERATION
     description = db.Column(db.Text)
@@ -91,9 +117,50 @@ class SystemEvent(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     metadata_json = db.Column(db.JSON) # For token usage, status values, etc.
 
+class ChangeLog(db.Model):
+    """
+    Append-only sequence of entity changes behind /api/changes (see
+    change_feed). AUTOINCREMENT keeps SQLite from ever reusing a seq.
+    """
+    __table_args__ = (
+        db.Index('ix_change_log_project_seq', 'project_id', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False) # task, log, decision, member, user
+    entity_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer) # None for users, which every project's feed includes
+    op = db.Column(db.String(10), nullable=False) # upsert, delete
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class EventArchive(db.Model):
+    """
+    Catalog of the compressed archive files holding SystemEvent rows moved out
+    of the hot table (see event_store). One file per compaction run and month
+    partition; block_index is its sparse index: [first timestamp, byte offset]
+    of each gzip block.
+    """
+    __table_args__ = (
+        db.Index('ix_event_archive_range', 'first_timestamp', 'last_timestamp'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    partition = db.Column(db.String(7), nullable=False) # YYYY-MM
+    path = db.Column(db.String(255), nullable=False) # Relative to EVENT_ARCHIVE_PATH
+    first_timestamp = db.Column(db.DateTime, nullable=False)
+    last_timestamp = db.Column(db.DateTime, nullable=False)
+    min_event_id = db.Column(db.Integer, nullable=False)
+    max_event_id = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    block_index = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class WorkLog(db.Model):
     __table_args__ = (
         CheckConstraint('hours_spent > 0', name='check_hours_positive'),
+        db.Index('ix_work_log_task_timestamp', 'task_id', 'timestamp', 'id'),
+        db.Index('ix_work_log_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_work_log_timestamp', 'timestamp', 'id'),
     )
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
@@ -103,6 +170,8 @@ class WorkLog(db.Model):
     hours_spent = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Lets SQLite batch multi-row INSERT .. RETURNING while keeping ids in input order
+    _sentinel = insert_sentinel('_sentinel')
 
 class AIReportStatus(enum.Enum):
     SUCCESS = "SUCCESS"
@@ -110,6 +179,10 @@ class AIReportStatus(enum.Enum):
     PENDING = "PENDING"
 
 class AISummary(db.Model):
+    __table_args__ = (
+        db.Index('ix_ai_summary_lookup', 'project_id', 'summary_type', 'context_hash'),
+        db.Index('ix_ai_summary_user_type', 'user_id', 'summary_type'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -121,7 +194,69 @@ class AISummary(db.Model):
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
     error_log = db.Column(db.Text)
 
+class StatsRollup(db.Model):
+    """
+    Pre-aggregated counters for the dashboards, one row per scope:
+    GLOBAL (scope_id 0), PROJECT, MILESTONE and USER. Maintained on write by stats_service.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_id', name='uq_stats_rollup_scope'),
+        db.Index('ix_stats_rollup_project', 'project_id', 'scope'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)
+    scope_id = db.Column(db.Integer, nullable=False, default=0)
+    project_id = db.Column(db.Integer) # Owning project of PROJECT / MILESTONE rows; derived data, so no FK
+    tasks_total = db.Column(db.Integer, nullable=False, default=0)
+    tasks_todo = db.Column(db.Integer, nullable=False, default=0)
+    tasks_in_progress = db.Column(db.Integer, nullable=False, default=0)
+    tasks_review = db.Column(db.Integer, nullable=False, default=0)
+    tasks_done = db.Column(db.Integer, nullable=False, default=0)
+    hours_logged = db.Column(db.Float, nullable=False, default=0.0)
+    log_count = db.Column(db.Integer, nullable=False, default=0)
+    decision_count = db.Column(db.Integer, nullable=False, default=0)
+    active_users = db.Column(db.Integer, nullable=False, default=0) # GLOBAL only
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CollectionVersion(db.Model):
+    """
+    Data version of a list collection, per project (scope_id) or across all of
+    them (scope_id 0). Bumped on write by version_service; feeds the ETags.
+    """
+    collection = db.Column(db.String(20), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True, default=0)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class JobStatus(enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+class Job(db.Model):
+    __table_args__ = (
+        db.Index('ix_job_claim', 'status', 'run_after', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False) # PROJECT_SUMMARY, CONTRIBUTOR_SUMMARY, HANDOVER
+    payload = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='QUEUED')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow) # Retry backoff: not claimable before this
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
 class Decision(db.Model):
+    __table_args__ = (
+        db.Index('ix_decision_project_timestamp', 'project_id', 'timestamp', 'id'),
+        db.Index('ix_decision_author_timestamp', 'author_id', 'timestamp'),
+        db.Index('ix_decision_timestamp', 'timestamp', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     task_id = db.Column(db.Integer, db.ForeignKey('task.id'))
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from flask import Response, stream_with_context
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(timestamp, row_id):
+    raw = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        timestamp, row_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(f"Malformed cursor: {cursor!r}")
+
+def apply_keyset(query, ts_col, id_col, cursor=None, descending=False):
+    """
+    Orders the query by (ts_col, id_col) and, when a cursor is given,
+    restricts it to the rows strictly after that position.
+    """
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(ts_col < ts, and_(ts_col == ts, id_col < row_id)))
+        else:
+            query = query.filter(or_(ts_col > ts, and_(ts_col == ts, id_col > row_id)))
+    if descending:
+        return query.order_by(ts_col.desc(), id_col.desc())
+    return query.order_by(ts_col.asc(), id_col.asc())
+
+def keyset_page(query, ts_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=False):
+    """
+    Returns (rows, next_cursor). next_cursor is None on the last page.
+    Fetches one extra row to know whether another page exists.
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    rows = apply_keyset(query, ts_col, id_col, cursor, descending).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_col.key), getattr(last, id_col.key))
+
+def stream_json_array(query, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streams the query result as a JSON array, fetching rows from the
+    database in chunks instead of materializing the whole list.
+    """
+    def generate():
+        yield '['
+        first = True
+        for row in query.yield_per(chunk_size):
+            yield ('' if first else ',') + json.dumps(serialize(row))
+            first = False
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -1,13 +1,19 @@
+import csv
 import hashlib
+import io
+import json
 from datetime import datetime
 from functools import wraps
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from . import db
+from sqlalchemy import select
 from sqlalchemy.orm.exc import StaleDataError
-from .models import Project, Task, WorkLog, Decision, User, Milestone, SystemEvent, ProjectMember
+from .models import Project, Task, WorkLog, Decision, User, Milestone, ProjectMember
 from .schemas import task_schema, log_schema
 from marshmallow import ValidationError
-from .services import task_service, decision_service, ai_service
+from .services import task_service, decision_service, ai_service, query_service, job_service, event_service, stats_service, ingest_service, exit_service, version_service, search_service, similarity_index, event_store, change_feed, live_updates
+from .services.principal_cache import current_principal, current_user_id
+from .pagination import InvalidCursor, MAX_PAGE_SIZE, keyset_page, apply_keyset, stream_json_array, encode_cursor, decode_cursor
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -15,36 +21,62 @@ bp = Blueprint('api', __name__, url_prefix='/api')
 def handle_stale_data_error(e):
     return jsonify({"error": "Conflict", "message": "Data has been modified by another user. Please refresh and try again."}), 409
 
+@bp.errorhandler(InvalidCursor)
+def handle_invalid_cursor(e):
+    return jsonify({"error": "InvalidCursor", "message": str(e)}), 400
+
+def request_flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def list_response(query, ts_col, id_col, serialize, descending=False):
+    """
+    Shared list behaviour for the large collections:
+    - default: keyset page of `limit` rows with a `next_cursor`
+    - ?stream=true: whole result streamed as a JSON array in chunks
+    - ?all=true: legacy unpaginated list for old clients
+    """
+    if request_flag('all'):
+        rows = apply_keyset(query, ts_col, id_col, descending=descending).all()
+        return jsonify([serialize(row) for row in rows])
+
+    cursor = request.args.get('cursor')
+    if request_flag('stream'):
+        return stream_json_array(apply_keyset(query, ts_col, id_col, cursor, descending), serialize)
+
+    rows, next_cursor = keyset_page(query, ts_col, id_col, cursor, request.args.get('limit', type=int), descending)
+    return jsonify({"items": [serialize(row) for row in rows], "next_cursor": next_cursor})
+
+def conditional_list(collection, scope_id, build):
+    """
+    Conditional GET for a polled list: answers 304 while If-None-Match matches
+    the collection's data version (see version_service), without running the
+    list query; otherwise build() renders the list and it is tagged.
+    """
+    etag = version_service.list_etag(collection, scope_id, request.args)
+    response = Response(status=304) if request.if_none_match.contains(etag) else build()
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 def requires_role(role):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # For simplicity, we assume user_id is passed in headers or skip real auth
             # In a real app, this would check the session/token
-            user_id = request.headers.get('X-User-ID')
-            if not user_id:
+            if not request.headers.get('X-User-ID'):
                 return jsonify({"error": "Unauthorized", "message": "X-User-ID header required"}), 401
-            user = User.query.get(user_id)
+            # Cached and kept on g.principal for the handler and services
+            user = current_principal()
             if not user or (role == 'Admin' and user.role != 'Admin'):
                 return jsonify({"error": "Forbidden", "message": "Insufficient permissions"}), 403
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
-def log_system_event(event_type, description, user_id=None, project_id=None, metadata=None):
-    event = SystemEvent(
-        event_type=event_type,
-        description=description,
-        triggered_by=user_id,
-        project_id=project_id,
-        metadata_json=metadata
-    )
-    db.session.add(event)
-    db.session.commit()
-
 @bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
+    users = query_service.users_with_projects()
     return jsonify([{
         "id": u.id, "name": u.name, "email": u.email, 
         "role": u.role, "status": u.status,
@@ -105,50 +137,50 @@ def initiate_exit(user_id):
 
 @bp.route('/users/<int:user_id>/exit/confirm', methods=['POST'])
 def confirm_exit(user_id):
-    user = User.query.get(user_id)
-    if not user:
+    data = request.json or {}
+    result, status_code = exit_service.confirm_exits([{**data, "user_id": user_id}], current_user_id())
+    if status_code == 404:
         return jsonify({"error": "NotFound"}), 404
-        
-    data = request.json
-    reassignments = data.get('reassignments', {}) # {taskId: newUserId}
-    
-    open_tasks = Task.query.filter_by(user_id=user_id).filter(Task.status != 'DONE').all()
-    
-    # Validate all tasks are covered
-    for task in open_tasks:
-        if str(task.id) not in reassignments and task.id not in reassignments: 
-             return jsonify({"error": "ValidationFailed", "message": f"Task {task.id} must be reassigned."}), 400
-             
-    # Process Reassignments
-    for task_id, new_user_id in reassignments.items():
-        task = Task.query.get(task_id)
-        if task:
-            task.user_id = new_user_id
-            log_system_event('TASK_REASSIGNED', f"Task {task.id} reassigned from {user.name} during exit.", request.headers.get('X-User-ID'))
-            
-    # Save Final Handover
-    summary_content = data.get('handover_summary')
-    if summary_content:
-        ai_service.save_final_handover(user_id, summary_content)
-        
-    # Finalize Status
-    user.status = 'Inactive'
-    log_system_event('USER_EXIT', f"User {user.name} exit finalized. Account Inactive.", request.headers.get('X-User-ID'))
-    
-    db.session.commit()
+    if status_code != 200:
+        return jsonify(result), status_code
     return jsonify({"message": "Exit process complete. User is now Inactive."})
 
+@bp.route('/users/exit/bulk', methods=['POST'])
+@requires_role('Admin')
+def confirm_exits_bulk():
+    # Offboards several members atomically: {"departures": [{user_id, reassignments, default_assignee, handover_summary}]}
+    departures = (request.json or {}).get('departures')
+    if not isinstance(departures, list):
+        return jsonify({"error": "InvalidInput", "message": "departures must be a list"}), 400
+    result, status_code = exit_service.confirm_exits(departures, current_user_id())
+    return jsonify(result), status_code
+
 @bp.route('/projects/<int:project_id>/summary', methods=['POST'])
 def generate_project_summary(project_id):
+    report_type = (request.json or {}).get('type', 'daily') # 'daily' or 'weekly'
+
+    # Unchanged project data: answer straight from the in-process cache
+    cached = ai_service.cached_project_summary(project_id, report_type)
+    if cached is not None:
+        return jsonify(cached), 200
+
     project = Project.query.get(project_id)
     if not project:
         return jsonify({"error": "NotFound"}), 404
-        
-    report_type = request.json.get('type', 'daily') # 'daily' or 'weekly'
     
-    # Generate Summary
-    summary_data, status_code = ai_service.generate_project_evolution_summary(project_id, report_type)
-    return jsonify(summary_data), status_code
+    # Generation runs on the job workers; the client polls /jobs/<id>
+    job = job_service.enqueue('PROJECT_SUMMARY', {"project_id": project_id, "report_type": report_type})
+    return job_accepted(job)
+
+def job_accepted(job):
+    response = jsonify({"job_id": job.id, "status": job.status, "status_url": f"/api/jobs/{job.id}"})
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response, 202
+
+@bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    result, status_code = job_service.get_job(job_id)
+    return jsonify(result), status_code
 
 @bp.route('/login', methods=['POST'])
 def login():
@@ -180,13 +212,13 @@ def create_project():
     db.session.flush() # Get project ID
     
     # Auto-assign creator as Admin of this project
-    user_id = request.headers.get('X-User-ID')
+    user_id = current_user_id()
     if user_id:
         membership = ProjectMember(project_id=project.id, user_id=user_id, role_in_project='Lead')
         db.session.add(membership)
         
+    event_service.record_event('PROJECT_CREATED', f"Project {project.name} created", user_id, project.id)
     db.session.commit()
-    log_system_event('PROJECT_CREATED', f"Project {project.name} created", user_id, project.id)
     return jsonify({"id": project.id, "name": project.name}), 201
 
 # --- Project Membership ---
@@ -208,7 +240,7 @@ def add_project_member(project_id):
 
 @bp.route('/projects/<int:project_id>/members', methods=['GET'])
 def get_project_members(project_id):
-    members = ProjectMember.query.filter_by(project_id=project_id).all()
+    members = query_service.project_members(project_id)
     return jsonify([{
         "user_id": m.user_id,
         "name": m.user.name,
@@ -218,13 +250,15 @@ def get_project_members(project_id):
 
 @bp.route('/projects', methods=['GET'])
 def get_projects():
-    projects = Project.query.all()
-    return jsonify([{
-        "id": p.id, "name": p.name, 
-        "completion_percentage": p.completion_percentage,
-        "status": p.status,
-        "member_count": len(p.members)
-    } for p in projects])
+    def build():
+        projects = query_service.projects_with_member_counts()
+        return jsonify([{
+            "id": p.id, "name": p.name, 
+            "completion_percentage": p.completion_percentage,
+            "status": p.status,
+            "member_count": member_count
+        } for p, member_count in projects])
+    return conditional_list(version_service.PROJECTS, None, build)
 
 # --- Milestones ---
 @bp.route('/projects/<int:project_id>/milestones', methods=['POST'])
@@ -262,20 +296,27 @@ def create_task():
         return jsonify({"id": result.id, "title": result.title}), 201
     return jsonify(result), status_code
 
-@bp.route('/tasks', methods=['GET'])
-def get_tasks():
-    project_id = request.args.get('project_id', type=int)
-    query = Task.query
-    if project_id:
-        query = query.filter_by(project_id=project_id)
-    tasks = query.all()
-    return jsonify([{
+@bp.route('/tasks/import', methods=['POST'])
+def import_tasks():
+    # ?project_id= applies to rows that do not name their own project
+    return bulk_response(ingest_service.bulk_create_tasks, limit=current_app.config['BULK_IMPORT_MAX_TASKS'],
+                         project_id=request.args.get('project_id', type=int))
+
+def serialize_task(t):
+    return {
         "id": t.id, "title": t.title, "status": t.status, 
         "priority": t.priority, "user_id": t.user_id,
         "assignee_name": t.assignee.name if t.assignee else 'Unassigned',
         "project_id": t.project_id, "description": t.description,
         "version_id": t.version_id
-    } for t in tasks])
+    }
+
+@bp.route('/tasks', methods=['GET'])
+def get_tasks():
+    project_id = request.args.get('project_id', type=int)
+    query = query_service.tasks_query(project_id)
+    return conditional_list(version_service.TASKS, project_id,
+                            lambda: list_response(query, Task.created_at, Task.id, serialize_task))
 
 @bp.route('/tasks/<int:task_id>/complete', methods=['POST'])
 def complete_task(task_id):
@@ -306,18 +347,67 @@ def create_log():
         return jsonify({"id": result.id}), 201
     return jsonify(result), status_code
 
-@bp.route('/logs', methods=['GET'])
-def get_logs():
-    task_id = request.args.get('task_id', type=int)
-    query = WorkLog.query
-    if task_id:
-        query = query.filter_by(task_id=task_id)
-    logs = query.all()
-    return jsonify([{
+def read_bulk_rows(limit):
+    """
+    Rows of a bulk request: a JSON array, or NDJSON (one object per line) /
+    CSV with a header row, both read line by line from the request stream.
+    Stops reading one row past `limit`. Returns None for any other body.
+    """
+    if request.mimetype == 'text/csv':
+        rows = []
+        for row in csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')):
+            if len(rows) > limit:
+                break
+            rows.append(row)
+        return rows
+
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        rows = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            if len(rows) > limit:
+                break
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(ingest_service.ParseError(f"Invalid JSON: {e}"))
+        return rows
+
+    rows = request.get_json(silent=True)
+    return rows if isinstance(rows, list) else None
+
+def bulk_response(create, limit=None, **kwargs):
+    limit = limit or current_app.config['BULK_MAX_ROWS']
+    rows = read_bulk_rows(limit)
+    if rows is None:
+        return jsonify({"error": "InvalidInput", "message": "Expected a JSON array of rows, NDJSON or CSV"}), 400
+    if len(rows) > limit:
+        return jsonify({"error": "TooManyRows", "message": f"At most {limit} rows per request"}), 413
+
+    result, status_code = create(rows, atomic=request_flag('atomic'), **kwargs)
+    return jsonify(result), status_code
+
+@bp.route('/logs/bulk', methods=['POST'])
+def create_logs_bulk():
+    return bulk_response(ingest_service.bulk_create_work_logs)
+
+def serialize_log(l):
+    return {
         "id": l.id, "task_id": l.task_id, "content": l.content,
         "hours_spent": l.hours_spent, "timestamp": l.timestamp.isoformat(),
         "user_id": l.user_id, "blockers": l.blockers
-    } for l in logs])
+    }
+
+@bp.route('/logs', methods=['GET'])
+def get_logs():
+    task_id = request.args.get('task_id', type=int)
+    query = query_service.logs_query(task_id)
+    # Logs are versioned per project; a task's logs share its project's version
+    project_id = db.session.scalar(select(Task.project_id).where(Task.id == task_id)) if task_id else None
+    return conditional_list(version_service.LOGS, project_id,
+                            lambda: list_response(query, WorkLog.timestamp, WorkLog.id, serialize_log))
 
 # --- Decisions ---
 @bp.route('/decisions', methods=['POST'])
@@ -336,89 +426,128 @@ def create_decision():
         return jsonify({"id": result.id, "title": result.title}), 201
     return jsonify(result), status_code
 
+def serialize_decision(d):
+    return {
+        "id": d.id, "title": d.title, "reasoning": d.reasoning,
+        "impact_level": d.impact_level, "timestamp": d.timestamp.isoformat(),
+        "author": {"id": d.author_id, "name": d.author.name if d.author else "Unknown"}
+    }
+
 @bp.route('/decisions', methods=['GET'])
 def get_decisions():
     project_id = request.args.get('project_id', type=int)
-    query = Decision.query
-    if project_id:
-        query = query.filter_by(project_id=project_id)
-    decisions = query.order_by(Decision.timestamp.desc()).all()
-    return jsonify([{
-        "id": d.id, "title": d.title, "reasoning": d.reasoning,
-        "impact_level": d.impact_level, "timestamp": d.timestamp.isoformat(),
-        "author": {"id": d.author_id, "name": User.query.get(d.author_id).name if User.query.get(d.author_id) else "Unknown"}
-    } for d in decisions])
+    query = query_service.decisions_query(project_id)
+    return conditional_list(version_service.DECISIONS, project_id,
+                            lambda: list_response(query, Decision.timestamp, Decision.id, serialize_decision, descending=True))
+
+
+# --- Change feed ---
+def serialize_member(m):
+    return {"id": m.id, "project_id": m.project_id, "user_id": m.user_id, "name": m.user.name, "role": m.role_in_project, "email": m.user.email}
+
+def serialize_user(u):
+    return {"id": u.id, "name": u.name, "email": u.email, "role": u.role, "status": u.status}
+
+CHANGE_SERIALIZERS = {
+    change_feed.TASK: serialize_task, change_feed.LOG: serialize_log, change_feed.DECISION: serialize_decision,
+    change_feed.MEMBER: serialize_member, change_feed.USER: serialize_user
+}
+
+@bp.route('/changes', methods=['GET'])
+def get_changes():
+    # ?since=<cursor from the previous call, 0 for everything>&project_id=&limit=
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        return jsonify({"error": "InvalidCursor", "message": "since must be a cursor returned by this endpoint"}), 400
+    entries, next_cursor, has_more = change_feed.read_changes(
+        since, project_id=request.args.get('project_id', type=int), limit=request.args.get('limit', type=int)
+    )
+    return jsonify({"changes": [{
+        "seq": change.seq, "type": change.entity, "id": change.entity_id, "project_id": change.project_id,
+        "op": change_feed.UPSERT if entity is not None else change_feed.DELETE,
+        "data": CHANGE_SERIALIZERS[change.entity](entity) if entity is not None else None
+    } for change, entity in entries], "next_cursor": str(next_cursor), "has_more": has_more})
+
+# --- Search ---
+@bp.route('/search', methods=['GET'])
+def search():
+    # ?q=words&project_id=&type=log,decision,task&limit=&offset=
+    result, status_code = search_service.search(
+        request.args.get('q', ''),
+        project_id=request.args.get('project_id', type=int),
+        kinds=request.args.get('type', '').split(','),
+        limit=request.args.get('limit', type=int),
+        offset=request.args.get('offset', type=int)
+    )
+    return jsonify(result), status_code
 
+@bp.route('/similar', methods=['GET'])
+def similar():
+    # ?type=decision&id=3,7 (one result list per id, scored in one batch) or ?q=text; &k=&project_id=&result_type=log,decision
+    try:
+        ids = [int(i) for i in request.args.get('id', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({"error": "InvalidInput", "message": "id must be a comma-separated list of integers"}), 400
+    result, status_code = similarity_index.similar(
+        kind=request.args.get('type'),
+        ids=ids,
+        query=request.args.get('q'),
+        k=request.args.get('k', type=int),
+        project_id=request.args.get('project_id', type=int),
+        result_kinds=request.args.get('result_type', '').split(',')
+    )
+    return jsonify(result), status_code
 
 # --- Stats & Overview ---
 @bp.route('/stats/overview', methods=['GET'])
 def get_global_stats():
-    total_tasks = Task.query.count()
-    done_tasks = Task.query.filter_by(status='DONE').count()
-    total_hours = db.session.query(db.func.sum(WorkLog.hours_spent)).scalar() or 0
-    active_contributors = User.query.filter_by(status='Active').count()
-    
-    return jsonify({
-        "totalTasks": total_tasks,
-        "doneTasks": done_tasks,
-        "totalHours": float(total_hours),
-        "contributors": active_contributors
-    })
+    return jsonify(stats_service.global_stats())
 
 @bp.route('/projects/<int:project_id>/stats', methods=['GET'])
 def get_project_stats(project_id):
-    project = Project.query.get(project_id)
-    if not project:
-        return jsonify({"error": "NotFound", "message": "Project not found"}), 404
-        
-    total_tasks = len(project.tasks)
-    done_tasks = len([t for t in project.tasks if t.status == 'DONE'])
-    total_hours = db.session.query(db.func.sum(WorkLog.hours_spent)).join(Task).filter(Task.project_id == project_id).scalar() or 0
-    
-    # Calculate Velocity: Tasks done per week since project start
-    start_date = project.start_date
-    weeks_active = max(1, (datetime.utcnow() - start_date).days / 7)
-    velocity = done_tasks / weeks_active
-
-    # Milestone hours
-    milestone_stats = []
-    for m in project.milestones:
-        m_hours = db.session.query(db.func.sum(WorkLog.hours_spent)).join(Task).filter(Task.milestone_id == m.id).scalar() or 0
-        milestone_stats.append({
-            "id": m.id,
-            "title": m.title,
-            "hours": float(m_hours)
-        })
-    
+    result, status_code = stats_service.project_stats(project_id)
+    return jsonify(result), status_code
+
+@bp.route('/stats/cache', methods=['GET'])
+def get_cache_stats():
     return jsonify({
-        "totalTasks": total_tasks,
-        "doneTasks": done_tasks,
-        "totalHours": float(total_hours),
-        "completionPercentage": project.completion_percentage,
-        "velocity": round(velocity, 2),
-        "milestones": milestone_stats
+        "summary": current_app.extensions['summary_cache'].stats(),
+        "principal": current_app.extensions['principal_cache'].stats()
     })
 
+@bp.route('/stats/db', methods=['GET'])
+def get_db_stats():
+    return jsonify({"profile": current_app.config['DB_PROFILE_RESOLVED'], "read_routing": current_app.extensions['read_router'].stats()})
+
+@bp.route('/stats/events', methods=['GET'])
+def get_event_store_stats():
+    return jsonify(event_store.stats())
+
+@bp.route('/stats/push', methods=['GET'])
+def get_push_stats():
+    return jsonify(current_app.extensions['push_broker'].stats())
+
+@bp.route('/stats/llm', methods=['GET'])
+def get_llm_stats():
+    return jsonify(current_app.extensions['llm_client'].stats())
+
 @bp.route('/users/<int:user_id>/profile', methods=['GET'])
 def get_user_profile(user_id):
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "NotFound"}), 404
         
-    tasks_done = Task.query.filter_by(user_id=user_id, status='DONE').count()
-    total_hours = db.session.query(db.func.sum(WorkLog.hours_spent)).filter(WorkLog.user_id == user_id).scalar() or 0
-    decisions_made = Decision.query.filter_by(author_id=user_id).count()
-    logs_created = WorkLog.query.filter_by(user_id=user_id).count()
-    
+    stats = stats_service.user_stats(user_id)
     return jsonify({
         "id": user.id,
         "name": user.name,
         "role": user.role,
         "status": user.status,
-        "tasksDone": tasks_done,
-        "totalHours": float(total_hours),
-        "decisionsMade": decisions_made,
-        "logsCreated": logs_created
+        "tasksDone": stats.tasks_done if stats else 0,
+        "totalHours": float(stats.hours_logged) if stats else 0.0,
+        "decisionsMade": stats.decision_count if stats else 0,
+        "logsCreated": stats.log_count if stats else 0
     })
 
 # --- AI Summaries ---
@@ -428,16 +557,62 @@ def get_project_summary(project_id):
     result, status_code = ai_service.generate_project_evolution_summary(project_id, report_type)
     return jsonify(result), status_code
 
+def sse_response(events):
+    """Server-Sent Events: one frame per (event, data) pair, sent as soon as it is produced."""
+    def generate():
+        for name, data in events:
+            yield f"event: {name}\ndata: {json.dumps(data)}\n\n"
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Keep reverse proxies from buffering the stream
+    return response
+
+@bp.route('/projects/<int:project_id>/summary/stream', methods=['GET'])
+def stream_project_summary(project_id):
+    report_type = request.args.get('type', 'daily')
+    result, status_code = ai_service.stream_project_evolution_summary(project_id, report_type)
+    if status_code != 200:
+        return jsonify(result), status_code
+    return sse_response(result)
+
+@bp.route('/projects/<int:project_id>/updates/stream', methods=['GET'])
+def stream_project_updates(project_id):
+    """
+    Live task board updates for one project. The first frame, 'ready', carries
+    the change feed cursor to resync from after a reconnect or a 'resync'.
+    """
+    if not db.session.get(Project, project_id):
+        return jsonify({"error": "NotFound", "message": "Project not found"}), 404
+    broker = current_app.extensions['push_broker']
+    subscription = broker.subscribe(project_id) # Before the cursor is read, so nothing falls in between
+    ready = {"project_id": project_id, "cursor": str(change_feed.current_cursor())}
+    db.session.close() # Hand the connection back; the stream can stay open for hours
+    response = sse_response(broker.listen(subscription, current_app.config['PUSH_HEARTBEAT_SECONDS'], first=('ready', ready)))
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
+
 @bp.route('/users/<int:user_id>/summary', methods=['GET'])
 def get_contributor_summary(user_id):
-    result, status_code = ai_service.generate_contributor_summary(user_id)
-    return jsonify(result), status_code
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "NotFound", "message": "User not found"}), 404
+    job = job_service.enqueue('CONTRIBUTOR_SUMMARY', {"user_id": user_id})
+    return job_accepted(job)
 
 @bp.route('/users/<int:user_id>/handover', methods=['POST'])
 @requires_role('Admin')
 def trigger_handover(user_id):
-    result, status_code = ai_service.generate_handover_report(user_id)
-    return jsonify(result), status_code
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "NotFound", "message": "User not found"}), 404
+    job = job_service.enqueue('HANDOVER', {"user_id": user_id})
+    return job_accepted(job)
+
+@bp.route('/users/<int:user_id>/handover/stream', methods=['GET'])
+@requires_role('Admin')
+def stream_handover(user_id):
+    result, status_code = ai_service.stream_handover_report(user_id)
+    if status_code != 200:
+        return jsonify(result), status_code
+    return sse_response(result)
 
 @bp.route('/tasks/<int:task_id>', methods=['PATCH'])
 def update_task_route(task_id):
@@ -445,19 +620,34 @@ def update_task_route(task_id):
     expected_version = data.pop('version_id', None)
     result, status_code = task_service.update_task(task_id, expected_version_id=expected_version, **data)
     if status_code == 200:
-        log_system_event('TASK_UPDATED', f"Task {task_id} updated", request.headers.get('X-User-ID'), result.project_id)
+        event_service.record_event('TASK_UPDATED', f"Task {task_id} updated", current_user_id(), result.project_id)
         return jsonify({"id": result.id, "title": result.title, "version_id": result.version_id}), 200
     return jsonify(result), status_code
 
 @bp.route('/events', methods=['GET'])
 @requires_role('Admin')
 def get_events():
-    events = SystemEvent.query.order_by(SystemEvent.timestamp.desc()).limit(50).all()
-    return jsonify([{
-        "id": e.id,
-        "type": e.event_type,
-        "description": e.description,
-        "triggered_by": e.triggered_by,
-        "timestamp": e.timestamp.isoformat(),
-        "metadata": e.metadata_json
-    } for e in events])
+    # ?project_id=&type=A,B&since=&until= (ISO timestamps, reaching into the archived partitions), &cursor=&limit=
+    try:
+        since, until = (datetime.fromisoformat(request.args[name]) if request.args.get(name) else None for name in ('since', 'until'))
+    except ValueError:
+        return jsonify({"error": "InvalidInput", "message": "since and until must be ISO timestamps"}), 400
+    cursor = request.args.get('cursor')
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_PAGE_SIZE))
+    event_service.flush_events()
+    events = event_store.query_events(
+        since, until, limit + 1,
+        project_id=request.args.get('project_id', type=int),
+        event_types=[t for t in request.args.get('type', '').split(',') if t],
+        before=decode_cursor(cursor) if cursor else None
+    )
+    next_cursor = encode_cursor(events[limit - 1]['timestamp'], events[limit - 1]['id']) if len(events) > limit else None
+    return jsonify({"items": [{
+        "id": e['id'],
+        "type": e['event_type'],
+        "description": e['description'],
+        "triggered_by": e['triggered_by'],
+        "project_id": e['project_id'],
+        "timestamp": e['timestamp'].isoformat(),
+        "metadata": e['metadata_json']
+    } for e in events[:limit]], "next_cursor": next_cursor})
@@ -1,29 +1,68 @@
 from ..models import Project, Task, WorkLog, Decision, User, SystemEvent, AISummary, ProjectMember, db
 from datetime import datetime, timedelta
-from flask import current_app
-from openai import OpenAI
-import json
 import json
 import hashlib
+from sqlalchemy import select, func, case, literal, union_all
+from . import event_service, similarity_index
+from .summary_cache import get_summary_cache
+from .llm_client import get_llm_client
+from .context_builder import ContextBuilder
+from ..db_routing import read_replica
 from ..ai_prompts import HANDOVER_PROMPT, DAILY_SUMMARY_PROMPT, WEEKLY_SUMMARY_PROMPT, CONTRIBUTOR_PROMPT, CONTRIBUTOR_IMPACT_PROMPT
 
+SUMMARY_MODEL = "gpt-4o"
+
+SUMMARY_PROMPTS = {
+    'daily': DAILY_SUMMARY_PROMPT,
+    'weekly': WEEKLY_SUMMARY_PROMPT,
+    'contributor_impact': CONTRIBUTOR_IMPACT_PROMPT
+}
+
 def get_client():
-    return OpenAI(api_key=current_app.config['OPENAI_API_KEY'])
+    # Shared, pooled client; new calls should go through get_llm_client() for limits and retries
+    return get_llm_client().openai()
+
+def stream_completion(system_prompt, user_prompt, model=SUMMARY_MODEL):
+    """Yields the content deltas of a streamed chat completion as they arrive."""
+    return get_llm_client().stream_chat(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    )
 
 def log_ai_event(user_id, project_id, event_type, description, metadata=None):
-    event = SystemEvent(
-        event_type='AI_GENERATION',
-        description=f"{event_type}: {description}",
-        triggered_by=user_id,
-        project_id=project_id,
-        metadata_json=metadata
-    )
-    db.session.add(event)
-    db.session.commit()
+    event_service.record_event('AI_GENERATION', f"{event_type}: {description}", user_id, project_id, metadata)
 
 def get_context_hash(context_str):
     return hashlib.sha256(context_str.encode('utf-8')).hexdigest()
 
+def project_watermarks(project_id, since, risk_days=7):
+    """
+    Watermarks of everything a project summary is built from, read in one
+    round trip of three aggregate rows: count, max id and max timestamp of the
+    logs and decisions in the window, the version sum of decisions and tasks
+    (edits bump version_id) and the number of logs in the risk window.
+    """
+    risk_since = datetime.utcnow() - timedelta(days=risk_days)
+    logs = select(
+        literal('logs').label('source'), func.count(WorkLog.id), func.max(WorkLog.id), func.max(WorkLog.timestamp),
+        func.coalesce(func.sum(case((WorkLog.timestamp >= risk_since, 1), else_=0)), 0)
+    ).join(Task, Task.id == WorkLog.task_id).where(Task.project_id == project_id, WorkLog.timestamp >= since)
+    decisions = select(
+        literal('decisions'), func.count(Decision.id), func.max(Decision.id), func.max(Decision.timestamp),
+        func.coalesce(func.sum(Decision.version_id), 0)
+    ).where(Decision.project_id == project_id, Decision.timestamp >= since)
+    tasks = select(
+        literal('tasks'), func.count(Task.id), func.max(Task.id), func.max(Task.created_at),
+        func.coalesce(func.sum(Task.version_id), 0)
+    ).where(Task.project_id == project_id)
+
+    with read_replica():
+        rows = db.session.execute(union_all(logs, decisions, tasks)).all()
+    return {row[0]: list(row[1:]) for row in rows}
+
 def detect_risks(project_id, days=7):
     since = datetime.utcnow() - timedelta(days=days)
     blockers = WorkLog.query.join(Task).filter(
@@ -43,15 +82,8 @@ def generate_handover_report(user_id, preview=False):
     if not user:
         return {"error": "NotFound", "message": "User not found"}, 404
         
-    # Gather data for AI
-    open_tasks = Task.query.filter_by(user_id=user_id).filter(Task.status != 'DONE').all()
-    recent_logs = WorkLog.query.filter_by(user_id=user_id).order_by(WorkLog.timestamp.desc()).limit(10).all()
-    recent_decisions = Decision.query.filter_by(author_id=user_id).order_by(Decision.timestamp.desc()).limit(5).all()
-    
-    context = f"Member: {user.name}\n"
-    context += f"Recent Activity:\n" + "\n".join([f"- {l.content}" for l in recent_logs])
-    context += f"\nDecisions Made:\n" + "\n".join([f"- {d.title}: {d.explanation}" for d in recent_decisions])
-    context += f"\nPending Tasks:\n" + "\n".join([f"- {t.title}: {t.description}" for t in open_tasks])
+    # Mocked report: the condensed context (handover_context) is only built on paths that send a prompt
+    open_tasks = pending_tasks(user)
 
     # client = get_client()
     # try:
@@ -73,24 +105,67 @@ def generate_handover_report(user_id, preview=False):
     log_ai_event(None, None, "HANDOVER", f"User {user_id}", {"summary_length": len(summary)})
 
     # Persistence as per SOP
+    handover_report = store_handover(user_id, summary, "gpt-4o")
+
+    return {
+        "summary": summary,
+        "type": "Generated Summary",
+        "generated_at": handover_report.generated_at.isoformat(),
+        "id": handover_report.id
+    }, 200
+
+def pending_tasks(user):
+    with read_replica():
+        return Task.query.filter_by(user_id=user.id).filter(Task.status != 'DONE').all()
+
+def handover_context(user):
+    # Gather data for AI: the member's history that bears on the work being handed over
+    open_tasks = pending_tasks(user)
+    with read_replica():
+        pending_work = "\n".join(f"{t.title}\n{t.description or ''}" for t in open_tasks)
+        recent_logs = relevant_history(WorkLog, WorkLog.user_id, user.id, similarity_index.LOG, pending_work, 10)
+        recent_decisions = relevant_history(Decision, Decision.author_id, user.id, similarity_index.DECISION, pending_work, 5)
+    
+    context = ContextBuilder.for_report('handover').build(f"Member: {user.name}", [
+        ("Relevant Activity", [f"- {l.content}" for l in recent_logs]),
+        ("Decisions Made", [f"- {d.title}: {d.explanation}" for d in recent_decisions]),
+        ("Pending Tasks", [f"- {t.title}: {t.description}" for t in open_tasks])
+    ])
+    return context, open_tasks
+
+def relevant_history(model, owner_column, owner_id, kind, text, limit):
+    """
+    Up to limit of the owner's logs or decisions: the ones the similarity
+    index finds closest to text, topped up with the most recent. Only the most
+    recent when there is nothing to compare with or no index.
+    """
+    recent = model.query.filter(owner_column == owner_id).order_by(model.timestamp.desc()).limit(limit).all()
+    if len(recent) < limit or not text.strip(): # Fewer rows than the limit all go in anyway
+        return recent
+    owned_ids = db.session.execute(select(model.id).where(owner_column == owner_id)).scalars().all()
+    ranked = similarity_index.relevant(text, kind, owned_ids, limit)
+    if not ranked:
+        return recent
+    rows = {row.id: row for row in recent}
+    missing = [i for i in ranked if i not in rows]
+    if missing:
+        rows.update((row.id, row) for row in model.query.filter(model.id.in_(missing)))
+    chosen = ranked + [row.id for row in recent if row.id not in ranked][:limit - len(ranked)]
+    return [rows[i] for i in chosen if i in rows]
+
+def store_handover(user_id, summary, model_used):
     handover_report = AISummary(
         user_id=user_id,
         summary_type="HANDOVER",
         content=summary,
         status='SUCCESS',
-        model_used="gpt-4o",
+        model_used=model_used,
         context_hash=hashlib.sha256(summary.encode('utf-8')).hexdigest(), # Use summary content as hash for now as context is dynamic string
         generated_at=datetime.utcnow()
     )
     db.session.add(handover_report)
     db.session.commit()
-
-    return {
-        "summary": summary,
-        "type": "Generated Summary",
-        "generated_at": handover_report.generated_at.isoformat(),
-        "id": handover_report.id
-    }, 200
+    return handover_report
 
 def save_final_handover(user_id, content):
     handover_report = AISummary(
@@ -102,11 +177,32 @@ def save_final_handover(user_id, content):
         context_hash=hashlib.sha256(content.encode('utf-8')).hexdigest(),
         generated_at=datetime.utcnow()
     )
+    # Committed by the caller together with the rest of the exit workflow
     db.session.add(handover_report)
-    db.session.commit()
     return handover_report
 
+def cached_project_summary(project_id, report_type='daily'):
+    """L1 lookup only: returns the cached payload or None, without touching the DB."""
+    cache = get_summary_cache()
+    payload = cache.get(cache.key(project_id, report_type)) if cache else None
+    if payload is None:
+        return None
+    return {**payload, "type": "Generated Summary (Cached)"}
+
 def generate_project_evolution_summary(project_id, report_type='daily'):
+    cached = cached_project_summary(project_id, report_type)
+    if cached is not None:
+        return cached, 200
+
+    # Key taken before generating: a write that lands meanwhile bumps the version
+    cache = get_summary_cache()
+    key = cache.key(project_id, report_type) if cache else None
+    result, status_code = build_project_evolution_summary(project_id, report_type)
+    if cache and status_code == 200 and result.get('status') != 'FAILED':
+        cache.put(key, result)
+    return result, status_code
+
+def build_project_evolution_summary(project_id, report_type='daily'):
     project = Project.query.get(project_id)
     if not project:
         return {"error": "NotFound", "message": "Project not found"}, 404
@@ -115,33 +211,14 @@ def generate_project_evolution_summary(project_id, report_type='daily'):
     delta = timedelta(days=30) 
     since = datetime.utcnow() - delta
     
-    logs = WorkLog.query.join(Task).filter(Task.project_id == project_id, WorkLog.timestamp >= since).all()
-    decisions = Decision.query.filter(Decision.project_id == project_id, Decision.timestamp >= since).all()
-    
-    if not logs and not decisions:
+    # Cheap change detection first; logs and decisions are only loaded when the watermarks moved
+    context_hash, existing = project_summary_fingerprint(project, since, report_type)
+    if context_hash is None:
         return {"summary": "No significant activity recorded.", "type": "Generated Summary"}, 200
-
-    context = f"Project: {project.name}\n"
-    context += f"Recent Logs:\n" + "\n".join([f"- {l.content} ({l.hours_spent}h)" for l in logs])
-    context += f"\nRecent Decisions:\n" + "\n".join([f"- {d.title}: {d.reasoning}" for d in decisions])
-    
-    # Add risk detection insights
-    risk_insight = detect_risks(project_id)
-    context += f"\nInternal Risk Detection: {risk_insight}"
-
-    context_hash = get_context_hash(context)
-    
-    # Check if a summary with this context already exists
-    existing = AISummary.query.filter_by(project_id=project_id, summary_type=report_type.upper(), context_hash=context_hash, status='SUCCESS').first()
     if existing:
-        return {
-            "summary": existing.content,
-            "type": "Generated Summary (Cached)",
-            "generated_at": existing.generated_at.isoformat(),
-            "version": existing.id
-        }, 200
-
-    client = get_client()
+        return stored_summary_payload(existing), 200
+
+    # Demo text below; the condensed context (project_summary_context) is only built on paths that send a prompt
     status = 'SUCCESS'
     error = None
     summary = ""
@@ -199,16 +276,70 @@ Prioritize the *Payment Gateway Integration* next sprint to unblock the billing
     except Exception as e:
         status = 'FAILED'
         error = str(e)
-        summary = f"Summary generation failed. Context: {len(logs)} logs found."
+        summary = f"Summary generation failed. Context: {len(window_logs(project, since))} logs found."
 
 
     # Store versioned summary
+    new_report = store_project_summary(project_id, report_type, summary, status, context_hash, error)
+
+    return {
+        "summary": summary,
+        "type": "Generated Summary",
+        "generated_at": datetime.utcnow().isoformat(),
+        "version": new_report.id,
+        "status": status
+    }, 200
+
+def project_summary_fingerprint(project, since, report_type):
+    """
+    Returns (context_hash, existing): context_hash is None when the window holds
+    no activity, existing is the stored summary for an unchanged fingerprint.
+    """
+    watermarks = project_watermarks(project.id, since)
+    if not watermarks['logs'][0] and not watermarks['decisions'][0]:
+        return None, None
+
+    context_hash = get_context_hash(json.dumps([project.name, watermarks], sort_keys=True, default=str))
+    
+    # Check if a summary with this context already exists
+    existing = AISummary.query.filter_by(project_id=project.id, summary_type=report_type.upper(), context_hash=context_hash, status='SUCCESS').first()
+    return context_hash, existing
+
+def window_logs(project, since):
+    with read_replica():
+        return WorkLog.query.join(Task).filter(Task.project_id == project.id, WorkLog.timestamp >= since).all()
+
+def project_summary_context(project, since, report_type):
+    logs = window_logs(project, since)
+    with read_replica():
+        decisions = Decision.query.filter(Decision.project_id == project.id, Decision.timestamp >= since).all()
+
+        # Add risk detection insights
+        risk_insight = detect_risks(project.id)
+    context = ContextBuilder.for_report(report_type).build(
+        f"Project: {project.name}\nInternal Risk Detection: {risk_insight}",
+        [
+            ("Recent Logs", [f"- {l.content} ({l.hours_spent}h)" for l in logs]),
+            ("Recent Decisions", [f"- {d.title}: {d.reasoning}" for d in decisions])
+        ]
+    )
+    return context, logs
+
+def stored_summary_payload(report):
+    return {
+        "summary": report.content,
+        "type": "Generated Summary (Cached)",
+        "generated_at": report.generated_at.isoformat(),
+        "version": report.id
+    }
+
+def store_project_summary(project_id, report_type, summary, status, context_hash, error=None):
     new_report = AISummary(
         project_id=project_id,
         summary_type=report_type.upper(),
         content=summary,
         status=status,
-        model_used="gpt-4o",
+        model_used=SUMMARY_MODEL,
         context_hash=context_hash,
         error_log=error
     )
@@ -216,37 +347,115 @@ Prioritize the *Payment Gateway Integration* next sprint to unblock the billing
     db.session.commit()
 
     log_ai_event(None, project_id, report_type.upper(), f"Status: {status}", {"hash": context_hash})
+    return new_report
 
-    return {
-        "summary": summary,
-        "type": "Generated Summary",
-        "generated_at": datetime.utcnow().isoformat(),
-        "version": new_report.id,
-        "status": status
-    }, 200
+# --- Streaming (SSE) variants ---
+# Each returns (events, 200) where events yields (event, data) pairs:
+# 'chunk' for every content delta as it arrives, then 'done' with the stored
+# summary, or 'error' if the completion failed part-way.
+
+def replay_events(payload):
+    yield 'chunk', {"text": payload['summary']}
+    yield 'done', payload
+
+def stream_project_evolution_summary(project_id, report_type='daily'):
+    cached = cached_project_summary(project_id, report_type)
+    if cached is not None:
+        return replay_events(cached), 200
+
+    project = db.session.get(Project, project_id)
+    if not project:
+        return {"error": "NotFound", "message": "Project not found"}, 404
+
+    since = datetime.utcnow() - timedelta(days=30)
+    context_hash, existing = project_summary_fingerprint(project, since, report_type)
+    if context_hash is None:
+        return replay_events({"summary": "No significant activity recorded.", "type": "Generated Summary"}), 200
+    if existing:
+        return replay_events(stored_summary_payload(existing)), 200
+
+    # Everything is read before the first byte goes out; the generator only talks to the model
+    context, logs = project_summary_context(project, since, report_type)
+    prompt = SUMMARY_PROMPTS.get(report_type, DAILY_SUMMARY_PROMPT)
+    cache = get_summary_cache()
+    key = cache.key(project_id, report_type) if cache else None
+
+    def events():
+        parts = []
+        try:
+            for text in stream_completion(prompt, f"Summarize this project activity:\n\n{context}"):
+                parts.append(text)
+                yield 'chunk', {"text": text}
+        except Exception as e:
+            summary = f"Summary generation failed. Context: {len(logs)} logs found."
+            report = store_project_summary(project_id, report_type, summary, 'FAILED', context_hash, str(e))
+            yield 'error', {"message": str(e), "version": report.id}
+            return
+
+        report = store_project_summary(project_id, report_type, ''.join(parts), 'SUCCESS', context_hash)
+        payload = {
+            "summary": report.content,
+            "type": "Generated Summary",
+            "generated_at": report.generated_at.isoformat(),
+            "version": report.id,
+            "status": report.status
+        }
+        if cache:
+            cache.put(key, payload)
+        yield 'done', payload
+
+    return events(), 200
+
+def stream_handover_report(user_id):
+    user = db.session.get(User, user_id)
+    if not user:
+        return {"error": "NotFound", "message": "User not found"}, 404
+
+    context, open_tasks = handover_context(user)
+
+    def events():
+        parts = []
+        try:
+            for text in stream_completion(HANDOVER_PROMPT, f"Generate a handover report for this project member exit:\n\n{context}"):
+                parts.append(text)
+                yield 'chunk', {"text": text}
+        except Exception as e:
+            yield 'error', {"message": str(e)}
+            return
+
+        report = store_handover(user_id, ''.join(parts), SUMMARY_MODEL)
+        yield 'done', {
+            "summary": report.content,
+            "type": "Generated Summary",
+            "generated_at": report.generated_at.isoformat(),
+            "id": report.id,
+            "open_task_count": len(open_tasks)
+        }
+
+    return events(), 200
 
 def generate_contributor_summary(user_id):
     user = User.query.get(user_id)
     if not user:
         return {"error": "NotFound", "message": "User not found"}, 404
         
-    logs = WorkLog.query.filter_by(user_id=user_id).all()
-    decisions = Decision.query.filter_by(author_id=user_id).all()
+    with read_replica():
+        logs = WorkLog.query.filter_by(user_id=user_id).all()
+        decisions = Decision.query.filter_by(author_id=user_id).all()
     
-    context = f"Contributor: {user.name}\n"
-    context += f"History of Work:\n" + "\n".join([f"- {l.content}" for l in logs])
-    context += f"\nDecisions Created:\n" + "\n".join([f"- {d.title}" for d in decisions])
+    context = ContextBuilder.for_report('contributor').build(f"Contributor: {user.name}", [
+        ("History of Work", [f"- {l.content}" for l in logs]),
+        ("Decisions Created", [f"- {d.title}" for d in decisions])
+    ])
 
-    client = get_client()
     try:
-        response = client.chat.completions.create(
+        summary = get_llm_client().chat(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": CONTRIBUTOR_PROMPT},
                 {"role": "user", "content": f"Analyze contributor impact:\n\n{context}"}
             ]
         )
-        summary = response.choices[0].message.content
     except Exception as e:
         summary = "Error generating contributor analysis."
 
@@ -0,0 +1,165 @@
+"""
+Change feed for incremental client sync (/api/changes).
+
+Every write to a task, work log, decision, project membership or user
+appends a row to change_log in the same transaction. The row's seq comes
+from the table's autoincrement key. A client keeps the largest seq it has
+seen as its cursor and asks for what changed after it. The answer has one
+entry per entity, for its latest change, with the entity's current state,
+so a sync costs O(changes) however large the dataset is.
+
+Rows are queued by mapper events and written at the end of each flush. Bulk
+writers that use Core statements call record() themselves. Moving a task to
+another project records a delete in the old project's feed, for the task
+and for its logs.
+
+On SQLite, writers are serialized, so seq order is commit order. With
+concurrent writers (PostgreSQL) a seq can commit after a larger one, and a
+client could page past it. Clients there should re-read a short overlap
+behind their cursor.
+"""
+from collections import defaultdict
+from sqlalchemy import event, func, insert, inspect, or_, select
+from sqlalchemy.orm import Session, joinedload, object_session
+from ..models import ChangeLog, Decision, ProjectMember, Task, User, WorkLog, db
+
+TASK = 'task'
+LOG = 'log'
+DECISION = 'decision'
+MEMBER = 'member'
+USER = 'user'
+ENTITIES = (TASK, LOG, DECISION, MEMBER, USER)
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+def record(connection, entity, pairs, op=UPSERT):
+    """Appends one change per (entity_id, project_id) pair, e.g. for rows written with Core statements."""
+    rows = [{"entity": entity, "entity_id": entity_id, "project_id": project_id, "op": op} for entity_id, project_id in pairs]
+    if rows:
+        connection.execute(insert(ChangeLog), rows)
+
+def mark_session(session, entity, pairs, op=UPSERT):
+    """Queues changes for the session's next flush, from a Core writer that also flushes ORM changes."""
+    session.info.setdefault('change_log', []).extend((entity, entity_id, project_id, op) for entity_id, project_id in pairs)
+
+def current_cursor():
+    return db.session.scalar(select(func.max(ChangeLog.seq))) or 0
+
+# --- Mapper events ---
+
+def queue(target, change):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('change_log', []).append(change)
+
+def previous(target, name):
+    history = getattr(inspect(target).attrs, name).history
+    return history.deleted[0] if history.deleted else None
+
+def op_for(event_name):
+    return DELETE if event_name == 'after_delete' else UPSERT
+
+def listen(model, handler):
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, event_name, lambda mapper, connection, target, op=op_for(event_name): handler(target, op))
+
+def task_changed(task, op):
+    moved_from = previous(task, 'project_id')
+    if op == UPSERT and moved_from is not None and moved_from != task.project_id:
+        # Delete first: the unfiltered feed keeps the latest change per task
+        queue(task, (TASK, task.id, moved_from, DELETE))
+        session = object_session(task)
+        if session is not None: # Its logs go along with it
+            session.info.setdefault('change_log_moves', []).append((task.id, moved_from, task.project_id))
+    queue(task, (TASK, task.id, task.project_id, op))
+
+def log_changed(log, op):
+    queue(log, (LOG, log.id, None, op, log.task_id)) # Project resolved from the task at flush time
+
+def decision_changed(decision, op):
+    queue(decision, (DECISION, decision.id, decision.project_id, op))
+
+def member_changed(member, op):
+    queue(member, (MEMBER, member.id, member.project_id, op))
+
+def user_changed(user, op):
+    queue(user, (USER, user.id, None, op))
+
+listen(Task, task_changed)
+listen(WorkLog, log_changed)
+listen(Decision, decision_changed)
+listen(ProjectMember, member_changed)
+listen(User, user_changed)
+
+@event.listens_for(Session, 'after_flush')
+def write_flushed(session, flush_context):
+    changes = session.info.pop('change_log', None)
+    moves = session.info.pop('change_log_moves', None)
+    if not (changes or moves):
+        return
+    connection = session.connection()
+    changes = changes or []
+    task_ids = {change[4] for change in changes if change[0] == LOG}
+    if task_ids:
+        # One lookup for the projects of every log touched in this flush
+        projects = dict(connection.execute(select(Task.id, Task.project_id).where(Task.id.in_(task_ids))).all())
+        changes = [(LOG, c[1], projects.get(c[4]), c[3]) if c[0] == LOG else c for c in changes]
+    for task_id, old_project, new_project in moves or ():
+        for log_id in connection.execute(select(WorkLog.id).where(WorkLog.task_id == task_id)).scalars():
+            changes += [(LOG, log_id, old_project, DELETE), (LOG, log_id, new_project, UPSERT)]
+    rows = [{"entity": c[0], "entity_id": c[1], "project_id": c[2], "op": c[3]} for c in changes]
+    connection.execute(insert(ChangeLog), rows)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_unflushed(session):
+    session.info.pop('change_log', None)
+    session.info.pop('change_log_moves', None)
+
+# --- Reads ---
+
+LOADERS = {
+    TASK: lambda ids: Task.query.options(joinedload(Task.assignee)).filter(Task.id.in_(ids)),
+    LOG: lambda ids: WorkLog.query.filter(WorkLog.id.in_(ids)),
+    DECISION: lambda ids: Decision.query.options(joinedload(Decision.author)).filter(Decision.id.in_(ids)),
+    MEMBER: lambda ids: ProjectMember.query.options(joinedload(ProjectMember.user)).filter(ProjectMember.id.in_(ids)),
+    USER: lambda ids: User.query.filter(User.id.in_(ids)),
+}
+
+def read_changes(since=0, project_id=None, limit=None):
+    """
+    Latest change per entity after the cursor, oldest first, as
+    (entries, next_cursor, has_more). Entries are (change, entity) pairs;
+    entity is None for deletes and for rows that no longer exist. Every
+    change up to next_cursor is covered, either here or, for entities that
+    changed again later, on a later page.
+    """
+    limit = max(1, min(limit or DEFAULT_LIMIT, MAX_LIMIT))
+    scope = [ChangeLog.seq > since]
+    if project_id is not None:
+        scope.append(or_(ChangeLog.project_id == project_id, ChangeLog.project_id.is_(None)))
+    latest = db.session.execute(
+        select(func.max(ChangeLog.seq)).where(*scope)
+        .group_by(ChangeLog.entity, ChangeLog.entity_id)
+        .order_by(func.max(ChangeLog.seq)).limit(limit + 1)
+    ).scalars().all()
+    has_more = len(latest) > limit
+    latest = latest[:limit]
+    if not latest:
+        return [], since, False
+    changes = ChangeLog.query.filter(ChangeLog.seq.in_(latest)).order_by(ChangeLog.seq).all()
+
+    wanted = defaultdict(list)
+    for change in changes:
+        if change.op == UPSERT:
+            wanted[change.entity].append(change.entity_id)
+    loaded = {
+        (entity, row.id): row
+        for entity, ids in wanted.items()
+        for row in LOADERS[entity](ids)
+    }
+    entries = [(change, loaded.get((change.entity, change.entity_id))) for change in changes]
+    return entries, latest[-1], has_more
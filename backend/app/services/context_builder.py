@@ -0,0 +1,150 @@
+"""
+Token-budgeted prompt context for AI reports.
+
+History that fits the report's budget (AI_TOKEN_BUDGETS) is passed through
+as-is. Larger sections are split into chunks, the chunks are condensed in
+parallel by the model (map), and the partial summaries take the section's
+place (reduce), repeating until the section fits. Whatever still does not
+fit, e.g. because the provider is unavailable, is truncated, so the prompt
+stays bounded however much history a project has.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from ..ai_prompts import CHUNK_SUMMARY_PROMPT
+from .llm_client import get_llm_client
+
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception: # Optional dependency (or its encoding files) not available
+    ENCODING = None
+
+MAX_REDUCE_ROUNDS = 3
+
+def count_tokens(text):
+    if not text:
+        return 0
+    if ENCODING is not None:
+        return len(ENCODING.encode(text))
+    return len(text) // 4 + 1 # ~4 characters per token for English prose
+
+def truncate(text, max_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    if ENCODING is not None:
+        return ENCODING.decode(ENCODING.encode(text)[:max(0, max_tokens - 1)]) + "…"
+    return text[:max(0, (max_tokens - 1) * 4)] + "…"
+
+def fit_lines(lines, max_tokens):
+    """Keeps whole lines from the start while they fit; truncates the first one that does not."""
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            if max_tokens - used > 8:
+                kept.append(truncate(line, max_tokens - used - 1))
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+def chunk_lines(lines, chunk_tokens):
+    chunks, current, used = [], [], 0
+    for line in lines:
+        line = truncate(line, chunk_tokens)
+        cost = count_tokens(line) + 1
+        if current and used + cost > chunk_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def render(header, sections):
+    parts = [header] if header else []
+    for title, lines in sections:
+        parts.append(f"{title}:\n" + "\n".join(lines))
+    return "\n".join(parts)
+
+def llm_summarizer(max_tokens):
+    """Default map step: condenses one chunk with the model. Runs on worker threads."""
+    app = current_app._get_current_object()
+
+    def summarize(text):
+        with app.app_context():
+            return get_llm_client().chat(
+                messages=[
+                    {"role": "system", "content": CHUNK_SUMMARY_PROMPT},
+                    {"role": "user", "content": text}
+                ],
+                max_tokens=max_tokens
+            )
+    return summarize
+
+class ContextBuilder:
+    def __init__(self, budget, chunk_tokens=3000, max_workers=4, summarizer=None):
+        self.budget = budget
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.summarizer = summarizer # summarizer(max_tokens) -> fn(text) -> str
+        self.map_calls = 0
+
+    @classmethod
+    def for_report(cls, report_type, **kwargs):
+        config = current_app.config
+        budgets = config['AI_TOKEN_BUDGETS']
+        return cls(
+            budget=budgets.get(report_type.lower(), budgets['default']),
+            chunk_tokens=config['AI_CONTEXT_CHUNK_TOKENS'],
+            max_workers=config['AI_CONTEXT_MAP_WORKERS'],
+            **kwargs
+        )
+
+    def build(self, header, sections):
+        """
+        header: text kept verbatim; sections: [(title, [line, ...])].
+        Returns the context text, at most `budget` tokens long.
+        """
+        full = render(header, sections)
+        if count_tokens(full) <= self.budget:
+            return full
+
+        header = truncate(header, self.budget // 4)
+        available = self.budget - count_tokens(header) - sum(count_tokens(f"{title}:") + 1 for title, _ in sections)
+        sizes = [sum(count_tokens(line) + 1 for line in lines) for _, lines in sections]
+        total = sum(sizes) or 1
+
+        # Each section gets a share of the budget in proportion to its size
+        fitted = []
+        for (title, lines), size in zip(sections, sizes):
+            share = max(0, available * size // total)
+            fitted.append((title, self.condense(lines, share) if size > share else lines))
+        return truncate(render(header, fitted), self.budget)
+
+    def condense(self, lines, share):
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if sum(count_tokens(line) + 1 for line in lines) <= share or share <= 0:
+                break
+            chunks = chunk_lines(lines, self.chunk_tokens)
+            # Partial summaries together have to fit the share for the reduce step
+            per_chunk = max(16, share // len(chunks))
+            lines = self.map(chunks, per_chunk)
+        return fit_lines(lines, share)
+
+    def map(self, chunks, per_chunk):
+        summarize = (self.summarizer or llm_summarizer)(per_chunk)
+
+        def condense_chunk(chunk):
+            text = "\n".join(chunk)
+            try:
+                summary = summarize(text)
+            except Exception:
+                # Provider down or over capacity: keep an extract of the chunk instead
+                summary = "\n".join(fit_lines(chunk, per_chunk))
+            return truncate(summary or "", per_chunk)
+
+        self.map_calls += len(chunks)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+            return list(pool.map(condense_chunk, chunks))
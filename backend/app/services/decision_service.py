@@ -1,4 +1,5 @@
-from ..models import Decision, db, SystemEvent
+from ..models import Decision, db
+from . import event_service, live_updates
 
 def create_decision(project_id, author_id, title, explanation, reasoning, impact_level, task_id=None):
     decision = Decision(
@@ -12,14 +13,11 @@ def create_decision(project_id, author_id, title, explanation, reasoning, impact
     )
     db.session.add(decision)
     
-    # Log event
-    event = SystemEvent(
-        event_type='DECISION_CREATED',
-        description=f"Decision created: {title}",
-        triggered_by=author_id,
-        project_id=project_id
-    )
-    db.session.add(event)
+    event_service.record_event('DECISION_CREATED', f"Decision created: {title}", author_id, project_id)
+    db.session.flush()
+    live_updates.publish(db.session, project_id, live_updates.DECISION_CREATED, {
+        "decision_id": decision.id, "title": title, "author_id": author_id, "impact_level": impact_level, "task_id": task_id
+    })
     
     db.session.commit()
     return decision, 201
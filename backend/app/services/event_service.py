@@ -0,0 +1,233 @@
+"""
+Audit trail writer for SystemEvent rows.
+
+When the caller's session already has pending writes, the event joins that
+transaction and commits (or rolls back) with the change it describes.
+Otherwise it is buffered and written in bulk once the buffer reaches
+EVENT_BATCH_SIZE rows or its oldest row is EVENT_FLUSH_INTERVAL_SECONDS old.
+The buffer is flushed at shutdown; rows that cannot be written then are
+spilled to a JSONL file and replayed on the next start, so no audit event is
+dropped while the database is unavailable.
+
+A row the database rejects on its own (a constraint or a value it cannot
+bind) would fail every batch it is in. When a batch fails that way it is
+retried row by row, and the rows that still fail are logged and moved to a
+dead-letter file instead of going back into the buffer. Buffered writes
+never raise into the caller, whose own change is committed by then.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert
+from sqlalchemy.exc import OperationalError, StatementError
+from sqlalchemy.orm import Session
+from ..models import SystemEvent, db
+
+@event.listens_for(Session, 'after_flush')
+def mark_session_written(session, flush_context):
+    session.info['has_writes'] = True
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def clear_session_written(session):
+    session.info.pop('has_writes', None)
+
+def session_has_writes(session):
+    return bool(session.new or session.dirty or session.deleted or session.info.get('has_writes'))
+
+def is_row_error(error):
+    """True when the database rejected the rows themselves, rather than being unavailable."""
+    return isinstance(error, StatementError) and not isinstance(error, OperationalError) and not getattr(
+        error, 'connection_invalidated', False
+    )
+
+def to_json(row):
+    return json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}, default=str)
+
+class EventWriter:
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config['EVENT_BATCH_SIZE']
+        self.flush_interval = app.config['EVENT_FLUSH_INTERVAL_SECONDS']
+        self.spill_path = app.config.get('EVENT_SPILL_PATH') or os.path.join(app.instance_path, 'audit_spill.jsonl')
+        self.dead_letter_path = app.config.get('EVENT_DEAD_LETTER_PATH') or os.path.join(app.instance_path, 'audit_dead_letter.jsonl')
+        self.buffer = []
+        self.oldest = None
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.stopping = threading.Event()
+        self.load_spill()
+
+    def record(self, row):
+        session = db.session
+        if session_has_writes(session):
+            session.add(SystemEvent(**row))
+            return
+        with self.lock:
+            self.buffer.append(row)
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+        self.flush_if_due()
+
+    def record_many(self, rows):
+        with self.lock:
+            self.buffer.extend(rows)
+            if self.oldest is None and rows:
+                self.oldest = time.monotonic()
+        self.flush_if_due()
+
+    def is_due(self):
+        with self.lock: # The flusher thread may be emptying the buffer
+            return bool(self.buffer) and (
+                len(self.buffer) >= self.batch_size or time.monotonic() - self.oldest >= self.flush_interval
+            )
+
+    def flush_if_due(self, exc=None):
+        # Also the teardown hook: a failed flush leaves the rows buffered for the next one
+        try:
+            if self.is_due():
+                self.flush()
+        except Exception:
+            self.app.logger.exception("Audit event flush failed; will retry")
+
+    def flush(self):
+        """Writes the buffer; rows that could not be written for lack of a database go back and the error is raised."""
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+            self.oldest = None
+        if not rows:
+            return 0
+        if has_app_context() and current_app._get_current_object() is self.app:
+            written, unwritten, error = self.write_batch(rows)
+        else:
+            with self.app.app_context():
+                written, unwritten, error = self.write_batch(rows)
+        if unwritten:
+            # Put them back in front; the next flush retries them
+            with self.lock:
+                self.buffer[:0] = unwritten
+                self.oldest = time.monotonic()
+            raise error
+        return written
+
+    def write_batch(self, rows):
+        """Returns (rows written, rows to retry, the error that stopped them)."""
+        try:
+            self.write(rows)
+            return len(rows), [], None
+        except Exception as e:
+            if not is_row_error(e):
+                return 0, rows, e
+        # A bad row fails the whole batch; write the rest around it
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                self.write([row])
+                written += 1
+            except Exception as e:
+                if not is_row_error(e):
+                    return written, rows[index:], e
+                self.dead_letter(row, e)
+        return written, [], None
+
+    def write(self, rows):
+        with db.engine.begin() as connection:
+            connection.execute(insert(SystemEvent), rows)
+
+    def dead_letter(self, entry, error):
+        """Sets aside a row (or an unreadable spill line) the database will never take, with the reason."""
+        self.app.logger.error("Audit event rejected, moved to %s: %r (%s)", self.dead_letter_path, entry, error)
+        os.makedirs(os.path.dirname(self.dead_letter_path), exist_ok=True)
+        with open(self.dead_letter_path, 'a') as f:
+            f.write(json.dumps({"event": entry, "error": str(error), "at": datetime.utcnow().isoformat()}, default=str) + '\n')
+
+    def start_flusher(self):
+        if self.flusher or not self.flush_interval:
+            return
+        self.flusher = threading.Thread(target=self.run_flusher, name="event-flusher", daemon=True)
+        self.flusher.start()
+
+    def run_flusher(self):
+        while not self.stopping.wait(self.flush_interval):
+            self.flush_if_due()
+
+    def close(self):
+        self.stopping.set()
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception("Audit event flush failed at shutdown; spilling to %s", self.spill_path)
+            self.spill()
+
+    def spill(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        with open(self.spill_path, 'a') as f:
+            for row in rows:
+                f.write(to_json(row) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load_spill(self):
+        if not os.path.exists(self.spill_path):
+            return
+        rows = []
+        with open(self.spill_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+                    rows.append(row)
+                except (ValueError, TypeError, KeyError) as e:
+                    self.dead_letter(line.strip(), e)
+        # Only buffered here; the first flush writes them and never raises into create_app
+        self.buffer.extend(rows)
+        self.oldest = time.monotonic() - self.flush_interval if rows else None
+        os.remove(self.spill_path)
+
+def init_app(app):
+    writer = EventWriter(app)
+    app.extensions['event_writer'] = writer
+    app.teardown_appcontext(writer.flush_if_due)
+    atexit.register(writer.close)
+    return writer
+
+def build_event(event_type, description, user_id=None, project_id=None, metadata=None):
+    return {
+        "event_type": event_type,
+        "description": description,
+        "triggered_by": user_id,
+        "project_id": project_id,
+        "metadata_json": metadata,
+        "timestamp": datetime.utcnow()
+    }
+
+def record_event(event_type, description, user_id=None, project_id=None, metadata=None):
+    row = build_event(event_type, description, user_id, project_id, metadata)
+    writer = current_app.extensions.get('event_writer')
+    if writer is None:
+        db.session.add(SystemEvent(**row))
+        return
+    writer.record(row)
+
+def record_events(rows):
+    """Bulk variant for set-based writers; rows come from build_event."""
+    writer = current_app.extensions.get('event_writer')
+    if writer is None or session_has_writes(db.session):
+        db.session.execute(insert(SystemEvent), rows)
+        return
+    writer.record_many(rows)
+
+def flush_events():
+    writer = current_app.extensions.get('event_writer')
+    if writer:
+        writer.flush()
@@ -0,0 +1,210 @@
+"""
+Time-partitioned storage for the SystemEvent audit trail.
+
+Recent events live in the system_event table, the hot partition. compact()
+moves every whole calendar month older than EVENT_HOT_DAYS into an archive
+file. The file holds the month's rows as JSON lines sorted by (timestamp, id),
+gzip-compressed in blocks of EVENT_ARCHIVE_BLOCK_ROWS. Each block is its own
+gzip member, so it can be decompressed alone. The first timestamp and byte
+offset of every block form the file's sparse index, kept in the EventArchive
+catalog next to the file's time range.
+
+Archive files are written once and never changed. Events that arrive late
+for an archived month stay hot until the next compaction writes another file
+for that month. Each file is fsynced and renamed into place, and only then
+does one transaction record it in the catalog and delete the rows it holds.
+So every event is in exactly one place.
+
+query_events() reads the hot table and only the archives that overlap the
+time range asked for, and within them only the blocks that do.
+"""
+import gzip
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select
+from ..models import EventArchive, SystemEvent, db
+
+COLUMNS = ('id', 'event_type', 'description', 'triggered_by', 'project_id', 'timestamp', 'metadata_json')
+
+def archive_root():
+    return current_app.config.get('EVENT_ARCHIVE_PATH') or os.path.join(current_app.instance_path, 'event_archive')
+
+def month_start(timestamp):
+    return datetime(timestamp.year, timestamp.month, 1)
+
+def next_month(start):
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+def event_columns():
+    table = SystemEvent.__table__
+    return [table.c[name] for name in COLUMNS]
+
+def to_line(row):
+    return json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}) + '\n'
+
+def from_line(line):
+    row = json.loads(line)
+    row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+    return row
+
+def sort_key(row):
+    return row['timestamp'], row['id']
+
+# --- Compaction ---
+
+def compact(now=None):
+    """Archives every whole month that ended more than EVENT_HOT_DAYS ago; returns the catalog rows written."""
+    now = now or datetime.utcnow()
+    boundary = month_start(now - timedelta(days=current_app.config['EVENT_HOT_DAYS']))
+    table = SystemEvent.__table__
+    with db.engine.connect() as connection:
+        oldest = connection.execute(select(func.min(table.c.timestamp)).where(table.c.timestamp < boundary)).scalar()
+    written = []
+    start = month_start(oldest) if oldest else boundary
+    while start < boundary:
+        end = next_month(start)
+        archive = compact_partition(start, end)
+        if archive:
+            written.append(archive)
+        start = end
+    return written
+
+def write_blocks(f, rows, block_rows):
+    """Writes rows as gzip blocks; returns (block index, ids, first row, last row)."""
+    index, ids, first, last = [], [], None, None
+    for block in rows.partitions(block_rows):
+        block = [dict(row) for row in block]
+        index.append([block[0]['timestamp'].isoformat(), f.tell()])
+        f.write(gzip.compress(''.join(to_line(row) for row in block).encode('utf-8'), compresslevel=6, mtime=0))
+        ids.extend(row['id'] for row in block)
+        first = first or block[0]
+        last = block[-1]
+    return index, ids, first, last
+
+def compact_partition(start, end):
+    """Moves the hot events of one month into a new archive file; None when there are none."""
+    table = SystemEvent.__table__
+    root = archive_root()
+    os.makedirs(root, exist_ok=True)
+    with db.engine.begin() as connection:
+        # SQLite hands out max(rowid) + 1, so the newest event always stays hot to keep ids from being reused
+        newest_id = connection.execute(select(func.max(table.c.id))).scalar()
+        rows = connection.execution_options(stream_results=True).execute(
+            select(*event_columns())
+            .where(table.c.timestamp >= start, table.c.timestamp < end, table.c.id < newest_id)
+            .order_by(table.c.timestamp, table.c.id)
+        ).mappings()
+        name = f"events-{start:%Y-%m}-{newest_id}.jsonl.gz"
+        path = os.path.join(root, name)
+        with open(path + '.tmp', 'wb') as f:
+            index, ids, first, last = write_blocks(f, rows, current_app.config['EVENT_ARCHIVE_BLOCK_ROWS'])
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        if not ids:
+            os.remove(path + '.tmp')
+            return None
+        os.replace(path + '.tmp', path)
+        try:
+            archive = {
+                "partition": f"{start:%Y-%m}", "path": name, "first_timestamp": first['timestamp'],
+                "last_timestamp": last['timestamp'], "min_event_id": min(ids), "max_event_id": max(ids),
+                "row_count": len(ids), "size_bytes": size, "block_index": index, "created_at": datetime.utcnow()
+            }
+            connection.execute(insert(EventArchive), archive)
+            connection.execute(delete(table).where(table.c.id == bindparam('event_id')), [{"event_id": i} for i in ids])
+        except Exception:
+            os.remove(path) # Nothing was recorded; the rows stay hot
+            raise
+    return archive
+
+# --- Reads ---
+
+def read_archive(archive, start=None, end=None, newest_first=False, limit=None, where=None):
+    """
+    Yields the rows of one archive in [start, end) that pass where, decompressing
+    only the blocks that can hold them.
+    """
+    firsts = [datetime.fromisoformat(ts) for ts, _ in archive.block_index]
+    offsets = [offset for _, offset in archive.block_index] + [archive.size_bytes]
+    blocks = range(
+        max(bisect_left(firsts, start) - 1, 0) if start else 0,
+        bisect_left(firsts, end) if end else len(firsts)
+    )
+    found = 0
+    with open(os.path.join(archive_root(), archive.path), 'rb') as f:
+        for block in (reversed(blocks) if newest_first else blocks):
+            f.seek(offsets[block])
+            rows = [from_line(line) for line in gzip.decompress(f.read(offsets[block + 1] - offsets[block])).splitlines()]
+            rows = [
+                row for row in rows
+                if (start is None or row['timestamp'] >= start) and (end is None or row['timestamp'] < end)
+                and (where is None or where(row))
+            ]
+            yield from (reversed(rows) if newest_first else rows)
+            found += len(rows)
+            if limit and found >= limit:
+                return
+
+def overlapping_archives(start=None, end=None):
+    query = EventArchive.query
+    if start is not None:
+        query = query.filter(EventArchive.last_timestamp >= start)
+    if end is not None:
+        query = query.filter(EventArchive.first_timestamp < end)
+    return query.order_by(EventArchive.last_timestamp.desc()).all()
+
+def query_events(since=None, until=None, limit=50, project_id=None, event_types=None, before=None):
+    """
+    The newest limit events in [since, until) as dicts, newest first,
+    optionally of one project and some event types, and strictly older than
+    the (timestamp, id) position before for keyset paging. The hot table
+    answers first; archives are only opened when they can hold events newer
+    than the oldest row kept so far.
+    """
+    table = SystemEvent.__table__
+    query = select(*event_columns())
+    if since is not None:
+        query = query.where(table.c.timestamp >= since)
+    if until is not None:
+        query = query.where(table.c.timestamp < until)
+    if project_id is not None:
+        query = query.where(table.c.project_id == project_id)
+    if event_types:
+        query = query.where(table.c.event_type.in_(event_types))
+    if before is not None:
+        query = query.where(or_(table.c.timestamp < before[0], and_(table.c.timestamp == before[0], table.c.id < before[1])))
+        until = min(until, before[0] + timedelta(microseconds=1)) if until else before[0] + timedelta(microseconds=1)
+    rows = [dict(row) for row in db.session.execute(
+        query.order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(limit)
+    ).mappings()]
+
+    def where(row):
+        return (
+            (project_id is None or row['project_id'] == project_id)
+            and (not event_types or row['event_type'] in event_types)
+            and (before is None or sort_key(row) < tuple(before))
+        )
+
+    floor = rows[-1]['timestamp'] if len(rows) == limit else since
+    for archive in overlapping_archives(floor, until):
+        if len(rows) == limit and archive.last_timestamp < rows[-1]['timestamp']:
+            break
+        rows.extend(read_archive(archive, floor, until, newest_first=True, limit=limit, where=where))
+        rows.sort(key=sort_key, reverse=True)
+        del rows[limit:]
+    return rows
+
+def stats():
+    table = SystemEvent.__table__
+    hot_rows, oldest = db.session.execute(select(func.count(), func.min(table.c.timestamp)).select_from(table)).one()
+    archives, archived_rows, archived_bytes = db.session.execute(
+        select(func.count(EventArchive.id), func.sum(EventArchive.row_count), func.sum(EventArchive.size_bytes))
+    ).one()
+    return {
+        "hot_rows": hot_rows, "oldest_hot": oldest.isoformat() if oldest else None,
+        "archives": archives, "archived_rows": archived_rows or 0, "archived_bytes": archived_bytes or 0
+    }
@@ -0,0 +1,153 @@
+"""
+Exit workflow for one or many departing members at once (offboarding, reorgs).
+
+All departing users, their open tasks and every reassignment target are
+loaded with one query each and validated before anything is written. Tasks
+then move with one UPDATE per target (in chunks), the departing users are
+deactivated, and the audit events go out as one batch - all in a single
+transaction, so a request either applies completely or not at all. Boards
+subscribed to the affected projects hear about the reassignments after it
+commits.
+"""
+from collections import defaultdict
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+from ..models import Task, User, db
+from . import change_feed, event_service, live_updates, stats_service, ai_service, version_service
+from .summary_cache import mark_projects_changed
+from .task_service import status_deltas
+
+UPDATE_CHUNK_SIZE = 500
+
+def validation_error(errors):
+    return {"error": "ValidationFailed", "message": errors[0]['message'], "errors": errors}, 400
+
+def normalize(departure):
+    return {
+        "user_id": int(departure['user_id']),
+        "reassignments": {int(task_id): int(target) for task_id, target in (departure.get('reassignments') or {}).items()},
+        "default_assignee": int(departure['default_assignee']) if departure.get('default_assignee') is not None else None,
+        "handover_summary": departure.get('handover_summary')
+    }
+
+def confirm_exits(departures, actor_id=None):
+    """
+    departures: [{user_id, reassignments: {task_id: new_user_id}, default_assignee, handover_summary}]
+    Every open task of a departing user must be covered by an explicit
+    reassignment or the default_assignee. Returns (result, status).
+    """
+    try:
+        departures = [normalize(d) for d in departures]
+    except (KeyError, ValueError, TypeError, AttributeError):
+        return {"error": "InvalidInput", "message": "Each departure needs a user_id; IDs must be integers"}, 400
+    leaving_ids = [d['user_id'] for d in departures]
+    if not leaving_ids or len(set(leaving_ids)) != len(leaving_ids):
+        return {"error": "InvalidInput", "message": "List each departing user exactly once"}, 400
+
+    users = {u.id: u for u in User.query.filter(User.id.in_(leaving_ids))}
+    missing = [uid for uid in leaving_ids if uid not in users]
+    if missing:
+        return {"error": "NotFound", "message": f"User {missing[0]} not found", "user_ids": missing}, 404
+
+    open_tasks = defaultdict(dict)
+    for task in db.session.execute(
+        select(Task.id, Task.user_id, Task.project_id, Task.status)
+        .where(Task.user_id.in_(leaving_ids), Task.status != 'DONE')
+        .order_by(Task.id)
+    ):
+        open_tasks[task.user_id][task.id] = task
+
+    target_ids = {t for d in departures for t in d['reassignments'].values()}
+    target_ids.update(d['default_assignee'] for d in departures if d['default_assignee'] is not None)
+    targets = dict(db.session.execute(select(User.id, User.status).where(User.id.in_(target_ids))).all())
+
+    errors = []
+    for target in sorted(target_ids):
+        if target not in targets:
+            errors.append({"user_id": target, "error": "NotFound", "message": f"Target user {target} not found"})
+        elif target in users:
+            errors.append({"user_id": target, "error": "InvalidTarget", "message": f"Target user {target} is also leaving"})
+        elif targets[target] != 'Active':
+            errors.append({"user_id": target, "error": "InvalidTarget", "message": f"Target user {target} is not active"})
+
+    moves = [] # (task row, old user, new user)
+    for d in departures:
+        owned = open_tasks[d['user_id']]
+        for task_id in d['reassignments']:
+            if task_id not in owned:
+                errors.append({"task_id": task_id, "error": "InvalidTask",
+                               "message": f"Task {task_id} is not an open task of user {d['user_id']}"})
+        for task_id, task in owned.items():
+            target = d['reassignments'].get(task_id, d['default_assignee'])
+            if target is None:
+                errors.append({"task_id": task_id, "error": "ValidationFailed", "message": f"Task {task_id} must be reassigned."})
+            else:
+                moves.append((task, d['user_id'], target))
+    if errors:
+        return validation_error(errors)
+
+    reassign_tasks(moves)
+
+    events = []
+    for task, old_user, target in moves:
+        events.append(event_service.build_event(
+            'TASK_REASSIGNED', f"Task {task.id} reassigned from {users[old_user].name} during exit.", actor_id, task.project_id
+        ))
+        live_updates.publish(db.session, task.project_id, live_updates.TASK_REASSIGNED, {
+            "task_id": task.id, "user_id": target, "previous_user_id": old_user
+        })
+    for d in departures:
+        user = users[d['user_id']]
+        if d['handover_summary']:
+            ai_service.save_final_handover(user.id, d['handover_summary'])
+        user.status = 'Inactive'
+        events.append(event_service.build_event('USER_EXIT', f"User {user.name} exit finalized. Account Inactive.", actor_id))
+    event_service.record_events(events)
+    db.session.commit()
+
+    by_target = defaultdict(int)
+    for _, _, target in moves:
+        by_target[target] += 1
+    return {
+        "message": f"Exit process complete for {len(departures)} user(s).",
+        "user_ids": leaving_ids,
+        "reassigned": len(moves),
+        "by_target": dict(by_target)
+    }, 200
+
+def reassign_tasks(moves):
+    """
+    One UPDATE per target and chunk, bumping version_id like an ORM write
+    would. Mapper events do not see these, so the USER-scope rollups, the
+    task list versions, the change feed and the summary cache are adjusted
+    here.
+    """
+    task = Task.__table__
+    grouped = defaultdict(list)
+    for row, old_user, target in moves:
+        grouped[(old_user, target)].append(row.id)
+
+    for (old_user, target), task_ids in grouped.items():
+        for start in range(0, len(task_ids), UPDATE_CHUNK_SIZE):
+            chunk = task_ids[start:start + UPDATE_CHUNK_SIZE]
+            updated = db.session.execute(
+                update(task)
+                .where(task.c.id.in_(chunk), task.c.user_id == old_user, task.c.status != 'DONE')
+                .values(user_id=target, version_id=task.c.version_id + 1)
+            ).rowcount
+            if updated != len(chunk):
+                # Someone changed these tasks since they were validated
+                db.session.rollback()
+                raise StaleDataError("Tasks changed during reassignment")
+
+    changes = {}
+    for row, old_user, target in moves:
+        deltas = status_deltas(row.status, 1)
+        stats_service.add_change(changes, stats_service.USER, old_user, None, deltas, -1)
+        stats_service.add_change(changes, stats_service.USER, target, None, deltas)
+    stats_service.apply_deltas(db.session.connection(), changes)
+    project_ids = {row.project_id for row, _, _ in moves}
+    # Written and bumped together with the user changes when the deactivations are flushed
+    change_feed.mark_session(db.session, change_feed.TASK, [(row.id, row.project_id) for row, _, _ in moves])
+    version_service.mark_session(db.session, version_service.project_keys(version_service.TASKS, project_ids))
+    mark_projects_changed(db.session, project_ids)
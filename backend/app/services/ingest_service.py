@@ -0,0 +1,268 @@
+"""
+Bulk ingestion of work logs and tasks for imports from external tools.
+
+Rows are validated against the same rules as the single-row services, with
+the tasks and users they reference prefetched in one query each, and the
+valid ones are written with executemany INSERTs in a single transaction.
+Core INSERTs bypass the mapper events, so the bookkeeping those events do
+(stats rollups, list versions, change feed, search and similarity indexes,
+summary cache invalidation, audit trail) is applied here once per batch
+instead of once per row.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import insert, select
+from ..models import Project, Milestone, Task, WorkLog, Decision, User, db
+from . import change_feed, event_service, live_updates, search_service, similarity_index, stats_service, task_service, version_service
+from .summary_cache import mark_projects_changed
+
+class ParseError:
+    """Stands in for an input line that did not parse; reported as that row's error."""
+    def __init__(self, message):
+        self.message = message
+
+def row_error(index, error, message):
+    return {"index": index, "status": 400, "error": error, "message": message}
+
+def parse_timestamp(value):
+    if value in (None, ''):
+        return datetime.utcnow()
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+
+def validate_log_rows(rows):
+    """Returns (valid, errors): valid holds (index, values, decisions_made, task) tuples."""
+    task_ids, user_ids = set(), set()
+    for row in rows:
+        if isinstance(row, dict):
+            task_ids.add(row.get('task_id'))
+            user_ids.add(row.get('user_id'))
+    tasks = {t.id: t for t in db.session.execute(
+        select(Task.id, Task.project_id, Task.milestone_id, Task.status).where(Task.id.in_(int_ids(task_ids)))
+    )}
+    users = set(db.session.execute(select(User.id).where(User.id.in_(int_ids(user_ids)))).scalars())
+
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        if isinstance(row, ParseError):
+            errors.append(row_error(index, "InvalidJSON", row.message))
+            continue
+        if not isinstance(row, dict):
+            errors.append(row_error(index, "InvalidInput", "Row must be an object"))
+            continue
+        if not all(row.get(k) not in (None, '') for k in ['task_id', 'user_id', 'content', 'hours_spent']):
+            errors.append(row_error(index, "MissingRequiredFields", "Task, contributor, content, and hours are required."))
+            continue
+        try:
+            task_id = int(row['task_id'])
+            user_id = int(row['user_id'])
+            hours_spent = float(row['hours_spent'])
+            timestamp = parse_timestamp(row.get('timestamp'))
+        except (ValueError, TypeError):
+            errors.append(row_error(index, "InvalidInput", "Invalid ID, hours or timestamp format"))
+            continue
+
+        task = tasks.get(task_id)
+        if not task:
+            errors.append({**row_error(index, "NotFound", "Task not found"), "status": 404})
+        elif user_id not in users:
+            errors.append({**row_error(index, "NotFound", "User not found"), "status": 404})
+        elif task.status == 'DONE':
+            errors.append(row_error(index, "InvalidState", "Cannot log for DONE task"))
+        elif hours_spent <= 0:
+            errors.append(row_error(index, "InvalidInput", "Hours must be > 0"))
+        else:
+            values = {
+                "task_id": task_id, "user_id": user_id, "content": row['content'], "hours_spent": hours_spent,
+                "blockers": row.get('blockers', ''), "date": timestamp, "timestamp": timestamp
+            }
+            valid.append((index, values, row.get('decisions_made'), task))
+    return valid, errors
+
+def int_ids(values):
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (ValueError, TypeError):
+            pass
+    return ids
+
+def bulk_create_work_logs(rows, atomic=False):
+    """
+    Inserts every valid row in one transaction and reports per-row results in
+    input order. With atomic=True nothing is written unless every row is valid.
+    Returns (result, status): 201 all created, 207 some rejected, 400 none created.
+    """
+    valid, errors = validate_log_rows(rows)
+    if not valid or (atomic and errors):
+        return bulk_result([], errors, len(rows)), 400
+
+    inserted_ids = db.session.execute(
+        insert(WorkLog).returning(WorkLog.id, sort_by_parameter_order=True),
+        [values for _, values, _, _ in valid]
+    ).scalars().all()
+
+    # Same side effect as create_work_log: noted pivots become decisions
+    decisions = [
+        {
+            "project_id": task.project_id, "author_id": values['user_id'], "title": f"Insight from Task {values['task_id']}",
+            "explanation": decisions_made, "reasoning": "Derived from tactical work log execution.",
+            "impact_level": "Medium", "task_id": values['task_id'], "timestamp": datetime.utcnow()
+        }
+        for _, values, decisions_made, task in valid if decisions_made
+    ]
+    decision_ids = db.session.execute(insert(Decision).returning(Decision.id), decisions).scalars().all() if decisions else []
+
+    changes = {}
+    project_counts = defaultdict(int)
+    for _, values, _, task in valid:
+        stats_service.log_changes(changes, task.project_id, task.milestone_id, values['user_id'], values['hours_spent'], 1)
+        project_counts[task.project_id] += 1
+    for decision in decisions:
+        stats_service.add_change(changes, stats_service.GLOBAL, 0, None, {'decision_count': 1})
+        stats_service.add_change(changes, stats_service.PROJECT, decision['project_id'], decision['project_id'], {'decision_count': 1})
+        stats_service.add_change(changes, stats_service.USER, decision['author_id'], None, {'decision_count': 1})
+    stats_service.apply_deltas(db.session.connection(), changes)
+    search_service.reindex(db.session.connection(), search_service.LOG, inserted_ids)
+    search_service.reindex(db.session.connection(), search_service.DECISION, decision_ids)
+    similarity_index.queue_documents(db.session, db.session.connection(), similarity_index.LOG, inserted_ids)
+    similarity_index.queue_documents(db.session, db.session.connection(), similarity_index.DECISION, decision_ids)
+    change_feed.record(db.session.connection(), change_feed.LOG, [
+        (log_id, task.project_id) for (_, _, _, task), log_id in zip(valid, inserted_ids)
+    ])
+    if decision_ids:
+        change_feed.record(db.session.connection(), change_feed.DECISION, db.session.execute(
+            select(Decision.id, Decision.project_id).where(Decision.id.in_(decision_ids))
+        ).tuples())
+    version_service.bump(db.session.connection(), version_service.project_keys(version_service.LOGS, project_counts) | (
+        version_service.project_keys(version_service.DECISIONS, {d['project_id'] for d in decisions}) if decisions else set()
+    ))
+    mark_projects_changed(db.session, project_counts)
+    publish_resync(db.session, project_counts)
+    db.session.commit()
+
+    event_service.record_events(
+        [event_service.build_event('LOGS_IMPORTED', f"{count} work logs imported", None, project_id, {"count": count})
+         for project_id, count in project_counts.items()] +
+        [event_service.build_event('DECISION_CREATED', f"Decision created: {d['title']}", d['author_id'], d['project_id'])
+         for d in decisions]
+    )
+
+    created = [{"index": index, "status": 201, "id": log_id} for (index, _, _, _), log_id in zip(valid, inserted_ids)]
+    return bulk_result(created, errors, len(rows)), 201 if not errors else 207
+
+PRIORITIES = ('Low', 'Medium', 'High')
+
+def blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def validate_task_rows(rows, default_project_id=None):
+    """
+    Same rules as create_task, checked against projects, milestones and users
+    prefetched with one query each. Returns (valid, errors): valid holds
+    (index, values) tuples.
+    """
+    project_ids, milestone_ids, user_ids = set(), set(), set()
+    for row in rows:
+        if isinstance(row, dict):
+            project_ids.add(default_project_id if blank(row.get('project_id')) else row.get('project_id'))
+            milestone_ids.add(row.get('milestone_id'))
+            user_ids.add(row.get('user_id'))
+    projects = dict(db.session.execute(select(Project.id, Project.status).where(Project.id.in_(int_ids(project_ids)))).all())
+    milestones = dict(db.session.execute(
+        select(Milestone.id, Milestone.project_id).where(Milestone.id.in_(int_ids(milestone_ids)))
+    ).all())
+    users = dict(db.session.execute(select(User.id, User.status).where(User.id.in_(int_ids(user_ids)))).all())
+
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        if isinstance(row, ParseError):
+            errors.append(row_error(index, "InvalidJSON", row.message))
+            continue
+        if not isinstance(row, dict):
+            errors.append(row_error(index, "InvalidInput", "Row must be an object"))
+            continue
+        title = (row.get('title') or '').strip()
+        if not title:
+            errors.append(row_error(index, "MissingRequiredFields", "Title is required."))
+            continue
+        try:
+            project_id = int(default_project_id if blank(row.get('project_id')) else row['project_id'])
+            user_id = None if blank(row.get('user_id')) else int(row['user_id'])
+            milestone_id = None if blank(row.get('milestone_id')) else int(row['milestone_id'])
+        except (ValueError, TypeError):
+            errors.append(row_error(index, "InvalidInput", "Invalid project, user or milestone ID"))
+            continue
+        priority = row.get('priority') or 'Medium'
+
+        if len(title) > 200:
+            errors.append(row_error(index, "InvalidInput", "Title is longer than 200 characters"))
+        elif priority not in PRIORITIES:
+            errors.append(row_error(index, "InvalidInput", f"Priority must be one of {', '.join(PRIORITIES)}"))
+        elif projects.get(project_id, 'COMPLETED') == 'COMPLETED':
+            errors.append(row_error(index, "InvalidState", "Cannot add tasks to completed project"))
+        elif user_id is not None and user_id not in users:
+            errors.append({**row_error(index, "NotFound", "User not found"), "status": 404})
+        elif users.get(user_id) == 'Inactive':
+            errors.append(row_error(index, "InvalidState", "Cannot assign task to inactive member"))
+        elif milestone_id is not None and milestones.get(milestone_id) != project_id:
+            errors.append(row_error(index, "InvalidInput", "Milestone does not belong to the project"))
+        else:
+            valid.append((index, {
+                "project_id": project_id, "milestone_id": milestone_id, "user_id": user_id, "title": title,
+                "priority": priority, "description": row.get('description') or "", "status": 'TODO'
+            }))
+    return valid, errors
+
+def bulk_create_tasks(rows, project_id=None, atomic=False):
+    """
+    Bulk counterpart of create_task; same contract as bulk_create_work_logs.
+    Project counters and rollups are adjusted once per project rather than per row.
+    """
+    valid, errors = validate_task_rows(rows, project_id)
+    if not valid or (atomic and errors):
+        return bulk_result([], errors, len(rows)), 400
+
+    inserted_ids = db.session.execute(
+        insert(Task).returning(Task.id, sort_by_parameter_order=True),
+        [values for _, values in valid]
+    ).scalars().all()
+
+    connection = db.session.connection()
+    project_counts = defaultdict(int)
+    changes = {}
+    for _, values in valid:
+        project_counts[values['project_id']] += 1
+        stats_service.task_changes(
+            changes, values['project_id'], values['milestone_id'], values['user_id'], task_service.status_deltas('TODO', 1)
+        )
+    for pid, count in project_counts.items():
+        task_service.apply_counter_deltas(connection, pid, task_service.status_deltas('TODO', count))
+    stats_service.apply_deltas(connection, changes)
+    search_service.reindex(connection, search_service.TASK, inserted_ids)
+    change_feed.record(connection, change_feed.TASK, [(task_id, values['project_id']) for (_, values), task_id in zip(valid, inserted_ids)])
+    version_service.bump(connection, version_service.project_keys(version_service.TASKS, project_counts) | {(version_service.PROJECTS, 0)})
+    mark_projects_changed(db.session, project_counts)
+    publish_resync(db.session, project_counts)
+    db.session.commit()
+
+    event_service.record_events([
+        event_service.build_event('TASKS_IMPORTED', f"{count} tasks imported", None, pid, {"count": count})
+        for pid, count in project_counts.items()
+    ])
+
+    created = [{"index": index, "status": 201, "id": task_id} for (index, _), task_id in zip(valid, inserted_ids)]
+    return bulk_result(created, errors, len(rows)), 201 if not errors else 207
+
+def publish_resync(session, project_counts):
+    """One 'resync' per touched project instead of a message per row, which would overflow every board's queue."""
+    for project_id, count in project_counts.items():
+        live_updates.publish(session, project_id, live_updates.RESYNC, {"project_id": project_id, "imported": count})
+
+def bulk_result(created, errors, total):
+    return {
+        "total": total,
+        "created": len(created),
+        "failed": len(errors),
+        "results": sorted(created + errors, key=lambda r: r['index'])
+    }
@@ -0,0 +1,231 @@
+"""
+DB-backed background job queue for slow AI generations.
+
+Jobs live in the `job` table, so queued work survives a process restart,
+and a RUNNING job whose lease expired is picked up again. Workers claim a
+job with a compare-and-set UPDATE, which keeps several threads (or
+processes) from running the same job twice. Concurrency is bounded by the
+number of worker threads per process.
+
+While a job runs, a heartbeat renews its lease every third of
+JOB_LEASE_SECONDS, so a long map-reduce handover is not taken over by a
+second worker. A job whose worker keeps dying is reclaimed at most
+max_attempts times and then marked FAILED. A worker records the outcome
+only while it still holds the lease.
+"""
+import random
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, or_, and_
+from ..models import Job, db
+from ..db_routing import reset_routing
+from . import ai_service
+
+JOB_HANDLERS = {
+    'PROJECT_SUMMARY': lambda p: ai_service.generate_project_evolution_summary(p['project_id'], p.get('report_type', 'daily')),
+    'CONTRIBUTOR_SUMMARY': lambda p: ai_service.generate_contributor_summary(p['user_id']),
+    'HANDOVER': lambda p: ai_service.generate_handover_report(p['user_id']),
+}
+
+def enqueue(job_type, payload):
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job = Job(job_type=job_type, payload=payload, max_attempts=current_app.config['JOB_MAX_ATTEMPTS'])
+    db.session.add(job)
+    db.session.commit()
+
+    pool = current_app.extensions.get('job_pool')
+    if pool:
+        pool.notify()
+    return job
+
+def serialize_job(job):
+    return {
+        "id": job.id,
+        "type": job.job_type,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return {"error": "NotFound", "message": "Job not found"}, 404
+    return serialize_job(job), 200
+
+def lease_expired(now):
+    return and_(Job.status == 'RUNNING', Job.locked_at < now - timedelta(seconds=current_app.config['JOB_LEASE_SECONDS']))
+
+def runnable_filter(now):
+    return or_(
+        and_(Job.status == 'QUEUED', Job.run_after <= now),
+        # Lease expired: the worker died or the process restarted mid-job
+        and_(lease_expired(now), Job.attempts < Job.max_attempts)
+    )
+
+def fail_abandoned_jobs(now):
+    """Jobs that lost their worker on every attempt; one that kills its worker each time would otherwise run forever."""
+    return db.session.execute(
+        update(Job)
+        .where(lease_expired(now), Job.attempts >= Job.max_attempts)
+        .values(status='FAILED', error="Worker lost on every attempt", finished_at=now, locked_by=None)
+    ).rowcount
+
+def claim_next_job(worker_id):
+    """Atomically moves the oldest runnable job to RUNNING and returns it."""
+    if fail_abandoned_jobs(datetime.utcnow()):
+        db.session.commit()
+    while True:
+        now = datetime.utcnow()
+        candidate = db.session.query(Job.id).filter(runnable_filter(now)).order_by(Job.id).first()
+        if not candidate:
+            db.session.rollback()
+            return None
+
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == candidate.id, runnable_filter(now))
+            .values(status='RUNNING', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, candidate.id)
+        # Another worker won the race for this row; look for the next one
+
+class LeaseHeartbeat:
+    """Renews a running job's lease from a side thread until the job returns."""
+    def __init__(self, app, job_id, worker_id):
+        self.app = app
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = app.config['JOB_LEASE_SECONDS'] / 3
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"job-lease-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopping.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopping.wait(self.interval):
+            try:
+                with self.app.app_context(), db.engine.begin() as connection:
+                    renewed = connection.execute(
+                        update(Job)
+                        .where(Job.id == self.job_id, Job.locked_by == self.worker_id, Job.status == 'RUNNING')
+                        .values(locked_at=datetime.utcnow())
+                    ).rowcount
+            except Exception:
+                self.app.logger.exception("Could not renew the lease of job %s; will retry", self.job_id)
+                continue
+            if not renewed:
+                self.app.logger.warning("Job %s lost its lease to another worker", self.job_id)
+                return
+
+def run_job(job):
+    worker_id = job.locked_by
+    # The claim wrote to the primary; the job's own reads may use the replica
+    # unless it was enqueued so recently that the replica may not have its inputs yet
+    window = timedelta(seconds=current_app.config['READ_YOUR_WRITES_SECONDS'])
+    reset_routing(db.session, pin_primary=job.created_at is None or job.created_at > datetime.utcnow() - window)
+    with LeaseHeartbeat(current_app._get_current_object(), job.id, worker_id):
+        try:
+            result, status_code = JOB_HANDLERS[job.job_type](job.payload or {})
+        except Exception as e:
+            db.session.rollback()
+            return mark_failed(job, worker_id, f"{type(e).__name__}: {e}", retryable=True)
+
+    if status_code >= 400:
+        # Client errors (e.g. project deleted) will not succeed on retry
+        return mark_failed(job, worker_id, result.get('message', str(result)), retryable=status_code >= 500)
+    return finish(job, worker_id, status='SUCCEEDED', result=result, error=None, finished_at=datetime.utcnow())
+
+def finish(job, worker_id, **values):
+    """Writes the outcome only while worker_id still holds the job; a worker that lost its lease leaves it to the new one."""
+    written = db.session.execute(
+        update(Job).where(Job.id == job.id, Job.locked_by == worker_id, Job.status == 'RUNNING').values(**values)
+    ).rowcount
+    db.session.commit()
+    if not written:
+        current_app.logger.warning("Job %s was taken over by another worker; dropping this run's outcome", job.id)
+    return db.session.get(Job, job.id)
+
+def mark_failed(job, worker_id, error, retryable):
+    job = db.session.get(Job, job.id)
+    if retryable and job.attempts < job.max_attempts:
+        # Exponential backoff with jitter so retries do not stampede the provider
+        backoff = current_app.config['JOB_RETRY_BACKOFF_SECONDS'] * (2 ** (job.attempts - 1))
+        run_after = datetime.utcnow() + timedelta(seconds=backoff * random.uniform(0.5, 1.5))
+        return finish(job, worker_id, status='QUEUED', error=error, run_after=run_after, locked_by=None)
+    return finish(job, worker_id, status='FAILED', error=error, finished_at=datetime.utcnow())
+
+def run_pending(worker_id='inline', limit=None):
+    """Drains runnable jobs in the calling thread. Used by tests and scripts."""
+    processed = []
+    while limit is None or len(processed) < limit:
+        job = claim_next_job(worker_id)
+        if not job:
+            break
+        processed.append(run_job(job))
+    return processed
+
+class JobWorkerPool:
+    def __init__(self, app, workers=2, poll_interval=1.0):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.threads = []
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+
+    def start(self):
+        for i in range(self.workers):
+            worker_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}-{i}"
+            thread = threading.Thread(target=self.work, args=(worker_id,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def notify(self):
+        self.wakeup.set()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def work(self, worker_id):
+        while not self.stopping.is_set():
+            with self.app.app_context():
+                try:
+                    job = claim_next_job(worker_id)
+                    if job:
+                        run_job(job)
+                except Exception:
+                    self.app.logger.exception("Job worker %s crashed on a job", worker_id)
+                    job = None
+                finally:
+                    db.session.remove()
+            if not job:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+
+def start_workers(app):
+    if not (app.config.get('JOB_WORKER_AUTOSTART') and app.config.get('JOB_WORKERS')):
+        return None
+    pool = JobWorkerPool(app, workers=app.config['JOB_WORKERS'])
+    app.extensions['job_pool'] = pool
+    pool.start()
+    return pool
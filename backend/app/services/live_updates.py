@@ -0,0 +1,234 @@
+"""
+Live project updates pushed to task boards over Server-Sent Events.
+
+Writers queue a message for the project they touched (task status changes,
+reassignments, new logs and decisions) on the session, next to the audit
+event. A task moved to another project is announced to both boards. The
+messages go out after the transaction commits and are dropped on
+rollback, so a board never sees a change that did not happen. Bulk imports
+send one 'resync' per touched project rather than a message per row.
+
+The Broker fans messages out to the subscribers of each project in this
+process. It publishes through a backend:
+
+- LocalBackend hands messages straight back to this process's broker.
+- SQLiteBusBackend appends them to a small SQLite file shared by every
+  worker on the host. Each worker polls it and delivers new rows to its own
+  subscribers, standing in for a real pub/sub server.
+
+Each subscriber has a bounded queue. A consumer that falls PUSH_QUEUE_SIZE
+messages behind loses its backlog and gets one 'resync' message instead. It
+should then re-read /api/changes from the cursor it got in 'ready'. A slow
+tab can therefore not hold memory or delay the other subscribers.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+TASK_STATUS = 'task_status'
+TASK_REASSIGNED = 'task_reassigned'
+TASK_MOVED = 'task_moved'
+LOG_CREATED = 'log_created'
+DECISION_CREATED = 'decision_created'
+RESYNC = 'resync'
+PING = 'ping'
+
+class Subscription:
+    def __init__(self, project_id, maxsize):
+        self.project_id = project_id
+        self.maxsize = maxsize
+        self.messages = deque()
+        self.overflows = 0
+        self.ready = threading.Condition()
+
+    def put(self, message):
+        with self.ready:
+            if len(self.messages) >= self.maxsize:
+                self.messages.clear()
+                self.overflows += 1
+                self.messages.append({"event": RESYNC, "data": {"project_id": self.project_id}})
+            self.messages.append(message)
+            self.ready.notify()
+
+    def get(self, timeout=None):
+        """The next message, or None when none arrived within timeout."""
+        with self.ready:
+            if not self.messages:
+                self.ready.wait(timeout)
+            return self.messages.popleft() if self.messages else None
+
+class Broker:
+    def __init__(self, backend, queue_size):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.subscribers = {}
+        self.lock = threading.Lock()
+        backend.start(self.deliver)
+
+    def subscribe(self, project_id):
+        subscription = Subscription(project_id, self.queue_size)
+        with self.lock:
+            self.subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.project_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscribers.pop(subscription.project_id, None)
+
+    def publish(self, messages):
+        if messages:
+            self.backend.publish(messages)
+
+    def deliver(self, messages):
+        with self.lock:
+            targets = [(message, list(self.subscribers.get(message['project_id'], ()))) for message in messages]
+        for message, subscribers in targets:
+            for subscription in subscribers:
+                subscription.put(message)
+
+    def listen(self, subscription, heartbeat, first=None):
+        """Yields (event, data) pairs for sse_response, with a ping whenever heartbeat seconds pass quietly."""
+        try:
+            if first:
+                yield first
+            while True:
+                message = subscription.get(heartbeat)
+                yield (message['event'], message['data']) if message else (PING, {})
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self.lock:
+            subscriptions = [s for subscribers in self.subscribers.values() for s in subscribers]
+        return {
+            "backend": self.backend.name,
+            "projects": len({s.project_id for s in subscriptions}),
+            "subscribers": len(subscriptions),
+            "overflows": sum(s.overflows for s in subscriptions)
+        }
+
+    def close(self):
+        self.backend.close()
+
+# --- Backends ---
+
+class LocalBackend:
+    name = 'local'
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, messages):
+        self.deliver(messages)
+
+    def close(self):
+        pass
+
+class SQLiteBusBackend:
+    name = 'sqlite'
+    RETENTION_SECONDS = 60
+
+    def __init__(self, path, poll_interval):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.poller = None
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def start(self, deliver):
+        self.deliver = deliver
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS message (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL, payload TEXT)"
+            )
+            # Only what is published from now on
+            self.last_id = connection.execute("SELECT coalesce(max(id), 0) FROM message").fetchone()[0]
+        self.poller = threading.Thread(target=self.run_poller, name="push-bus-poller", daemon=True)
+        self.poller.start()
+
+    def publish(self, messages):
+        now = time.time()
+        connection = self.connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT INTO message (created_at, payload) VALUES (?, ?)", [(now, json.dumps(m)) for m in messages]
+            )
+            connection.execute("DELETE FROM message WHERE created_at < ?", (now - self.RETENTION_SECONDS,))
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def poll(self, connection):
+        rows = connection.execute("SELECT id, payload FROM message WHERE id > ? ORDER BY id", (self.last_id,)).fetchall()
+        if rows:
+            self.last_id = rows[-1][0]
+            self.deliver([json.loads(payload) for _, payload in rows])
+        return len(rows)
+
+    def run_poller(self):
+        connection = self.connect()
+        try:
+            while not self.stopping.wait(self.poll_interval):
+                try:
+                    self.poll(connection)
+                except sqlite3.Error:
+                    pass # Busy or briefly unavailable; the next poll picks the rows up
+        finally:
+            connection.close()
+
+    def close(self):
+        self.stopping.set()
+
+def build_backend(app):
+    if app.config['PUSH_BACKEND'] == 'sqlite':
+        path = app.config.get('PUSH_BUS_PATH') or os.path.join(app.instance_path, 'push_bus.db')
+        return SQLiteBusBackend(path, app.config['PUSH_BUS_POLL_SECONDS'])
+    return LocalBackend()
+
+def init_app(app):
+    broker = Broker(build_backend(app), app.config['PUSH_QUEUE_SIZE'])
+    app.extensions['push_broker'] = broker
+    atexit.register(broker.close)
+    return broker
+
+def get_broker():
+    return current_app.extensions.get('push_broker') if has_app_context() else None
+
+# --- Publishing ---
+
+def publish(session, project_id, event_name, data):
+    """Queues a message for the project's subscribers; it goes out when the session commits."""
+    if project_id is not None:
+        session.info.setdefault('push_messages', []).append({"project_id": project_id, "event": event_name, "data": data})
+
+@event.listens_for(Session, 'after_commit')
+def publish_committed(session):
+    messages = session.info.pop('push_messages', None)
+    broker = get_broker() if messages else None
+    if not broker:
+        return
+    try:
+        broker.publish(messages)
+    except Exception:
+        # The write is committed either way; boards catch up from the change feed
+        current_app.logger.exception("Publishing %d live update(s) failed", len(messages))
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted(session):
+    session.info.pop('push_messages', None)
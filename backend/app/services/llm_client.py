@@ -0,0 +1,261 @@
+"""
+Process-wide manager for calls to the LLM provider.
+
+One OpenAI client (and so one keep-alive connection pool) is shared by every
+request and job worker. Calls go through a concurrency semaphore, are retried
+with jittered exponential backoff on transient errors, and a circuit breaker
+fails them fast once the provider keeps failing, so callers drop straight to
+their fallback text instead of each waiting for its own timeout.
+"""
+import atexit
+import random
+import threading
+import time
+from collections import deque
+from flask import current_app
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
+
+class LLMUnavailable(Exception):
+    """Raised without contacting the provider; callers use their fallback."""
+
+class CircuitOpenError(LLMUnavailable):
+    pass
+
+class LLMBusyError(LLMUnavailable):
+    pass
+
+def is_transient(error):
+    if isinstance(error, (APIConnectionError, RateLimitError)): # APITimeoutError is a connection error
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+class CircuitBreaker:
+    """
+    CLOSED until `failure_threshold` consecutive transient failures, then OPEN
+    for `reset_seconds`. After that a single trial call is let through
+    (HALF_OPEN): success closes the circuit, failure opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'CLOSED', 'OPEN', 'HALF_OPEN'
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def abandon_trial(self):
+        with self.lock:
+            self.trial_running = False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class LLMMetrics:
+    def __init__(self, window=1000):
+        self.latencies = deque(maxlen=window) # seconds, successful calls only
+        self.counts = dict.fromkeys(
+            ('calls', 'successes', 'failures', 'retries', 'circuit_rejections', 'busy_rejections'), 0
+        )
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def incr(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def record_success(self, latency):
+        with self.lock:
+            self.counts['successes'] += 1
+            self.latencies.append(latency)
+
+    def record_failure(self, error):
+        with self.lock:
+            self.counts['failures'] += 1
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            counts = dict(self.counts)
+            errors = dict(self.errors)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else None
+
+        return {
+            **counts,
+            "errors": errors,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)}
+        }
+
+class LLMClient:
+    def __init__(self, api_key=None, base_url=None, max_concurrency=4, timeout=30, max_retries=2,
+                 backoff_seconds=0.5, acquire_timeout=None, failure_threshold=5, reset_seconds=30):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.acquire_timeout = timeout if acquire_timeout is None else acquire_timeout
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.metrics = LLMMetrics()
+        self.client = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            api_key=config['OPENAI_API_KEY'],
+            base_url=config.get('OPENAI_BASE_URL'),
+            max_concurrency=config['LLM_MAX_CONCURRENCY'],
+            timeout=config['LLM_TIMEOUT_SECONDS'],
+            max_retries=config['LLM_MAX_RETRIES'],
+            backoff_seconds=config['LLM_RETRY_BACKOFF_SECONDS'],
+            acquire_timeout=config['LLM_ACQUIRE_TIMEOUT_SECONDS'],
+            failure_threshold=config['LLM_CIRCUIT_FAILURE_THRESHOLD'],
+            reset_seconds=config['LLM_CIRCUIT_RESET_SECONDS']
+        )
+
+    def openai(self):
+        # Built on first use: a missing API key only fails the calls that need it
+        with self.lock:
+            if self.client is None:
+                self.client = OpenAI(
+                    api_key=self.api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0 # Retried here
+                )
+            return self.client
+
+    def backoff(self, attempt):
+        return random.uniform(0, self.backoff_seconds * (2 ** attempt))
+
+    def acquire(self):
+        if not self.breaker.allow():
+            self.metrics.incr('circuit_rejections')
+            raise CircuitOpenError("LLM provider circuit is open")
+        if not self.slots.acquire(timeout=self.acquire_timeout):
+            self.breaker.abandon_trial()
+            self.metrics.incr('busy_rejections')
+            raise LLMBusyError(f"All {self.max_concurrency} LLM slots busy")
+
+    def with_retries(self, call):
+        """Runs call() with retries on transient errors; returns (result, started_at)."""
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                return call(), started
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.metrics.incr('retries')
+                time.sleep(self.backoff(attempt))
+
+    def record_outcome(self, error, started=None):
+        if error is None:
+            self.breaker.record_success()
+            self.metrics.record_success(time.monotonic() - started)
+            return
+        self.metrics.record_failure(error)
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            # Bad request or missing key: says nothing about the provider's health
+            self.breaker.abandon_trial()
+
+    def chat(self, messages, model="gpt-4o", **kwargs):
+        """Returns the completion text."""
+        self.metrics.incr('calls')
+        self.acquire()
+        try:
+            response, started = self.with_retries(
+                lambda: self.openai().chat.completions.create(model=model, messages=messages, **kwargs)
+            )
+        except Exception as e:
+            self.record_outcome(e)
+            raise
+        finally:
+            self.slots.release()
+        self.record_outcome(None, started)
+        return response.choices[0].message.content
+
+    def stream_chat(self, messages, model="gpt-4o", **kwargs):
+        """
+        Yields content deltas as they arrive. Only opening the stream is
+        retried; a failure after the first chunk is raised to the caller.
+        The slot is held until the stream is exhausted or closed.
+        """
+        self.metrics.incr('calls')
+        self.acquire()
+        try:
+            try:
+                stream, started = self.with_retries(
+                    lambda: self.openai().chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            except GeneratorExit:
+                # Closed by the consumer mid-stream; the provider itself was answering
+                self.record_outcome(None, started)
+                raise
+            except Exception as e:
+                self.record_outcome(e)
+                raise
+            self.record_outcome(None, started)
+        finally:
+            self.slots.release()
+
+    def stats(self):
+        return {
+            **self.metrics.snapshot(),
+            "circuit": self.breaker.state,
+            "max_concurrency": self.max_concurrency
+        }
+
+    def close(self):
+        with self.lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+
+def init_app(app):
+    manager = LLMClient.from_config(app.config)
+    app.extensions['llm_client'] = manager
+    atexit.register(manager.close)
+    return manager
+
+def get_llm_client():
+    manager = current_app.extensions.get('llm_client')
+    if manager is None:
+        manager = init_app(current_app)
+    return manager
@@ -0,0 +1,97 @@
+"""
+Cached resolution of the request principal: the user named by X-User-ID.
+
+requires_role and the handlers behind it resolve the caller once per request
+(kept on flask.g) and through a short-TTL in-process cache across requests.
+Entries are plain snapshots, never ORM objects, so they can be shared between
+sessions and threads. A committed change to a user (status, role, name,
+deletion) evicts its entry in this process; other workers' entries age out
+after PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+from collections import namedtuple
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from ..cache import TTLCache
+from ..models import User, db
+
+Principal = namedtuple('Principal', 'id name email role status')
+
+class PrincipalCache:
+    def __init__(self, maxsize, ttl):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id):
+        return self.entries.get(user_id)
+
+    def put(self, principal):
+        self.entries.set(principal.id, principal)
+
+    def invalidate_users(self, user_ids):
+        self.entries.invalidate(lambda key: key in user_ids)
+
+    def stats(self):
+        return self.entries.stats()
+
+def init_app(app):
+    app.extensions['principal_cache'] = PrincipalCache(
+        maxsize=app.config['PRINCIPAL_CACHE_SIZE'], ttl=app.config['PRINCIPAL_CACHE_TTL_SECONDS']
+    )
+    app.before_request(forget_principal)
+
+def forget_principal():
+    # g outlives a request when an app context is already active (e.g. in tests)
+    g.pop('principal', None)
+
+def get_principal_cache():
+    return current_app.extensions.get('principal_cache') if has_app_context() else None
+
+def load_principal(user_id):
+    row = db.session.execute(
+        select(User.id, User.name, User.email, User.role, User.status).where(User.id == user_id)
+    ).first()
+    return Principal(*row) if row else None
+
+def resolve_principal(user_id):
+    """Returns the Principal for user_id, or None for unknown users (which are not cached)."""
+    cache = get_principal_cache()
+    principal = cache.get(user_id) if cache else None
+    if principal is None:
+        principal = load_principal(user_id)
+        if principal is not None and cache:
+            cache.put(principal)
+    return principal
+
+def current_principal():
+    """The caller of the current request, resolved at most once per request; None if absent or unknown."""
+    if 'principal' not in g:
+        try:
+            user_id = int(request.headers.get('X-User-ID', ''))
+        except ValueError:
+            user_id = None
+        g.principal = resolve_principal(user_id) if user_id is not None else None
+    return g.principal
+
+def current_user_id():
+    principal = current_principal()
+    return principal.id if principal else None
+
+# --- Invalidation ---
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_changed(mapper, connection, user):
+    session = object_session(user)
+    if session is not None:
+        session.info.setdefault('principal_ids', set()).add(user.id)
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed(session):
+    user_ids = session.info.pop('principal_ids', None)
+    cache = get_principal_cache() if user_ids else None
+    if cache:
+        cache.invalidate_users(user_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted(session):
+    session.info.pop('principal_ids', None)
@@ -0,0 +1,49 @@
+"""
+Read-side query layer for the list endpoints.
+
+Every query here loads the related rows a serializer touches up front
+(joined loading for many-to-one, selectin loading for collections, scalar
+subqueries for counts), so a list costs a fixed number of SQL statements
+regardless of how many rows it returns.
+"""
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
+from ..models import Project, Task, WorkLog, Decision, User, ProjectMember, db
+
+def users_with_projects():
+    return User.query.options(
+        selectinload(User.project_memberships).joinedload(ProjectMember.project)
+    ).all()
+
+def project_members(project_id):
+    return ProjectMember.query.options(joinedload(ProjectMember.user)).filter_by(project_id=project_id).all()
+
+def member_count_subquery():
+    return (
+        select(func.count(ProjectMember.id))
+        .where(ProjectMember.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+
+def projects_with_member_counts():
+    """Returns [(project, member_count)]."""
+    return db.session.query(Project, member_count_subquery().label('member_count')).all()
+
+def tasks_query(project_id=None):
+    query = Task.query.options(joinedload(Task.assignee))
+    if project_id:
+        query = query.filter_by(project_id=project_id)
+    return query
+
+def logs_query(task_id=None):
+    query = WorkLog.query
+    if task_id:
+        query = query.filter_by(task_id=task_id)
+    return query
+
+def decisions_query(project_id=None):
+    query = Decision.query.options(joinedload(Decision.author))
+    if project_id:
+        query = query.filter_by(project_id=project_id)
+    return query
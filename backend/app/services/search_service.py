@@ -0,0 +1,277 @@
+"""
+Full-text search over work logs, decisions and tasks.
+
+Every searchable row has one document in a dedicated index: an FTS5 table
+(`search_index`) on SQLite, or a `search_document` table with a weighted
+tsvector column and a GIN index on PostgreSQL. Titles weigh ten times the
+body text. On SQLite the kind and project of a document are indexed tokens,
+so the project filter is answered from the index instead of by discarding
+matches afterwards.
+
+Mapper events queue the rows whose text (or project) changed and they are
+re-indexed at the end of the same flush, so the index commits or rolls back
+with the data. Bulk writers using Core statements call reindex() themselves.
+"""
+import re
+import weakref
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session, object_session
+from ..models import Decision, Task, WorkLog, db
+
+LOG = 'log'
+DECISION = 'decision'
+TASK = 'task'
+KINDS = (LOG, DECISION, TASK)
+KIND_CODES = {LOG: 1, DECISION: 2, TASK: 3}
+
+MARK = '**' # Highlight markers around matched terms in titles and snippets
+MAX_LIMIT = 100
+REBUILD_CHUNK = 5000
+
+# --- Documents ---
+
+def document(kind, ref_id, project_id, title, parts, timestamp):
+    return {
+        "kind": kind, "ref_id": ref_id, "project_id": project_id, "title": title or '',
+        "body": "\n".join(part for part in parts if part), "ts": timestamp.isoformat() if timestamp else None
+    }
+
+def source_query(kind):
+    if kind == LOG:
+        return select(WorkLog.id, Task.project_id, WorkLog.content, WorkLog.blockers, WorkLog.timestamp).join(
+            Task, Task.id == WorkLog.task_id
+        ), WorkLog.id
+    if kind == DECISION:
+        return select(
+            Decision.id, Decision.project_id, Decision.title, Decision.explanation, Decision.reasoning, Decision.timestamp
+        ), Decision.id
+    return select(Task.id, Task.project_id, Task.title, Task.description, Task.created_at), Task.id
+
+def to_document(kind, row):
+    if kind == LOG:
+        return document(LOG, row.id, row.project_id, '', [row.content, row.blockers], row.timestamp)
+    if kind == DECISION:
+        return document(DECISION, row.id, row.project_id, row.title, [row.explanation, row.reasoning], row.timestamp)
+    return document(TASK, row.id, row.project_id, row.title, [row.description], row.created_at)
+
+def load_documents(connection, kind, ids):
+    query, id_col = source_query(kind)
+    return [to_document(kind, row) for row in connection.execute(query.where(id_col.in_(ids)))]
+
+# --- Index backends ---
+
+def match_terms(query):
+    return re.findall(r"\w+", query or '')
+
+class SqliteIndex:
+    table = 'search_index'
+
+    def create(self, connection):
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "kind, project, title, body, ref_id UNINDEXED, project_id UNINDEXED, ts UNINDEXED, "
+            "tokenize='porter unicode61')"
+        ))
+        # Default ORDER BY rank: bm25 over title (x10) and body; kind/project only filter
+        connection.execute(text("INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(0.0, 0.0, 10.0, 1.0)')"))
+
+    def rowid(self, kind, ref_id):
+        return ref_id * 4 + KIND_CODES[kind]
+
+    def delete(self, connection, kind, ids):
+        connection.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), [{"rowid": self.rowid(kind, i)} for i in ids])
+
+    def insert(self, connection, docs):
+        connection.execute(text(
+            "INSERT INTO search_index(rowid, kind, project, title, body, ref_id, project_id, ts) "
+            "VALUES (:rowid, :kind, :project, :title, :body, :ref_id, :project_id, :ts)"
+        ), [{**doc, "rowid": self.rowid(doc['kind'], doc['ref_id']), "project": f"p{doc['project_id']}"} for doc in docs])
+
+    def search(self, connection, query, project_id, kinds, limit, offset):
+        terms = match_terms(query)
+        expression = "{title body} : (" + " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*)'
+        if project_id is not None:
+            expression += f' AND project : "p{int(project_id)}"'
+        if kinds:
+            expression += " AND kind : (" + " OR ".join(f'"{k}"' for k in kinds) + ")"
+        return connection.execute(text(
+            "SELECT kind, ref_id, project_id, ts, "
+            "highlight(search_index, 2, :mark, :mark) AS title, "
+            "snippet(search_index, 3, :mark, :mark, '…', 16) AS snippet, -rank AS score "
+            "FROM search_index WHERE search_index MATCH :expression ORDER BY rank LIMIT :limit OFFSET :offset"
+        ), {"expression": expression, "mark": MARK, "limit": limit, "offset": offset}).mappings().all()
+
+class PostgresIndex:
+    table = 'search_document'
+
+    def create(self, connection):
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_document ("
+            "kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, project_id INTEGER, title TEXT, body TEXT, ts TIMESTAMP, "
+            "tsv TSVECTOR GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(body, '')), 'D')) STORED, "
+            "PRIMARY KEY (kind, ref_id))"
+        ))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_search_document_tsv ON search_document USING GIN (tsv)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_search_document_project ON search_document (project_id)"))
+
+    def delete(self, connection, kind, ids):
+        connection.execute(text("DELETE FROM search_document WHERE kind = :kind AND ref_id = ANY(:ids)"), {"kind": kind, "ids": list(ids)})
+
+    def insert(self, connection, docs):
+        connection.execute(text(
+            "INSERT INTO search_document (kind, ref_id, project_id, title, body, ts) "
+            "VALUES (:kind, :ref_id, :project_id, :title, :body, CAST(:ts AS TIMESTAMP))"
+        ), docs)
+
+    def search(self, connection, query, project_id, kinds, limit, offset):
+        # Rank and page first; headlines are only computed for the rows returned (default
+        # ts_rank_cd weights make A-weighted titles count 10x the D-weighted body)
+        filters = ""
+        if project_id is not None:
+            filters += " AND project_id = :project_id"
+        if kinds:
+            filters += " AND kind = ANY(:kinds)"
+        options = f"StartSel={MARK}, StopSel={MARK}"
+        return connection.execute(text(
+            "WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query), "
+            "hits AS (SELECT kind, ref_id, project_id, ts, title, body, ts_rank_cd(tsv, q.query) AS score "
+            f"FROM search_document, q WHERE tsv @@ q.query{filters} ORDER BY score DESC LIMIT :limit OFFSET :offset) "
+            "SELECT kind, ref_id, project_id, ts, "
+            f"ts_headline('english', title, q.query, '{options}, HighlightAll=true') AS title, "
+            f"ts_headline('english', body, q.query, '{options}, MaxWords=20, MinWords=8') AS snippet, score "
+            "FROM hits, q ORDER BY score DESC"
+        ), {"query": query, "project_id": project_id, "kinds": list(kinds or []), "limit": limit, "offset": offset}).mappings().all()
+
+INDEXES = {'sqlite': SqliteIndex(), 'postgresql': PostgresIndex()}
+_present = weakref.WeakKeyDictionary() # engine -> whether its index table exists
+
+def index_for(connection):
+    """The search index of this database, or None when it has none (other dialects, SQLite without FTS5)."""
+    index = INDEXES.get(connection.dialect.name)
+    if index is None:
+        return None
+    engine = connection.engine
+    if engine not in _present:
+        _present[engine] = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_index'" if index.table == 'search_index'
+            else "SELECT 1 FROM information_schema.tables WHERE table_name = 'search_document'"
+        ).first() is not None
+    return index if _present[engine] else None
+
+def create_index(connection):
+    """Creates and fills the index; used by the migration. Returns False when the database cannot host one."""
+    index = INDEXES.get(connection.dialect.name)
+    if index is None:
+        return False
+    try:
+        with connection.begin_nested():
+            index.create(connection)
+    except Exception: # e.g. SQLite compiled without FTS5
+        return False
+    _present.pop(connection.engine, None)
+    rebuild(connection, index)
+    return True
+
+def rebuild(connection, index=None):
+    index = index or index_for(connection)
+    if index is None:
+        return
+    for kind in KINDS:
+        query, id_col = source_query(kind)
+        last_id = 0
+        while True:
+            rows = connection.execute(query.where(id_col > last_id).order_by(id_col).limit(REBUILD_CHUNK)).all()
+            if not rows:
+                break
+            index.delete(connection, kind, [row.id for row in rows])
+            index.insert(connection, [to_document(kind, row) for row in rows])
+            last_id = rows[-1].id
+
+def reindex(connection, kind, ids, removed=()):
+    """Refreshes the documents of the given rows (and drops removed ones) inside the caller's transaction."""
+    index = index_for(connection)
+    ids, removed = set(ids), set(removed)
+    if index is None or not (ids or removed):
+        return
+    index.delete(connection, kind, ids | removed)
+    docs = load_documents(connection, kind, ids) if ids else []
+    if docs:
+        index.insert(connection, docs)
+
+# --- Mapper events ---
+
+INDEXED = {
+    WorkLog: (LOG, ('content', 'blockers', 'task_id')),
+    Decision: (DECISION, ('title', 'explanation', 'reasoning', 'project_id')),
+    Task: (TASK, ('title', 'description', 'project_id')),
+}
+
+def queue(target, bucket, key):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(bucket, set()).add(key)
+
+def document_inserted(mapper, connection, target):
+    queue(target, 'search_reindex', (INDEXED[mapper.class_][0], target.id))
+
+def document_updated(mapper, connection, target):
+    kind, columns = INDEXED[mapper.class_]
+    attrs = inspect(target).attrs
+    if any(attrs[column].history.has_changes() for column in columns):
+        queue(target, 'search_reindex', (kind, target.id))
+        if kind == TASK and attrs['project_id'].history.has_changes():
+            queue(target, 'search_moved_tasks', target.id) # Its logs change project too
+
+def document_deleted(mapper, connection, target):
+    queue(target, 'search_remove', (INDEXED[mapper.class_][0], target.id))
+
+for model in INDEXED:
+    event.listen(model, 'after_insert', document_inserted)
+    event.listen(model, 'after_update', document_updated)
+    event.listen(model, 'after_delete', document_deleted)
+
+@event.listens_for(Session, 'after_flush')
+def sync_flushed(session, flush_context):
+    pending = session.info.pop('search_reindex', set())
+    removed = session.info.pop('search_remove', set())
+    moved = session.info.pop('search_moved_tasks', set())
+    if not (pending or removed or moved):
+        return
+    connection = session.connection()
+    if moved:
+        pending |= {(LOG, log_id) for log_id in connection.execute(select(WorkLog.id).where(WorkLog.task_id.in_(moved))).scalars()}
+    for kind in KINDS:
+        reindex(connection, kind, [i for k, i in pending if k == kind], [i for k, i in removed if k == kind])
+
+@event.listens_for(Session, 'after_rollback')
+def discard_unflushed(session):
+    for bucket in ('search_reindex', 'search_remove', 'search_moved_tasks'):
+        session.info.pop(bucket, None)
+
+# --- Queries ---
+
+def search(query, project_id=None, kinds=None, limit=20, offset=0):
+    """Ranked matches as (result, status); pages by offset with next_offset."""
+    if not match_terms(query):
+        return {"error": "InvalidInput", "message": "q must contain at least one word"}, 400
+    kinds = [k for k in (kinds or []) if k]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        return {"error": "InvalidInput", "message": f"Unknown type {unknown[0]!r}; use {', '.join(KINDS)}"}, 400
+    limit = max(1, min(limit or 20, MAX_LIMIT))
+    offset = max(0, offset or 0)
+
+    connection = db.session.connection()
+    index = index_for(connection)
+    if index is None:
+        return {"error": "NotSupported", "message": "Full-text search is not available on this database"}, 501
+
+    rows = index.search(connection, query, project_id, kinds, limit + 1, offset)
+    items = [{
+        "type": row['kind'], "id": row['ref_id'], "project_id": row['project_id'],
+        "title": row['title'], "snippet": row['snippet'], "score": round(float(row['score']), 6),
+        "timestamp": row['ts'].isoformat() if hasattr(row['ts'], 'isoformat') else row['ts']
+    } for row in rows[:limit]]
+    return {"items": items, "next_offset": offset + limit if len(rows) > limit else None}, 200
@@ -0,0 +1,524 @@
+"""
+Local similarity index over decisions and work logs, for "related history".
+
+Each document is turned into a hashed TF-IDF vector. Words are hashed with
+crc32 into SIMILARITY_DIMENSIONS signed buckets, so vectors agree across
+processes. Each word is weighted by 1 + log(tf) and by the inverse document
+frequency of its bucket at the time the document is indexed, and the vector
+is L2-normalised. The vectors are kept in one float32 matrix. Parallel
+arrays hold the keys (ref_id * 4 + kind code, as in the search index) and
+the projects.
+
+With SIMILARITY_INDEX_PATH set, the arrays are .npy files. At startup they
+are opened with np.load(mmap_mode), so loading copies nothing and workers
+share the page cache. Writers take a file lock, and readers remap when
+meta.json changes. Without a path, each process keeps its own copy in
+memory, built from the database on first use.
+
+Cosine similarity is a matrix product over blocks of rows for a whole batch
+of query vectors, with argpartition picking the top k. Committed inserts and
+edits are added incrementally. IDF weights drift as the corpus grows until
+the next rebuild (rebuild_similarity.py).
+"""
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from ..models import Decision, Task, WorkLog, db
+from .search_service import DECISION, KIND_CODES, LOG, load_documents, source_query, to_document
+
+try:
+    import numpy as np
+except ImportError: # Optional dependency; /api/similar answers 501 without it
+    np = None
+
+try:
+    import fcntl
+except ImportError: # Windows: a single writing process is assumed
+    fcntl = None
+
+KINDS = (LOG, DECISION)
+CODE_KINDS = {KIND_CODES[kind]: kind for kind in KINDS}
+MAX_K = 50
+BLOCK_ROWS = 65536 # Rows scored per matrix product; bounds the temporary score matrix
+REBUILD_CHUNK = 5000
+EXCERPT_CHARS = 200
+
+WORD = re.compile(r"\w\w+")
+STOPWORDS = frozenset(
+    "the and for with that this from into was were are has have had not but all any can our out its via per "
+    "been will would should could about after before then than them they their there when what which while".split()
+)
+
+def key_of(kind, ref_id):
+    return ref_id * 4 + KIND_CODES[kind]
+
+def split_key(key):
+    return CODE_KINDS[key % 4], key // 4
+
+def document_text(doc):
+    return f"{doc['title']}\n{doc['body']}"
+
+def words(text):
+    return [word for word in WORD.findall((text or '').lower()) if word not in STOPWORDS]
+
+@lru_cache(maxsize=65536)
+def bucket_of(word, dim):
+    """(bucket, sign) of a word: the sign halves the damage of collisions on the dot product."""
+    digest = zlib.crc32(word.encode('utf-8'))
+    return digest % dim, 1.0 if digest & 0x80000000 else -1.0
+
+class SimilarityIndex:
+    ARRAYS = ('vectors', 'keys', 'projects')
+
+    def __init__(self, dim, path=None):
+        self.dim = dim
+        self.path = path
+        self.lock = threading.RLock()
+        self.reset()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.load()
+
+    def reset(self):
+        self.ready = False
+        self.count = 0 # Rows in use, including removed ones (key -1) until the next rebuild
+        self.docs = 0 # Live documents, the N of the IDF
+        self.df = np.zeros(self.dim, dtype=np.int64)
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.projects = np.zeros(0, dtype=np.int64)
+        self.rows = {}
+        self.meta_mtime = None
+
+    # --- Files ---
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def meta_stamp(self):
+        try:
+            return os.stat(self.file('meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        """Maps the arrays on disk (zero-copy); leaves the index not ready when there are none or they do not fit."""
+        stamp = self.meta_stamp()
+        if stamp is None:
+            return
+        with open(self.file('meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('dim') != self.dim:
+            return # Built with other dimensions: rebuilt on first use
+        self.vectors, self.keys, self.projects = (np.load(self.file(f"{name}.npy"), mmap_mode='r+') for name in self.ARRAYS)
+        self.df = np.array(meta['df'], dtype=np.int64)
+        self.count, self.docs = meta['count'], meta['docs']
+        self.rows = {int(key): row for row, key in enumerate(self.keys[:self.count].tolist()) if key >= 0}
+        self.meta_mtime = stamp
+        self.ready = True
+
+    def refresh(self):
+        """Picks up what other processes wrote since this one last loaded."""
+        if self.path and self.meta_stamp() != self.meta_mtime:
+            self.load()
+
+    def save(self):
+        for name in self.ARRAYS:
+            getattr(self, name).flush()
+        meta = {"dim": self.dim, "count": self.count, "docs": self.docs, "df": self.df.tolist()}
+        with open(self.file('meta.json.tmp'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.file('meta.json.tmp'), self.file('meta.json'))
+        self.meta_mtime = self.meta_stamp()
+
+    @contextmanager
+    def writing(self):
+        with self.lock:
+            if not self.path:
+                yield
+                return
+            with open(self.file('lock'), 'w') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self.refresh()
+                yield
+                self.save()
+
+    def allocate(self, name, shape, dtype):
+        if not self.path:
+            return np.zeros(shape, dtype=dtype)
+        return np.lib.format.open_memmap(self.file(f"{name}.npy.tmp"), mode='w+', dtype=dtype, shape=shape)
+
+    def install(self, name, array):
+        if self.path:
+            array.flush()
+            os.replace(self.file(f"{name}.npy.tmp"), self.file(f"{name}.npy")) # The mapping survives the rename
+        setattr(self, name, array)
+
+    def reserve(self, rows):
+        capacity = len(self.keys)
+        if self.count + rows <= capacity:
+            return
+        capacity = max(self.count + rows, capacity * 2, 1024)
+        for name, shape in (('vectors', (capacity, self.dim)), ('keys', (capacity,)), ('projects', (capacity,))):
+            current = getattr(self, name)
+            grown = self.allocate(name, shape, current.dtype)
+            grown[:self.count] = current[:self.count]
+            self.install(name, grown)
+
+    # --- Vectors ---
+
+    def term_buckets(self, text):
+        """{bucket: signed tf weight} of one text."""
+        weights = {}
+        for word, count in Counter(words(text)).items():
+            bucket, sign = bucket_of(word, self.dim)
+            weights[bucket] = weights.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+        return weights
+
+    def vectorize(self, texts):
+        """Unit TF-IDF rows for texts, weighted with the current document frequencies."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            weights = self.term_buckets(text)
+            if weights:
+                matrix[row, list(weights)] = list(weights.values())
+        matrix *= (np.log((1.0 + self.docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def count_terms(self, texts):
+        for text in texts:
+            self.df[list(self.term_buckets(text))] += 1
+
+    def add(self, docs):
+        """Indexes search_service documents; ones already present are replaced (their old terms stay in df)."""
+        if not docs:
+            return
+        with self.writing():
+            keys = [key_of(doc['kind'], doc['ref_id']) for doc in docs]
+            texts = [document_text(doc) for doc in docs]
+            new = [text for key, text in zip(keys, texts) if key not in self.rows]
+            self.count_terms(new)
+            self.docs += len(new)
+            matrix = self.vectorize(texts)
+            self.reserve(len(new))
+            rows = []
+            for key in keys:
+                if key not in self.rows:
+                    self.rows[key] = self.count
+                    self.count += 1
+                rows.append(self.rows[key])
+            self.vectors[rows] = matrix
+            self.keys[rows] = keys
+            self.projects[rows] = [doc['project_id'] if doc['project_id'] is not None else -1 for doc in docs]
+
+    def remove(self, keys):
+        with self.writing():
+            rows = [self.rows.pop(key) for key in keys if key in self.rows]
+            if rows:
+                self.vectors[rows] = 0.0
+                self.keys[rows] = -1
+                self.docs -= len(rows)
+
+    def replace_all(self, chunks):
+        """
+        Builds the index from scratch from an iterable factory of document
+        chunks, read twice: once for the document frequencies, once for the
+        vectors, so every row is weighted with the final IDF.
+        """
+        with self.writing():
+            self.df = np.zeros(self.dim, dtype=np.int64)
+            self.docs = 0
+            for docs in chunks():
+                self.count_terms([document_text(doc) for doc in docs])
+                self.docs += len(docs)
+            capacity = max(self.docs, 1024)
+            arrays = {name: self.allocate(name, shape, dtype) for name, shape, dtype in (
+                ('vectors', (capacity, self.dim), np.float32), ('keys', (capacity,), np.int64), ('projects', (capacity,), np.int64)
+            )}
+            self.count, self.rows = 0, {}
+            for docs in chunks():
+                docs = docs[:capacity - self.count] # Rows written since the first pass wait for the next commit
+                start, stop = self.count, self.count + len(docs)
+                arrays['vectors'][start:stop] = self.vectorize([document_text(doc) for doc in docs])
+                arrays['keys'][start:stop] = [key_of(doc['kind'], doc['ref_id']) for doc in docs]
+                arrays['projects'][start:stop] = [doc['project_id'] if doc['project_id'] is not None else -1 for doc in docs]
+                self.count = stop
+            for name, array in arrays.items():
+                self.install(name, array)
+            self.rows = {int(key): row for row, key in enumerate(self.keys[:self.count].tolist())}
+            self.docs = self.count
+            self.ready = True
+
+    # --- Queries ---
+
+    def vector(self, key):
+        row = self.rows.get(key)
+        return None if row is None else np.array(self.vectors[row])
+
+    def top_k(self, queries, k, kinds=None, project_id=None, exclude=None):
+        """
+        The k most similar documents for each row of queries (unit vectors),
+        as lists of (key, score), best first. exclude holds one key per query
+        to leave out of its own results, e.g. the query document itself.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        exclude_rows = [self.rows.get(key, -1) for key in (exclude or [None] * len(queries))]
+        codes = [KIND_CODES[kind] for kind in kinds] if kinds else None
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        with self.lock:
+            for start in range(0, self.count, BLOCK_ROWS):
+                stop = min(start + BLOCK_ROWS, self.count)
+                keys = self.keys[start:stop]
+                scores = queries @ self.vectors[start:stop].T
+                hidden = keys < 0
+                if codes:
+                    hidden |= ~np.isin(keys % 4, codes)
+                if project_id is not None:
+                    hidden |= self.projects[start:stop] != project_id
+                scores[:, hidden] = -np.inf
+                for query, row in enumerate(exclude_rows):
+                    if start <= row < stop:
+                        scores[query, row - start] = -np.inf
+                rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_rows = np.concatenate([best_rows, rows], axis=1)
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_keys = self.keys[np.take_along_axis(best_rows, order, axis=1)] if best_rows.size else best_rows
+        return [
+            [(int(key), float(score)) for key, score in zip(keys, scores) if score > 0]
+            for keys, scores in zip(best_keys, best_scores)
+        ]
+
+    def rank(self, query, keys, k):
+        """The k of the given keys most similar to one query vector, as (key, score), best first."""
+        with self.lock:
+            keys = [key for key in keys if key in self.rows]
+            if not keys:
+                return []
+            scores = self.vectors[[self.rows[key] for key in keys]] @ np.asarray(query, dtype=np.float32)
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(keys[i], float(scores[i])) for i in order if scores[i] > 0]
+
+    def stats(self):
+        return {"ready": self.ready, "documents": self.docs, "rows": self.count, "dimensions": self.dim, "path": self.path}
+
+def init_app(app):
+    app.extensions['similarity_index'] = SimilarityIndex(
+        app.config['SIMILARITY_DIMENSIONS'], app.config['SIMILARITY_INDEX_PATH']
+    ) if np is not None else None
+
+def get_similarity_index():
+    return current_app.extensions.get('similarity_index') if has_app_context() else None
+
+def ready_index():
+    """The app's index, built from the database first if needed; None without NumPy."""
+    index = get_similarity_index()
+    if index is not None:
+        with index.lock:
+            index.refresh()
+            if not index.ready:
+                rebuild(index, db.session.connection())
+    return index
+
+def document_chunks(connection):
+    def chunks():
+        for kind in KINDS:
+            query, id_col = source_query(kind)
+            last_id = 0
+            while True:
+                rows = connection.execute(query.where(id_col > last_id).order_by(id_col).limit(REBUILD_CHUNK)).all()
+                if not rows:
+                    break
+                yield [to_document(kind, row) for row in rows]
+                last_id = rows[-1].id
+    return chunks
+
+def rebuild(index, connection):
+    index.replace_all(document_chunks(connection))
+
+# --- Incremental updates ---
+# Rows are queued by mapper events (or queue_documents() for Core bulk writes),
+# their documents are read at flush time on the transaction's connection, and
+# they are vectorized into the index only once the transaction commits.
+
+TRACKED = {
+    WorkLog: (LOG, ('content', 'blockers', 'task_id')),
+    Decision: (DECISION, ('title', 'explanation', 'reasoning', 'project_id')),
+}
+
+def tracking(target):
+    """
+    The session to queue changes of target on, or None while there is no built
+    index to keep up to date. Runs for every flushed row, so it only reads the
+    flag; picking up other processes' writes is left to read_flushed.
+    """
+    session = object_session(target)
+    index = get_similarity_index()
+    return session if session is not None and index is not None and index.ready else None
+
+def document_inserted(mapper, connection, target):
+    session = tracking(target)
+    if session is not None:
+        session.info.setdefault('similarity_pending', set()).add((TRACKED[mapper.class_][0], target.id))
+
+def document_updated(mapper, connection, target):
+    kind, columns = TRACKED[mapper.class_]
+    attrs = inspect(target).attrs
+    session = tracking(target) if any(attrs[column].history.has_changes() for column in columns) else None
+    if session is not None:
+        session.info.setdefault('similarity_pending', set()).add((kind, target.id))
+
+def document_deleted(mapper, connection, target):
+    session = tracking(target)
+    if session is not None:
+        session.info.setdefault('similarity_removed', set()).add(key_of(TRACKED[mapper.class_][0], target.id))
+
+def task_moved(mapper, connection, target):
+    session = tracking(target) if inspect(target).attrs['project_id'].history.has_changes() else None
+    if session is not None:
+        session.info.setdefault('similarity_moved_tasks', set()).add(target.id)
+
+for model in TRACKED:
+    event.listen(model, 'after_insert', document_inserted)
+    event.listen(model, 'after_update', document_updated)
+    event.listen(model, 'after_delete', document_deleted)
+event.listen(Task, 'after_update', task_moved)
+
+def refreshed(index):
+    """Remaps the index if another process rewrote it; True when it is built."""
+    with index.lock:
+        index.refresh()
+        return index.ready
+
+def read_documents(session, connection, kind, ids):
+    docs = session.info.setdefault('similarity_docs', {})
+    for doc in load_documents(connection, kind, list(ids)):
+        docs[key_of(kind, doc['ref_id'])] = doc
+
+def queue_documents(session, connection, kind, ids):
+    """Reads the documents of rows written in this transaction; they are indexed when it commits."""
+    index = get_similarity_index()
+    if index is None or not ids or not refreshed(index):
+        return
+    read_documents(session, connection, kind, ids)
+
+@event.listens_for(Session, 'after_flush')
+def read_flushed(session, flush_context):
+    pending = session.info.pop('similarity_pending', set())
+    moved = session.info.pop('similarity_moved_tasks', set())
+    index = get_similarity_index() if pending or moved else None
+    if index is None or not refreshed(index): # Once per flush, not per row
+        return
+    connection = session.connection()
+    if moved:
+        pending |= {(LOG, log_id) for log_id in connection.execute(select(WorkLog.id).where(WorkLog.task_id.in_(moved))).scalars()}
+    for kind in KINDS:
+        ids = [i for k, i in pending if k == kind]
+        if ids:
+            read_documents(session, connection, kind, ids)
+
+@event.listens_for(Session, 'after_commit')
+def index_committed(session):
+    docs = session.info.pop('similarity_docs', None)
+    removed = session.info.pop('similarity_removed', None)
+    index = get_similarity_index() if docs or removed else None
+    if index is None:
+        return
+    try:
+        if removed:
+            index.remove(removed)
+        if docs:
+            index.add([doc for key, doc in docs.items() if key not in (removed or ())])
+    except Exception: # The data is committed; a failed index write is repaired by the next rebuild
+        current_app.logger.exception("Similarity index update failed")
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted(session):
+    for bucket in ('similarity_pending', 'similarity_moved_tasks', 'similarity_docs', 'similarity_removed'):
+        session.info.pop(bucket, None)
+
+# --- Queries ---
+
+def hydrate(connection, hits):
+    """Titles and excerpts of (key, score) hits, read with one query per kind."""
+    by_kind = {}
+    for key, _ in hits:
+        kind, ref_id = split_key(key)
+        by_kind.setdefault(kind, []).append(ref_id)
+    docs = {}
+    for kind, ids in by_kind.items():
+        for doc in load_documents(connection, kind, ids):
+            docs[key_of(kind, doc['ref_id'])] = doc
+    items = []
+    for key, score in hits:
+        doc = docs.get(key)
+        if doc is not None:
+            items.append({
+                "type": doc['kind'], "id": doc['ref_id'], "project_id": doc['project_id'], "title": doc['title'],
+                "excerpt": doc['body'][:EXCERPT_CHARS], "score": round(score, 6)
+            })
+    return items
+
+def similar(kind=None, ids=None, query=None, k=10, project_id=None, result_kinds=None):
+    """
+    Top-k similar logs and decisions, as (result, status). Either for stored
+    documents (kind + ids, answered in one batch) or for free text (query).
+    """
+    result_kinds = [r for r in (result_kinds or []) if r]
+    unknown = [r for r in result_kinds + ([kind] if kind else []) if r not in KINDS]
+    if unknown:
+        return {"error": "InvalidInput", "message": f"Unknown type {unknown[0]!r}; use {', '.join(KINDS)}"}, 400
+    if not ids and not words(query):
+        return {"error": "InvalidInput", "message": "Give type and id, or q with at least one word"}, 400
+    if ids and not kind:
+        return {"error": "InvalidInput", "message": "type is required with id"}, 400
+    k = max(1, min(k or 10, MAX_K))
+
+    index = ready_index()
+    if index is None:
+        return {"error": "NotSupported", "message": "Similarity search needs NumPy"}, 501
+
+    if ids:
+        keys = [key_of(kind, ref_id) for ref_id in ids]
+        missing = [ref_id for ref_id, key in zip(ids, keys) if key not in index.rows]
+        if missing:
+            return {"error": "NotFound", "message": f"{kind} {missing[0]} not found"}, 404
+        queries = np.stack([index.vector(key) for key in keys])
+        sources = [{"type": kind, "id": ref_id} for ref_id in ids]
+    else:
+        keys = None
+        queries = index.vectorize([query])
+        sources = [{"query": query}]
+
+    hits = index.top_k(queries, k, kinds=result_kinds, project_id=project_id, exclude=keys)
+    connection = db.session.connection()
+    return {"results": [{**source, "items": hydrate(connection, found)} for source, found in zip(sources, hits)]}, 200
+
+def relevant(text, kind, ids, k):
+    """
+    The ids among the given rows of one kind that are most relevant to text,
+    best first; None when relevance cannot be judged (no NumPy, no words).
+    """
+    index = ready_index()
+    if index is None or not words(text):
+        return None
+    hits = index.rank(index.vectorize([text])[0], [key_of(kind, ref_id) for ref_id in ids], k)
+    return [split_key(key)[1] for key, _ in hits]
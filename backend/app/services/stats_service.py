@@ -0,0 +1,280 @@
+"""
+Stats rollups behind /stats/overview, /projects/<id>/stats and user profiles.
+
+Rollup rows are adjusted by delta from mapper events as tasks, work logs,
+decisions and users are written, inside the same transaction as the write.
+Bulk writers that bypass the ORM call apply_deltas() themselves.
+rebuild() recomputes every row from the source tables.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, update, insert, delete, select, func, inspect, and_
+from ..models import Project, Milestone, Task, WorkLog, Decision, User, StatsRollup, db
+from .task_service import STATUS_COUNTERS, status_deltas
+from .version_service import UPSERTS
+
+GLOBAL, PROJECT, MILESTONE, USER = 'GLOBAL', 'PROJECT', 'MILESTONE', 'USER'
+COUNTER_COLUMNS = ['tasks_total', *STATUS_COUNTERS.values(), 'hours_logged', 'log_count', 'decision_count', 'active_users']
+
+def apply_deltas(connection, changes):
+    """
+    changes: {(scope, scope_id): (project_id, {column: delta})}.
+    One upsert for every touched row, so two writers creating the same row do
+    not both insert it; an UPDATE per row, then INSERTs, on other dialects.
+    """
+    rollup = StatsRollup.__table__
+    now = datetime.utcnow()
+    rows = []
+    for (scope, scope_id), (project_id, deltas) in changes.items():
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if deltas:
+            rows.append({
+                "scope": scope, "scope_id": scope_id, "project_id": project_id, "updated_at": now,
+                **{column: deltas.get(column, 0) for column in COUNTER_COLUMNS}
+            })
+    if not rows:
+        return
+
+    upsert = UPSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(rollup)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[rollup.c.scope, rollup.c.scope_id],
+            set_={"updated_at": statement.excluded.updated_at,
+                  **{column: rollup.c[column] + statement.excluded[column] for column in COUNTER_COLUMNS}}
+        ), rows)
+        return
+
+    for row in rows:
+        values = {column: rollup.c[column] + row[column] for column in COUNTER_COLUMNS if row[column]}
+        updated = connection.execute(
+            update(rollup).where(rollup.c.scope == row['scope'], rollup.c.scope_id == row['scope_id']).values(updated_at=now, **values)
+        ).rowcount
+        if not updated:
+            connection.execute(insert(rollup).values(**row))
+
+def add_change(changes, scope, scope_id, project_id, deltas, sign=1):
+    if scope != GLOBAL and scope_id is None:
+        return
+    current = changes.setdefault((scope, scope_id or 0), (project_id, defaultdict(float)))[1]
+    for column, delta in deltas.items():
+        current[column] += sign * delta
+
+def task_changes(changes, project_id, milestone_id, user_id, deltas, sign=1):
+    add_change(changes, GLOBAL, 0, None, deltas, sign)
+    add_change(changes, PROJECT, project_id, project_id, deltas, sign)
+    add_change(changes, MILESTONE, milestone_id, project_id, deltas, sign)
+    add_change(changes, USER, user_id, None, deltas, sign)
+
+def task_log_totals(connection, task_id):
+    row = connection.execute(
+        select(func.coalesce(func.sum(WorkLog.hours_spent), 0.0), func.count(WorkLog.id)).where(WorkLog.task_id == task_id)
+    ).one()
+    return {'hours_logged': row[0], 'log_count': row[1]}
+
+def previous(history, current):
+    return history.deleted[0] if history.deleted else current
+
+# --- Mapper events ---
+
+def ensure_rollup(connection, scope, scope_id, project_id):
+    rollup = StatsRollup.__table__
+    exists = connection.execute(
+        select(rollup.c.id).where(rollup.c.scope == scope, rollup.c.scope_id == scope_id)
+    ).first()
+    if not exists:
+        connection.execute(insert(rollup).values(
+            scope=scope, scope_id=scope_id, project_id=project_id, updated_at=datetime.utcnow(),
+            **dict.fromkeys(COUNTER_COLUMNS, 0)
+        ))
+
+@event.listens_for(Project, 'after_insert')
+def rollup_new_project(mapper, connection, project):
+    ensure_rollup(connection, PROJECT, project.id, project.id)
+
+@event.listens_for(Project, 'after_delete')
+def drop_project_rollups(mapper, connection, project):
+    rollup = StatsRollup.__table__
+    connection.execute(delete(rollup).where(rollup.c.project_id == project.id, rollup.c.scope.in_((PROJECT, MILESTONE))))
+
+@event.listens_for(Milestone, 'after_insert')
+def rollup_new_milestone(mapper, connection, milestone):
+    # Milestones without work yet still show up in project stats with 0 hours
+    ensure_rollup(connection, MILESTONE, milestone.id, milestone.project_id)
+
+@event.listens_for(Task, 'after_insert')
+def rollup_new_task(mapper, connection, task):
+    changes = {}
+    task_changes(changes, task.project_id, task.milestone_id, task.user_id, status_deltas(task.status, 1))
+    apply_deltas(connection, changes)
+
+@event.listens_for(Task, 'after_delete')
+def rollup_deleted_task(mapper, connection, task):
+    changes = {}
+    task_changes(changes, task.project_id, task.milestone_id, task.user_id, status_deltas(task.status, 1), sign=-1)
+    apply_deltas(connection, changes)
+
+@event.listens_for(Task, 'after_update')
+def rollup_task_change(mapper, connection, task):
+    attrs = inspect(task).attrs
+    tracked = ('status', 'project_id', 'milestone_id', 'user_id')
+    if not any(attrs[name].history.has_changes() for name in tracked):
+        return
+    old = {name: previous(attrs[name].history, getattr(task, name)) for name in tracked}
+
+    changes = {}
+    task_changes(changes, old['project_id'], old['milestone_id'], old['user_id'], status_deltas(old['status'], 1), sign=-1)
+    task_changes(changes, task.project_id, task.milestone_id, task.user_id, status_deltas(task.status, 1))
+
+    # Hours follow the task's project and milestone (user totals stay with the log author)
+    if (old['project_id'], old['milestone_id']) != (task.project_id, task.milestone_id):
+        totals = task_log_totals(connection, task.id)
+        add_change(changes, PROJECT, old['project_id'], old['project_id'], totals, -1)
+        add_change(changes, MILESTONE, old['milestone_id'], old['project_id'], totals, -1)
+        add_change(changes, PROJECT, task.project_id, task.project_id, totals)
+        add_change(changes, MILESTONE, task.milestone_id, task.project_id, totals)
+    apply_deltas(connection, changes)
+
+def log_changes(changes, project_id, milestone_id, user_id, hours, count):
+    deltas = {'hours_logged': hours, 'log_count': count}
+    add_change(changes, GLOBAL, 0, None, deltas)
+    add_change(changes, PROJECT, project_id, project_id, deltas)
+    add_change(changes, MILESTONE, milestone_id, project_id, deltas)
+    add_change(changes, USER, user_id, None, deltas)
+
+def task_scope(connection, task_id):
+    return connection.execute(select(Task.project_id, Task.milestone_id).where(Task.id == task_id)).one()
+
+@event.listens_for(WorkLog, 'after_insert')
+def rollup_new_log(mapper, connection, log):
+    project_id, milestone_id = task_scope(connection, log.task_id)
+    changes = {}
+    log_changes(changes, project_id, milestone_id, log.user_id, log.hours_spent, 1)
+    apply_deltas(connection, changes)
+
+@event.listens_for(WorkLog, 'after_update')
+def rollup_log_change(mapper, connection, log):
+    history = inspect(log).attrs.hours_spent.history
+    if not history.has_changes():
+        return
+    project_id, milestone_id = task_scope(connection, log.task_id)
+    changes = {}
+    log_changes(changes, project_id, milestone_id, log.user_id, log.hours_spent - previous(history, log.hours_spent), 0)
+    apply_deltas(connection, changes)
+
+@event.listens_for(Decision, 'after_insert')
+def rollup_new_decision(mapper, connection, decision):
+    changes = {}
+    add_change(changes, GLOBAL, 0, None, {'decision_count': 1})
+    add_change(changes, PROJECT, decision.project_id, decision.project_id, {'decision_count': 1})
+    add_change(changes, USER, decision.author_id, None, {'decision_count': 1})
+    apply_deltas(connection, changes)
+
+@event.listens_for(User, 'after_insert')
+def rollup_new_user(mapper, connection, user):
+    if user.status == 'Active':
+        apply_deltas(connection, {(GLOBAL, 0): (None, {'active_users': 1})})
+
+@event.listens_for(User, 'after_update')
+def rollup_user_status(mapper, connection, user):
+    history = inspect(user).attrs.status.history
+    if not history.has_changes():
+        return
+    was_active = previous(history, user.status) == 'Active'
+    is_active = user.status == 'Active'
+    if was_active != is_active:
+        apply_deltas(connection, {(GLOBAL, 0): (None, {'active_users': 1 if is_active else -1})})
+
+# --- Reads ---
+
+def serialize_counts(row):
+    return {
+        "totalTasks": row.tasks_total,
+        "doneTasks": row.tasks_done,
+        "totalHours": float(row.hours_logged)
+    }
+
+def global_stats():
+    row = StatsRollup.query.filter_by(scope=GLOBAL, scope_id=0).first()
+    if not row:
+        return {"totalTasks": 0, "doneTasks": 0, "totalHours": 0.0, "contributors": 0}
+    return {**serialize_counts(row), "contributors": row.active_users}
+
+def project_stats(project_id):
+    rows = db.session.query(StatsRollup, Project.start_date, Project.completion_percentage, Milestone.title).join(
+        Project, Project.id == StatsRollup.project_id
+    ).outerjoin(
+        Milestone, and_(StatsRollup.scope == MILESTONE, Milestone.id == StatsRollup.scope_id)
+    ).filter(
+        StatsRollup.project_id == project_id, StatsRollup.scope.in_((PROJECT, MILESTONE))
+    ).order_by(StatsRollup.scope.desc(), StatsRollup.scope_id).all()
+
+    project_row = next((r for r in rows if r[0].scope == PROJECT), None)
+    if not project_row:
+        return {"error": "NotFound", "message": "Project not found"}, 404
+    rollup, start_date, completion_percentage, _ = project_row
+
+    # Velocity: tasks done per week since project start
+    weeks_active = max(1, (datetime.utcnow() - start_date).days / 7)
+    return {
+        **serialize_counts(rollup),
+        "completionPercentage": completion_percentage,
+        "velocity": round(rollup.tasks_done / weeks_active, 2),
+        "milestones": [
+            {"id": r.scope_id, "title": title, "hours": float(r.hours_logged)}
+            for r, _, _, title in rows if r.scope == MILESTONE
+        ]
+    }, 200
+
+def user_stats(user_id):
+    return StatsRollup.query.filter_by(scope=USER, scope_id=user_id).first()
+
+# --- Rebuild ---
+
+def rebuild(connection):
+    """Recomputes every rollup row from the source tables."""
+    rollup = StatsRollup.__table__
+    changes = {}
+
+    add_change(changes, GLOBAL, 0, None, {'tasks_total': 0})
+    for project_id, in connection.execute(select(Project.id)):
+        add_change(changes, PROJECT, project_id, project_id, {'tasks_total': 0})
+    for milestone_id, project_id in connection.execute(select(Milestone.id, Milestone.project_id)):
+        add_change(changes, MILESTONE, milestone_id, project_id, {'tasks_total': 0})
+
+    tasks = connection.execute(
+        select(Task.project_id, Task.milestone_id, Task.user_id, Task.status, func.count())
+        .group_by(Task.project_id, Task.milestone_id, Task.user_id, Task.status)
+    )
+    for project_id, milestone_id, user_id, status, count in tasks:
+        task_changes(changes, project_id, milestone_id, user_id, {k: v * count for k, v in status_deltas(status, 1).items()})
+
+    logs = connection.execute(
+        select(Task.project_id, Task.milestone_id, WorkLog.user_id, func.sum(WorkLog.hours_spent), func.count())
+        .join(Task, Task.id == WorkLog.task_id)
+        .group_by(Task.project_id, Task.milestone_id, WorkLog.user_id)
+    )
+    for project_id, milestone_id, user_id, hours, count in logs:
+        log_changes(changes, project_id, milestone_id, user_id, hours or 0.0, count)
+
+    decisions = connection.execute(
+        select(Decision.project_id, Decision.author_id, func.count()).group_by(Decision.project_id, Decision.author_id)
+    )
+    for project_id, author_id, count in decisions:
+        add_change(changes, GLOBAL, 0, None, {'decision_count': count})
+        add_change(changes, PROJECT, project_id, project_id, {'decision_count': count})
+        add_change(changes, USER, author_id, None, {'decision_count': count})
+
+    active = connection.execute(select(func.count()).select_from(User).where(User.status == 'Active')).scalar()
+    add_change(changes, GLOBAL, 0, None, {'active_users': active})
+
+    now = datetime.utcnow()
+    connection.execute(delete(rollup))
+    connection.execute(insert(rollup), [
+        {
+            "scope": scope, "scope_id": scope_id, "project_id": project_id, "updated_at": now,
+            **{column: deltas.get(column, 0) for column in COUNTER_COLUMNS}
+        }
+        for (scope, scope_id), (project_id, deltas) in changes.items()
+    ])
+    return len(changes)
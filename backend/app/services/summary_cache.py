@@ -0,0 +1,87 @@
+"""
+In-process L1 cache in front of the AISummary (L2) lookup for project summaries.
+
+Entries are keyed by (project_id, report_type, data_version). The data
+version of a project is bumped after every committed work-log, decision or
+task write that touches it, so a generation that raced with a write is stored
+under a version nobody asks for anymore. Versions are per process; the TTL
+bounds how long another worker's writes can go unnoticed.
+"""
+import threading
+from collections import defaultdict
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from ..cache import TTLCache
+from ..models import Task, WorkLog, Decision
+
+class SummaryCache:
+    def __init__(self, maxsize, ttl):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.versions = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def key(self, project_id, report_type):
+        return (project_id, report_type.upper(), self.versions[project_id])
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, payload):
+        self.entries.set(key, payload)
+
+    def invalidate_projects(self, project_ids):
+        with self.lock:
+            for project_id in project_ids:
+                self.versions[project_id] += 1
+        self.entries.invalidate(lambda key: key[0] in project_ids)
+
+    def stats(self):
+        return self.entries.stats()
+
+def init_app(app):
+    app.extensions['summary_cache'] = SummaryCache(
+        maxsize=app.config['SUMMARY_CACHE_SIZE'], ttl=app.config['SUMMARY_CACHE_TTL_SECONDS']
+    )
+
+def get_summary_cache():
+    return current_app.extensions.get('summary_cache') if has_app_context() else None
+
+# --- Invalidation ---
+
+def mark_projects_changed(session, project_ids):
+    """Also used directly by bulk writers that bypass the mapper events."""
+    session.info.setdefault('summary_projects', set()).update(pid for pid in project_ids if pid is not None)
+
+def mark_changed(target, project_id):
+    session = object_session(target)
+    if session is not None:
+        mark_projects_changed(session, [project_id])
+
+@event.listens_for(WorkLog, 'after_insert')
+@event.listens_for(WorkLog, 'after_update')
+def log_changed(mapper, connection, log):
+    project_id = connection.execute(select(Task.project_id).where(Task.id == log.task_id)).scalar()
+    mark_changed(log, project_id)
+
+@event.listens_for(Decision, 'after_insert')
+@event.listens_for(Decision, 'after_update')
+def decision_changed(mapper, connection, decision):
+    mark_changed(decision, decision.project_id)
+
+@event.listens_for(Task, 'after_insert')
+@event.listens_for(Task, 'after_update')
+@event.listens_for(Task, 'after_delete')
+def task_changed(mapper, connection, task):
+    mark_changed(task, task.project_id)
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed(session):
+    project_ids = session.info.pop('summary_projects', None)
+    cache = get_summary_cache() if project_ids else None
+    if cache:
+        cache.invalidate_projects(project_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted(session):
+    session.info.pop('summary_projects', None)
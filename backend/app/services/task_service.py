@@ -1,10 +1,19 @@
 from ..models import Task, WorkLog, User, Project, db, SystemEvent
 from datetime import datetime, timedelta
+from sqlalchemy import event, update, select, case, func, inspect
 # Prevent circular import - import inline or reorganize. 
 # Decision service depends on models. We can use the model directly or better, pass the responsibility.
 # For simplicity and structure, let's keep services focused. 
 # Better: generic "log_work_and_check_insight" function or just import decision_service inside the function.
-from . import decision_service
+from . import decision_service, event_service, live_updates, version_service
+
+STATUS_COUNTERS = {
+    'TODO': 'tasks_todo',
+    'IN_PROGRESS': 'tasks_in_progress',
+    'REVIEW': 'tasks_review',
+    'DONE': 'tasks_done'
+}
+COUNTER_COLUMNS = ['tasks_total'] + list(STATUS_COUNTERS.values())
 
 TASK_TRANSITIONS = {
     'TODO': ['IN_PROGRESS'],
@@ -51,19 +60,14 @@ def complete_task(task_id, expected_version_id=None):
     if next_status == 'DONE' and not task.logs:
         return {"error": "InvalidState", "message": "Cannot mark task DONE / REVIEW APPROVED without logs. Documentation is required."}, 400
         
-    task.status = next_status
+    previous_status, task.status = task.status, next_status
     
-    # Log event
-    event = SystemEvent(
-        event_type='STATUS_CHANGE',
-        description=f"Task {task_id} advanced to {next_status}",
-        project_id=task.project_id
-    )
-    db.session.add(event)
-    
-    # Auto-calculate project progress
-    update_project_progress(task.project_id)
+    event_service.record_event('STATUS_CHANGE', f"Task {task_id} advanced to {next_status}", project_id=task.project_id)
+    live_updates.publish(db.session, task.project_id, live_updates.TASK_STATUS, {
+        "task_id": task.id, "status": next_status, "previous_status": previous_status
+    })
     
+    # Project progress follows from the counter listeners below
     db.session.commit()
     return {"message": f"Task advanced to {next_status}", "new_status": next_status}, 200
 
@@ -90,22 +94,38 @@ def update_task(task_id, expected_version_id=None, **kwargs):
         if user and user.status == 'Inactive':
             return {"error": "InvalidState", "message": "Cannot assign task to inactive member"}, 400
             
+    before = {"status": task.status, "user_id": task.user_id, "project_id": task.project_id}
     for key, value in kwargs.items():
         if hasattr(task, key):
-            if key == 'status' and getattr(task, key) != value:
-                # Log status change
-                event = SystemEvent(
-                    event_type='STATUS_CHANGE',
-                    description=f"Task {task_id} status changed from {task.status} to {value}",
-                    project_id=task.project_id
-                )
-                db.session.add(event)
             setattr(task, key, value)
-            
+    # Published after every change is applied, so they go to the task's final project
+    publish_task_changes(task, before)
+
     db.session.commit()
-    update_project_progress(task.project_id)
     return task, 200
 
+def publish_task_changes(task, before):
+    if task.project_id != before['project_id']:
+        # Both boards: the old one drops the card, the new one adds it
+        moved = {
+            "task_id": task.id, "project_id": task.project_id, "previous_project_id": before['project_id'],
+            "title": task.title, "status": task.status, "user_id": task.user_id
+        }
+        for project_id in (before['project_id'], task.project_id):
+            live_updates.publish(db.session, project_id, live_updates.TASK_MOVED, moved)
+    if task.status != before['status']:
+        # Recorded after the change so the event joins this transaction
+        event_service.record_event(
+            'STATUS_CHANGE', f"Task {task.id} status changed from {before['status']} to {task.status}", project_id=task.project_id
+        )
+        live_updates.publish(db.session, task.project_id, live_updates.TASK_STATUS, {
+            "task_id": task.id, "status": task.status, "previous_status": before['status']
+        })
+    if task.user_id != before['user_id']:
+        live_updates.publish(db.session, task.project_id, live_updates.TASK_REASSIGNED, {
+            "task_id": task.id, "user_id": task.user_id, "previous_user_id": before['user_id']
+        })
+
 def create_task(project_id, title, user_id=None, priority='Medium', description=""):
     project = Project.query.get(project_id)
     if not project or project.status == 'COMPLETED':
@@ -125,7 +145,6 @@ def create_task(project_id, title, user_id=None, priority='Medium', description=
     )
     db.session.add(task)
     db.session.commit()
-    update_project_progress(project_id)
     return task, 201
 
 def create_work_log(task_id, user_id, content, hours_spent, blockers="", decisions_made=None):
@@ -154,10 +173,11 @@ def create_work_log(task_id, user_id, content, hours_spent, blockers="", decisio
         blockers=blockers
     )
     db.session.add(log)
+    db.session.flush()
+    live_updates.publish(db.session, task.project_id, live_updates.LOG_CREATED, {
+        "log_id": log.id, "task_id": task_id, "user_id": user_id, "hours_spent": hours_spent
+    })
     db.session.commit()
-    db.session.add(log)
-    db.session.commit()
-    update_project_progress(task.project_id)
 
     if decisions_made:
         # If a strategic pivot point was noted, also record it as an architectural decision
@@ -173,20 +193,116 @@ def create_work_log(task_id, user_id, content, hours_spent, blockers="", decisio
 
     return log, 201
 
-def update_project_progress(project_id):
-    project = Project.query.get(project_id)
-    total = len(project.tasks)
-    if total == 0:
-        project.completion_percentage = 0
+def completion_expression(project_table):
+    # Weighted progress: DONE=1.0, IN_PROGRESS=0.5
+    return case(
+        (project_table.c.tasks_total == 0, 0.0),
+        else_=(project_table.c.tasks_done + 0.5 * project_table.c.tasks_in_progress) * 100.0 / project_table.c.tasks_total
+    )
+
+def apply_counter_deltas(connection, project_id, deltas):
+    """
+    Applies {counter_column: delta} to a project in place and refreshes
+    completion_percentage from the counters. Both are single-row UPDATEs.
+    """
+    project = Project.__table__
+    values = {column: project.c[column] + delta for column, delta in deltas.items() if delta}
+    if not values:
+        return
+    connection.execute(update(project).where(project.c.id == project_id).values(**values))
+    connection.execute(
+        update(project).where(project.c.id == project_id).values(completion_percentage=completion_expression(project))
+    )
+
+def status_deltas(status, sign):
+    deltas = {'tasks_total': sign}
+    if status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[status]] = sign
+    return deltas
+
+@event.listens_for(Task, 'after_insert')
+def count_inserted_task(mapper, connection, task):
+    apply_counter_deltas(connection, task.project_id, status_deltas(task.status, 1))
+
+@event.listens_for(Task, 'after_delete')
+def count_deleted_task(mapper, connection, task):
+    apply_counter_deltas(connection, task.project_id, status_deltas(task.status, -1))
+
+@event.listens_for(Task, 'after_update')
+def count_task_transition(mapper, connection, task):
+    state = inspect(task)
+    status_history = state.attrs.status.history
+    project_history = state.attrs.project_id.history
+    if not status_history.has_changes() and not project_history.has_changes():
+        return
+
+    old_status = status_history.deleted[0] if status_history.deleted else task.status
+    old_project = project_history.deleted[0] if project_history.deleted else task.project_id
+    if old_project == task.project_id:
+        deltas = status_deltas(task.status, 1)
+        for column, delta in status_deltas(old_status, -1).items():
+            deltas[column] = deltas.get(column, 0) + delta
+        apply_counter_deltas(connection, task.project_id, deltas)
     else:
-        # Calculate weighted progress: DONE=1.0, IN_PROGRESS=0.5
-        score = 0
-        for t in project.tasks:
-            if t.status == 'DONE':
-                score += 1.0
-            elif t.status == 'IN_PROGRESS':
-                score += 0.5
-        
-        project.completion_percentage = (score / total) * 100
-    db.session.add(project)
+        apply_counter_deltas(connection, old_project, status_deltas(old_status, -1))
+        apply_counter_deltas(connection, task.project_id, status_deltas(task.status, 1))
+
+def update_project_progress(project_id):
+    """Recomputes completion_percentage from the stored counters in O(1)."""
+    project = Project.__table__
+    db.session.execute(
+        update(project).where(project.c.id == project_id).values(completion_percentage=completion_expression(project))
+    )
+    version_service.bump(db.session.connection(), {(version_service.PROJECTS, 0)})
     db.session.commit()
+
+def recount_project_counters(connection, project_id=None):
+    """
+    Full recompute of the task counters with one GROUP BY.
+    Returns {project_id: {counter_column: value}} for every project in scope.
+    """
+    project = Project.__table__
+    task = Task.__table__
+    project_ids = select(project.c.id)
+    if project_id is not None:
+        project_ids = project_ids.where(project.c.id == project_id)
+    counts = {pid: dict.fromkeys(COUNTER_COLUMNS, 0) for pid in connection.execute(project_ids).scalars()}
+
+    grouped = select(task.c.project_id, task.c.status, func.count()).group_by(task.c.project_id, task.c.status)
+    if project_id is not None:
+        grouped = grouped.where(task.c.project_id == project_id)
+    for pid, status, count in connection.execute(grouped):
+        if pid not in counts:
+            continue
+        counts[pid]['tasks_total'] += count
+        if status in STATUS_COUNTERS:
+            counts[pid][STATUS_COUNTERS[status]] += count
+    return counts
+
+def reconcile_project_counters(project_id=None, repair=False):
+    """
+    Compares the incremental counters against a full recompute.
+    Returns a list of mismatches; with repair=True the recomputed values are written back.
+    """
+    project = Project.__table__
+    connection = db.session.connection()
+    expected = recount_project_counters(connection, project_id)
+    stored_query = select(project.c.id, *[project.c[column] for column in COUNTER_COLUMNS])
+    if project_id is not None:
+        stored_query = stored_query.where(project.c.id == project_id)
+    stored = {row.id: {column: getattr(row, column) for column in COUNTER_COLUMNS} for row in connection.execute(stored_query)}
+
+    mismatches = []
+    for pid, counters in expected.items():
+        if stored.get(pid) != counters:
+            mismatches.append({"project_id": pid, "stored": stored.get(pid), "expected": counters})
+            if repair:
+                connection.execute(update(project).where(project.c.id == pid).values(**counters))
+                connection.execute(
+                    update(project).where(project.c.id == pid).values(completion_percentage=completion_expression(project))
+                )
+    if repair:
+        if mismatches:
+            version_service.bump(connection, {(version_service.PROJECTS, 0)})
+        db.session.commit()
+    return mismatches
@@ -0,0 +1,149 @@
+"""
+Data version counters behind the ETags of the polled list endpoints.
+
+Tasks, logs and decisions are versioned per project (scope_id = project id)
+and across all projects (scope_id 0); projects and users only at scope 0.
+Mapper events collect the keys a flush touches and each one is bumped once,
+on the flush's connection, so a counter moves exactly when its data commits
+and every worker process sees the same value. Bulk writers that use Core
+statements bump their keys themselves.
+
+A conditional GET reads the few counters it depends on with one primary-key
+lookup and answers 304 when the client's ETag still matches, without running
+the list query.
+"""
+import hashlib
+import json
+from sqlalchemy import event, insert, inspect, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, object_session
+from ..models import CollectionVersion, Decision, Project, ProjectMember, Task, User, WorkLog, db
+
+TASKS = 'tasks'
+LOGS = 'logs'
+DECISIONS = 'decisions'
+PROJECTS = 'projects'
+USERS = 'users'
+
+# Collections whose rows a list response embeds (e.g. assignee and author names)
+EMBEDS = {TASKS: (USERS,), DECISIONS: (USERS,), LOGS: (), PROJECTS: ()}
+
+def project_keys(collection, project_ids):
+    """The per-project keys plus the all-projects key of a collection."""
+    return {(collection, 0)} | {(collection, pid) for pid in project_ids if pid is not None}
+
+# Dialects with INSERT .. ON CONFLICT: the bump is a single upsert statement
+UPSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def bump(connection, keys):
+    """Adds one to the version of every key; keys seen for the first time start at 1."""
+    table = CollectionVersion.__table__
+    rows = [{"collection": collection, "scope_id": scope_id, "version": 1} for collection, scope_id in sorted(keys)]
+    if not rows:
+        return
+    upsert = UPSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.collection, table.c.scope_id], set_={"version": table.c.version + 1}
+        ), rows)
+        return
+
+    key_column = tuple_(table.c.collection, table.c.scope_id)
+    keys = [(row['collection'], row['scope_id']) for row in rows]
+    updated = connection.execute(update(table).where(key_column.in_(keys)).values(version=table.c.version + 1)).rowcount
+    if updated < len(keys):
+        existing = set(connection.execute(select(table.c.collection, table.c.scope_id).where(key_column.in_(keys))).tuples())
+        connection.execute(insert(table), [row for row in rows if (row['collection'], row['scope_id']) not in existing])
+
+def current_versions(keys):
+    table = CollectionVersion.__table__
+    rows = db.session.execute(
+        select(table.c.collection, table.c.scope_id, table.c.version)
+        .where(tuple_(table.c.collection, table.c.scope_id).in_(list(keys)))
+    )
+    versions = {(row.collection, row.scope_id): row.version for row in rows}
+    return [[collection, scope_id, versions.get((collection, scope_id), 0)] for collection, scope_id in sorted(keys)]
+
+def list_etag(collection, scope_id, args):
+    """
+    Strong ETag of one list response: the versions of the collection scope and
+    everything it embeds, plus the query string (filters, cursor, page size).
+    """
+    keys = {(collection, scope_id or 0)} | {(embedded, 0) for embedded in EMBEDS[collection]}
+    state = json.dumps([current_versions(keys), sorted(args.items(multi=True))], default=str)
+    return hashlib.sha1(state.encode()).hexdigest()
+
+# --- Mapper events ---
+
+def mark_session(session, keys):
+    """Queues keys for the session's next flush, e.g. from a Core writer that also flushes ORM changes."""
+    session.info.setdefault('version_keys', set()).update(keys)
+
+def mark(target, keys):
+    session = object_session(target)
+    if session is not None:
+        mark_session(session, keys)
+
+def mark_log(target, task_ids):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('version_log_tasks', set()).update(task_ids)
+
+def previous(target, name):
+    history = getattr(inspect(target).attrs, name).history
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+@event.listens_for(Task, 'after_insert')
+@event.listens_for(Task, 'after_update')
+@event.listens_for(Task, 'after_delete')
+def task_changed(mapper, connection, task):
+    # Task counters and completion feed the project list too
+    projects = {task.project_id, previous(task, 'project_id')}
+    mark(task, project_keys(TASKS, projects) | {(PROJECTS, 0)})
+    if len(projects) > 1:
+        mark(task, project_keys(LOGS, projects)) # Its logs moved along with it
+
+@event.listens_for(WorkLog, 'after_insert')
+@event.listens_for(WorkLog, 'after_update')
+@event.listens_for(WorkLog, 'after_delete')
+def log_changed(mapper, connection, log):
+    mark_log(log, {log.task_id, previous(log, 'task_id')})
+
+@event.listens_for(Decision, 'after_insert')
+@event.listens_for(Decision, 'after_update')
+@event.listens_for(Decision, 'after_delete')
+def decision_changed(mapper, connection, decision):
+    mark(decision, project_keys(DECISIONS, {decision.project_id, previous(decision, 'project_id')}))
+
+@event.listens_for(Project, 'after_insert')
+@event.listens_for(Project, 'after_update')
+@event.listens_for(Project, 'after_delete')
+@event.listens_for(ProjectMember, 'after_insert')
+@event.listens_for(ProjectMember, 'after_update')
+@event.listens_for(ProjectMember, 'after_delete')
+def project_changed(mapper, connection, target):
+    mark(target, {(PROJECTS, 0)})
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_changed(mapper, connection, user):
+    mark(user, {(USERS, 0)})
+
+@event.listens_for(Session, 'after_flush')
+def bump_flushed(session, flush_context):
+    keys = session.info.pop('version_keys', set())
+    task_ids = session.info.pop('version_log_tasks', None)
+    if task_ids:
+        # One lookup for the projects of every log touched in this flush
+        project_ids = session.connection().execute(select(Task.project_id).where(Task.id.in_(task_ids))).scalars()
+        keys |= project_keys(LOGS, set(project_ids))
+    if keys:
+        bump(session.connection(), keys)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_unflushed(session):
+    session.info.pop('version_keys', None)
+    session.info.pop('version_log_tasks', None)
@@ -0,0 +1,92 @@
+"""
+Test doubles shared by the test suite and the benchmarks.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeOpenAI:
+    """
+    Minimal OpenAI-compatible server for /v1/chat/completions. Answers with
+    `tokens` joined, or streamed as SSE chunks when asked to; `hold` (a
+    threading.Event) pauses the stream after the first chunk until set.
+    `error_status` answers with an API error instead, for the next `fail_times`
+    requests only when that is set. Non-streamed replies keep the connection
+    alive; `client_ports` records the connection each request came in on.
+    """
+    def __init__(self):
+        self.tokens = ["Hello", " from", " the", " model."]
+        self.hold = None
+        self.error_status = None
+        self.fail_times = None
+        self.requests = []
+        self.client_ports = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.requests.append(body)
+                fake.client_ports.append(self.client_address[1])
+                if fake.error_status and (fake.fail_times is None or fake.fail_times > 0):
+                    if fake.fail_times is not None:
+                        fake.fail_times -= 1
+                    return self.send_json(fake.error_status, {"error": {"message": "fake failure", "type": "server_error"}})
+
+                if not body.get('stream'):
+                    return self.send_json(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                        "choices": [{
+                            "index": 0, "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": ''.join(fake.tokens)}
+                        }]
+                    })
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close') # No length: the stream ends with the connection
+                self.end_headers()
+                self.close_connection = True
+                for i, token in enumerate(fake.tokens):
+                    self.send_chunk({"content": token})
+                    if i == 0 and fake.hold is not None:
+                        fake.hold.wait(timeout=5)
+                self.send_chunk({}, finish_reason="stop")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def send_json(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_chunk(self, delta, finish_reason=None):
+                chunk = {
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o",
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.hold is not None:
+            self.hold.set()
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,118 @@
+"""
+Write throughput of the database profiles on a file-backed SQLite database.
+
+    python benchmarks/db_profiles.py [--threads 8] [--writes 100] [--profiles default,sqlite] [--json out.json]
+
+Every profile gets a fresh database file. `threads` writers each commit
+`writes` work logs through task_service.create_work_log (one transaction per
+log, the same path POST /api/logs takes) while a reader thread keeps loading
+the dashboard stats. Reports commits/s, commit latency and lock errors.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.config import Config
+from app.models import Project, User
+from app.services import task_service, stats_service
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+def run_profile(profile, threads, writes):
+    workdir = tempfile.mkdtemp(prefix=f"bench-{profile}-")
+    config = type('BenchConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'DB_PROFILE': profile,
+        'EVENT_SPILL_PATH': os.path.join(workdir, 'spill.jsonl'),
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        users = [User(name=f"Writer {i}", email=f"writer{i}@bench.local") for i in range(threads)]
+        project = Project(name="Bench")
+        db.session.add_all(users + [project])
+        db.session.commit()
+        task_ids = [task_service.create_task(project.id, f"Task {i}", users[i].id)[0].id for i in range(threads)]
+        user_ids = [u.id for u in users]
+
+    latencies, errors, reads = [], [], [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def writer(i):
+        with app.app_context():
+            for n in range(writes):
+                started = time.perf_counter()
+                try:
+                    task_service.create_work_log(task_ids[i], user_ids[i], f"Bench log {n}", 0.5)
+                except OperationalError as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(str(e.orig))
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+    def reader():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    stats_service.global_stats()
+                    db.session.rollback() # End the read transaction like a request teardown would
+                    reads[0] += 1
+                except OperationalError:
+                    db.session.rollback()
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    reader_thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+    return {
+        "profile": profile,
+        "commits": len(latencies),
+        "lock_errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "commits_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "reads": reads[0],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=100, help="commits per writer thread")
+    parser.add_argument('--profiles', default='default,sqlite')
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [run_profile(p, args.threads, args.writes) for p in args.profiles.split(',')]
+    print(f"{'profile':<10}{'commits':>9}{'errors':>8}{'commits/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'reads':>8}")
+    for r in results:
+        print(f"{r['profile']:<10}{r['commits']:>9}{r['lock_errors']:>8}{r['commits_per_second']:>11}"
+              f"{str(r['p50_ms']):>9}{str(r['p95_ms']):>9}{r['reads']:>8}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,466 @@
+"""
+Latency, SQL statements and peak memory of every API route on generated datasets.
+
+    python benchmarks/endpoints.py [--scale 1k|100k|1m|<work logs>] [--requests 50] [--routes get_tasks,search]
+                                   [--json out.json] [--baseline benchmarks/baselines/endpoints-1000.json] [--save-baseline]
+
+A dataset holds users, projects, tasks, work logs, decisions and a year of
+audit events, with everything but the last 90 days compacted into archives.
+It is generated once per scale through the bulk ingest services, so counters,
+rollups, the search index and the change feed hold what production would,
+and cached under benchmarks/data/. Every run works on a copy of it; the
+write routes never change the cached data. AI routes talk to a local fake
+OpenAI server, so they measure this app and not the provider.
+
+Each route in app/routes.py has a case in CASES that builds its request.
+Write cases draw fresh targets (an open task, a departing member, ...) for
+every call. A route without a case fails the run, so new routes get one.
+Per route, one cold call is timed alone, then --requests calls give the
+p50/p95/p99 latency of the whole request, including reading the body, and
+the statements each one runs. A shorter second pass measures peak memory
+with tracemalloc, which slows Python code down too much to time under.
+
+--baseline compares against a stored result and exits 1 on regressions:
+more statements, a status mix that changed, or median latency or peak
+memory more than --tolerance above the baseline. Latency is taken relative
+to the run's overall speed against the baseline, and the tails are reported
+but not compared; a few dozen calls do not pin them down well enough. Statement counts carry over
+between machines. Latency and memory only compare well with a baseline
+saved on the same machine (--save-baseline).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import case, event, insert, select, update
+from app import create_app, db
+from app.config import Config
+from app.models import Decision, Project, ProjectMember, SystemEvent, Task, User
+from app.services import change_feed, event_service, event_store, ingest_service, job_service, stats_service, task_service
+from app.testing import FakeOpenAI
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+DATASET_VERSION = 1
+SEED = 20240601
+INGEST_CHUNK = 10_000
+LEAVERS = 200 # Departing members with open tasks, drawn on by the exit routes
+MEMORY_REQUESTS = 5
+ADMIN = {'X-User-ID': '1'}
+WORDS = (
+    "api auth backend cache deploy database frontend index latency migration queue release review schema "
+    "search session rollback refactor regression pipeline metrics outage rollout query replica token budget "
+    "dashboard export import webhook retry timeout memory profile benchmark customer invoice billing report"
+).split()
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def bench_config(workdir, llm_url=None):
+    return type('BenchConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'EVENT_SPILL_PATH': os.path.join(workdir, 'spill.jsonl'),
+        'EVENT_ARCHIVE_PATH': os.path.join(workdir, 'event_archive'),
+        'OPENAI_API_KEY': 'bench-key',
+        'OPENAI_BASE_URL': llm_url,
+    })
+
+# --- Datasets ---
+
+def dataset_shape(logs):
+    return {
+        "work_logs": logs,
+        "users": min(max(20, logs // 500), 1000),
+        "projects": max(3, logs // 20_000),
+        "tasks": max(500, logs // 10),
+        "events": logs // 10,
+    }
+
+def generate(path, logs):
+    """Writes a dataset of `logs` work logs to the directory path."""
+    shape = dataset_shape(logs)
+    rng = random.Random(SEED)
+    os.makedirs(path)
+    app = create_app(config_class=bench_config(path))
+    n_users, n_projects, n_tasks = shape['users'], shape['projects'], shape['tasks']
+    with app.app_context():
+        db.session.add(User(name="Bench Admin", email="admin@bench.local", role="Admin"))
+        db.session.add_all(User(name=f"Member {i}", email=f"member{i}@bench.local") for i in range(n_users))
+        db.session.add_all(Project(name=f"Project {i}", description=sentence(rng, 12)) for i in range(n_projects))
+        db.session.commit()
+        db.session.add_all(ProjectMember(project_id=1 + i % n_projects, user_id=2 + i) for i in range(n_users))
+        db.session.commit()
+
+        # Task t+1 is assigned to member 2 + t % n_users in project 1 + t % n_projects
+        for start in range(0, n_tasks, INGEST_CHUNK):
+            ingest_service.bulk_create_tasks([{
+                "project_id": 1 + t % n_projects, "user_id": 2 + t % n_users, "title": sentence(rng, 5),
+                "priority": ingest_service.PRIORITIES[t % 3], "description": sentence(rng, 20)
+            } for t in range(start, min(start + INGEST_CHUNK, n_tasks))])
+        now = datetime.utcnow()
+        for start in range(0, logs, INGEST_CHUNK):
+            rows = []
+            for i in range(start, min(start + INGEST_CHUNK, logs)):
+                t = rng.randrange(n_tasks)
+                rows.append({
+                    "task_id": t + 1, "user_id": 2 + t % n_users, "content": sentence(rng, 16),
+                    "hours_spent": rng.choice((0.5, 1, 2, 4)), "blockers": sentence(rng, 4) if i % 7 == 0 else "",
+                    "decisions_made": sentence(rng, 10) if i % 20 == 0 else None,
+                    "timestamp": (now - timedelta(days=365) * (1 - i / logs)).isoformat()
+                })
+            ingest_service.bulk_create_work_logs(rows)
+
+        # Spread the tasks over the board, then let the counters and rollups catch up
+        task = Task.__table__
+        db.session.execute(update(task).values(status=case(
+            (task.c.id % 5 == 0, 'DONE'), (task.c.id % 5 == 1, 'REVIEW'), (task.c.id % 5 == 2, 'IN_PROGRESS'), else_='TODO'
+        )))
+        db.session.commit()
+        task_service.reconcile_project_counters(repair=True)
+
+        db.session.add_all(User(name=f"Leaver {i}", email=f"leaver{i}@bench.local") for i in range(LEAVERS))
+        db.session.commit()
+        leavers = db.session.execute(select(User.id).where(User.email.like('leaver%')).order_by(User.id)).scalars().all()
+        ingest_service.bulk_create_tasks([
+            {"project_id": 1 + i % n_projects, "user_id": user_id, "title": f"Handover item {i}"}
+            for i, user_id in enumerate(leavers) for _ in range(2)
+        ])
+
+        event_service.flush_events()
+        for start in range(0, shape['events'], INGEST_CHUNK):
+            db.session.execute(insert(SystemEvent), [{
+                "event_type": ('STATUS_CHANGE', 'TASK_UPDATED', 'DECISION_CREATED')[i % 3],
+                "description": f"Event {i}", "project_id": 1 + i % n_projects,
+                "timestamp": now - timedelta(days=365) * (1 - i / shape['events'])
+            } for i in range(start, min(start + INGEST_CHUNK, shape['events']))])
+            db.session.commit()
+        event_store.compact(now=now)
+
+        with db.engine.begin() as connection:
+            stats_service.rebuild(connection)
+        db.engine.dispose()
+
+    with open(os.path.join(path, 'dataset.json'), 'w') as f:
+        json.dump({"version": DATASET_VERSION, **shape}, f, indent=2)
+
+def ensure_dataset(scale, data_dir, regenerate=False):
+    logs = SCALES[scale] if scale in SCALES else int(scale)
+    path = os.path.join(data_dir, f"endpoints-{logs}")
+    meta_path = os.path.join(path, 'dataset.json')
+    if not regenerate and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('version') == DATASET_VERSION:
+            return path, meta
+    shutil.rmtree(path, ignore_errors=True)
+    print(f"Generating a dataset with {logs} work logs in {path} ...", flush=True)
+    started = time.perf_counter()
+    generate(path, logs)
+    print(f"  done in {time.perf_counter() - started:.1f}s", flush=True)
+    with open(meta_path) as f:
+        return path, json.load(f)
+
+# --- Request cases ---
+
+class Targets:
+    """Ids the cases build requests from; write cases take fresh ones so repeated calls do real work."""
+    def __init__(self):
+        self.pools = {
+            "project": db.session.execute(select(Project.id).order_by(Project.id)).scalars().all(),
+            "member": db.session.execute(
+                select(User.id).where(User.email.like('member%')).order_by(User.id).limit(1000)
+            ).scalars().all(),
+            "leaver": db.session.execute(select(User.id).where(User.email.like('leaver%')).order_by(User.id)).scalars().all(),
+            "todo": self.tasks('TODO'),
+            "open": self.tasks('IN_PROGRESS'),
+            "decision": db.session.execute(select(Decision.id).order_by(Decision.id).limit(1000)).scalars().all(),
+        }
+        self.used = Counter()
+        self.serial = 0
+        self.change_cursor = change_feed.current_cursor()
+        self.job_id = job_service.enqueue('PROJECT_SUMMARY', {"project_id": self.pools["project"][0]}).id
+        self.engine = db.engine
+
+    def tasks(self, status):
+        return db.session.execute(
+            select(Task.id).where(Task.status == status, ~Task.title.like('Handover item%')).order_by(Task.id).limit(1000)
+        ).scalars().all()
+
+    def take(self, pool):
+        values = self.pools[pool]
+        value = values[self.used[pool] % len(values)]
+        self.used[pool] += 1
+        return value
+
+    def unique(self, prefix):
+        self.serial += 1
+        return f"{prefix} {os.getpid()}-{self.serial}"
+
+    def new_user(self):
+        """A user in no project yet, written before the call so it is not timed; the member pool runs out at small scales."""
+        with self.engine.begin() as connection:
+            return connection.execute(
+                insert(User).values(name=self.unique("Joiner"), email=f"{self.unique('joiner')}@bench.local".replace(' ', ''))
+            ).inserted_primary_key[0]
+
+def log_rows(t, count):
+    return [{"task_id": t.take('open'), "user_id": t.take('member'), "content": f"Bulk log {i}", "hours_spent": 1} for i in range(count)]
+
+# Endpoint name -> request for one call; first_frame cases are open-ended streams timed to their first frame
+CASES = {
+    'login': lambda t: {"path": "/api/login", "json": {"email": "admin@bench.local", "password": "bench"}},
+    'get_users': lambda t: {"path": "/api/users"},
+    'create_user': lambda t: {"path": "/api/users", "json": {"name": t.unique("User"), "email": f"{t.unique('user')}@bench.local".replace(' ', '')}},
+    'update_user_status': lambda t: {"path": f"/api/users/{t.take('member')}/status", "json": {"status": "Active"}},
+    'initiate_exit': lambda t: {"path": f"/api/users/{t.take('member')}/exit/initiate"},
+    'confirm_exit': lambda t: {"path": f"/api/users/{t.take('leaver')}/exit/confirm", "json": {"default_assignee": 1}, "headers": ADMIN},
+    'confirm_exits_bulk': lambda t: {"path": "/api/users/exit/bulk", "headers": ADMIN, "json": {
+        "departures": [{"user_id": t.take('leaver'), "default_assignee": 1} for _ in range(2)]
+    }},
+    'generate_project_summary': lambda t: {"path": f"/api/projects/{t.take('project')}/summary", "json": {"type": "daily"}},
+    'get_job': lambda t: {"path": f"/api/jobs/{t.job_id}"},
+    'create_project': lambda t: {"path": "/api/projects", "json": {"name": t.unique("Project")}, "headers": ADMIN},
+    'add_project_member': lambda t: {
+        "path": f"/api/projects/{t.take('project')}/members", "json": {"user_id": t.new_user()}, "headers": ADMIN
+    },
+    'get_project_members': lambda t: {"path": f"/api/projects/{t.take('project')}/members"},
+    'create_milestone': lambda t: {"path": f"/api/projects/{t.take('project')}/milestones", "json": {"title": t.unique("Milestone")}, "headers": ADMIN},
+    'get_project_stats': lambda t: {"path": f"/api/projects/{t.take('project')}/stats"},
+    'get_project_summary': lambda t: {"path": f"/api/projects/{t.take('project')}/summary", "query_string": {"type": "daily"}},
+    'stream_project_summary': lambda t: {"path": f"/api/projects/{t.take('project')}/summary/stream"},
+    'stream_project_updates': lambda t: {"path": f"/api/projects/{t.take('project')}/updates/stream", "first_frame": True},
+    'get_projects': lambda t: {"path": "/api/projects"},
+    'create_task': lambda t: {"path": "/api/tasks", "json": {"project_id": t.take('project'), "title": t.unique("Task"), "user_id": t.take('member')}},
+    'get_tasks': lambda t: {"path": "/api/tasks", "query_string": {"project_id": t.take('project')}},
+    'update_task_route': lambda t: {"path": f"/api/tasks/{t.take('open')}", "json": {"title": t.unique("Renamed")}},
+    'complete_task': lambda t: {"path": f"/api/tasks/{t.take('todo')}/complete", "json": {}},
+    'import_tasks': lambda t: {"path": "/api/tasks/import", "query_string": {"project_id": t.take('project')},
+                               "json": [{"title": t.unique("Imported"), "user_id": t.take('member')} for _ in range(50)]},
+    'create_log': lambda t: {"path": "/api/logs", "json": {"task_id": t.take('open'), "user_id": t.take('member'), "content": "Progress", "hours_spent": 1}},
+    'create_logs_bulk': lambda t: {"path": "/api/logs/bulk", "json": log_rows(t, 100)},
+    'get_logs': lambda t: {"path": "/api/logs", "query_string": {"task_id": t.take('open')}},
+    'create_decision': lambda t: {"path": "/api/decisions", "json": {
+        "project_id": t.take('project'), "author_id": t.take('member'), "title": t.unique("Decision"),
+        "explanation": "Move the export to the job queue", "reasoning": "Timeouts on large projects", "impact_level": "Medium"
+    }},
+    'get_decisions': lambda t: {"path": "/api/decisions", "query_string": {"project_id": t.take('project')}},
+    'get_changes': lambda t: {"path": "/api/changes", "query_string": {"since": max(0, t.change_cursor - 500), "project_id": t.take('project')}},
+    'search': lambda t: {"path": "/api/search", "query_string": {"q": random.Random(t.used['search']).choice(WORDS)}},
+    'similar': lambda t: {"path": "/api/similar", "query_string": {"type": "decision", "id": t.take('decision')}},
+    'get_cache_stats': lambda t: {"path": "/api/stats/cache"},
+    'get_db_stats': lambda t: {"path": "/api/stats/db"},
+    'get_event_store_stats': lambda t: {"path": "/api/stats/events"},
+    'get_llm_stats': lambda t: {"path": "/api/stats/llm"},
+    'get_global_stats': lambda t: {"path": "/api/stats/overview"},
+    'get_push_stats': lambda t: {"path": "/api/stats/push"},
+    'get_user_profile': lambda t: {"path": f"/api/users/{t.take('member')}/profile"},
+    'get_contributor_summary': lambda t: {"path": f"/api/users/{t.take('member')}/summary"},
+    'trigger_handover': lambda t: {"path": f"/api/users/{t.take('member')}/handover", "headers": ADMIN},
+    'stream_handover': lambda t: {"path": f"/api/users/{t.take('member')}/handover/stream", "headers": ADMIN},
+    'get_events': lambda t: {"path": "/api/events", "query_string": {"project_id": t.take('project')}, "headers": ADMIN},
+}
+
+def api_routes(app):
+    """{endpoint name: (method, rule)} for every route of the API blueprint."""
+    return {
+        rule.endpoint.split('.', 1)[1]: (sorted(rule.methods - {'HEAD', 'OPTIONS'})[0], rule.rule)
+        for rule in app.url_map.iter_rules() if rule.endpoint.startswith('api.')
+    }
+
+# --- Measurement ---
+
+class StatementCounter:
+    """Counts the statements this thread sends; background flushers run on their own threads."""
+    def __init__(self, engine):
+        self.thread = threading.get_ident()
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.on_execute)
+
+    def on_execute(self, *args):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+def call(client, method, request):
+    request = dict(request)
+    first_frame = request.pop('first_frame', False)
+    response = client.open(request.pop('path'), method=method, buffered=False, **request)
+    try:
+        if first_frame:
+            next(iter(response.response), None)
+        else:
+            response.get_data()
+    finally:
+        response.close()
+    return response.status_code
+
+def measure(client, targets, counter, method, build, requests):
+    """Runs one route's case; returns its result entry."""
+    started = time.perf_counter()
+    statuses = Counter([call(client, method, build(targets))])
+    first_ms = (time.perf_counter() - started) * 1000
+
+    latencies, statements = [], []
+    for _ in range(requests):
+        request = build(targets)
+        counter.count = 0
+        started = time.perf_counter()
+        statuses[call(client, method, request)] += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+        statements.append(counter.count)
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(min(requests, MEMORY_REQUESTS)):
+            request = build(targets)
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            statuses[call(client, method, request)] += 1
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": {str(code): count for code, count in sorted(statuses.items())},
+        "first_ms": round(first_ms, 2),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "statements": percentile(statements, 0.5),
+        "statements_max": max(statements),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+def run(dataset, meta, requests, only=None):
+    workdir = tempfile.mkdtemp(prefix="bench-endpoints-")
+    shutil.copytree(dataset, workdir, dirs_exist_ok=True)
+    llm = FakeOpenAI()
+    llm.start()
+    try:
+        app = create_app(config_class=bench_config(workdir, llm.base_url))
+        with app.app_context():
+            targets = Targets()
+            counter = StatementCounter(db.engine)
+        routes = api_routes(app)
+        uncovered = sorted(name for name in routes if name not in CASES)
+        client = app.test_client()
+        results = {}
+        for name, (method, rule) in sorted(routes.items()):
+            if name not in CASES or (only and name not in only):
+                continue
+            results[name] = {"method": method, "rule": rule, **measure(client, targets, counter, method, CASES[name], requests)}
+            r = results[name]
+            print(f"{name:<26}{method:<7}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['statements']:>7}{r['peak_kb']:>10}"
+                  f"  {' '.join(f'{code}x{count}' for code, count in r['status'].items())}", flush=True)
+        with app.app_context():
+            event_service.flush_events()
+            db.engine.dispose()
+    finally:
+        llm.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "dataset": {k: v for k, v in meta.items() if k != 'version'},
+            "requests": requests,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "created_at": datetime.utcnow().isoformat(timespec='seconds'),
+        },
+        "routes": results,
+        "uncovered": [] if only else uncovered,
+    }
+
+# --- Baselines ---
+
+def compare(results, baseline, tolerance, min_ms=1.0, min_kb=64):
+    """
+    Regressions of results against baseline as readable lines. Latency is
+    compared after dividing out the median ratio over all routes, so a run
+    on a busier or faster machine only flags the routes that moved on their own.
+    """
+    shared = [name for name in results['routes'] if name in baseline['routes']]
+    speed = percentile([results['routes'][n]['p50_ms'] / max(baseline['routes'][n]['p50_ms'], 0.01) for n in shared], 0.5) or 1.0
+    regressions = []
+    if speed > 1 + tolerance:
+        regressions.append(f"warning: every route is {speed:.2f}x slower than the baseline; a busy machine or a general regression")
+    for name in shared:
+        r, b = results['routes'][name], baseline['routes'][name]
+        expected_ms = b['p50_ms'] * max(speed, 1.0)
+        if r['statements'] > b['statements']:
+            regressions.append(f"{name}: {r['statements']} statements per request, was {b['statements']}")
+        if set(r['status']) != set(b['status']):
+            regressions.append(f"{name}: statuses {r['status']}, were {b['status']}")
+        if r['p50_ms'] > expected_ms * (1 + tolerance) and r['p50_ms'] - expected_ms > min_ms:
+            regressions.append(f"{name}: p50 {r['p50_ms']} ms, was {b['p50_ms']} ms")
+        if r['peak_kb'] > b['peak_kb'] * (1 + tolerance) and r['peak_kb'] - b['peak_kb'] > min_kb:
+            regressions.append(f"{name}: peak memory {r['peak_kb']} KB, was {b['peak_kb']} KB")
+    if results['meta']['dataset'] != baseline['meta']['dataset']:
+        regressions.insert(0, "warning: the baseline was taken on a different dataset")
+    return regressions
+
+def baseline_path(logs):
+    return os.path.join(BENCH_DIR, 'baselines', f"endpoints-{logs}.json")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='1k', help="1k, 100k, 1m or a number of work logs")
+    parser.add_argument('--requests', type=int, default=50, help="timed calls per route")
+    parser.add_argument('--routes', help="comma-separated endpoint names; default every route")
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'), help="where generated datasets are kept")
+    parser.add_argument('--regenerate', action='store_true', help="generate the dataset even when a cached one exists")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--baseline', help="compare against this result file (default: the stored one for the scale)")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the baseline for the scale")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed relative growth of median latency and peak memory")
+    args = parser.parse_args()
+
+    dataset, meta = ensure_dataset(args.scale, args.data_dir, args.regenerate)
+    only = set(args.routes.split(',')) if args.routes else None
+    print(f"{'route':<26}{'method':<7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'stmts':>7}{'peak KB':>10}  statuses")
+    results = run(dataset, meta, args.requests, only)
+    if results['uncovered']:
+        print(f"Routes without a benchmark case: {', '.join(results['uncovered'])}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    stored = baseline_path(meta['work_logs'])
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(stored), exist_ok=True)
+        with open(stored, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline {stored}")
+        return
+
+    regressions = []
+    path = args.baseline or (stored if os.path.exists(stored) else None)
+    if path:
+        with open(path) as f:
+            regressions = [line for line in compare(results, json.load(f), args.tolerance)]
+        print(f"Compared with {path}: {sum(not r.startswith('warning') for r in regressions)} regression(s)")
+        for line in regressions:
+            print(f"  {line}")
+    failed = results['uncovered'] or any(not r.startswith('warning') for r in regressions)
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+from app import create_app
+from app.services import event_store
+
+app = create_app()
+with app.app_context():
+    for archive in event_store.compact():
+        print(f"Archived {archive['row_count']} events of {archive['partition']} to {archive['path']}")
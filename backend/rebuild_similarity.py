@@ -0,0 +1,10 @@
+from app import create_app, db
+from app.services import similarity_index
+
+app = create_app()
+with app.app_context():
+    index = similarity_index.get_similarity_index()
+    if index is None:
+        raise SystemExit("NumPy is not installed")
+    similarity_index.rebuild(index, db.session.connection())
+    print(f"Indexed {index.docs} decisions and work logs")
@@ -0,0 +1,8 @@
+from app import create_app, db
+from app.services import stats_service
+
+app = create_app()
+with app.app_context():
+    with db.engine.begin() as connection:
+        rows = stats_service.rebuild(connection)
+    print(f"Rebuilt {rows} stats rollup rows")
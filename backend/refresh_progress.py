@@ -1,10 +1,11 @@
 from app import create_app
-from app.services.task_service import update_project_progress
+from app.services.task_service import reconcile_project_counters
 from app.models import Project
 
 app = create_app()
 with app.app_context():
-    projects = Project.query.all()
-    for p in projects:
-        update_project_progress(p.id)
-        print(f"Refreshed progress for Project {p.id}: {p.completion_percentage}%")
+    mismatches = reconcile_project_counters(repair=True)
+    for m in mismatches:
+        print(f"Repaired counters for Project {m['project_id']}: {m['stored']} -> {m['expected']}")
+    for p in Project.query.all():
+        print(f"Project {p.id}: {p.tasks_done}/{p.tasks_total} done, {p.completion_percentage}%")
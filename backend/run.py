@@ -1,6 +1,9 @@
 from app import create_app
+from app.services import job_service
 
 app = create_app()
+job_service.start_workers(app)
+app.extensions['event_writer'].start_flusher()
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,15 @@
+import pytest
+from app.config import Config
+from app.testing import FakeOpenAI
+
+@pytest.fixture(autouse=True)
+def unbuffered_audit_events(monkeypatch):
+    # Tests read the audit trail straight after acting; files that test the batching set their own size
+    monkeypatch.setattr(Config, 'EVENT_BATCH_SIZE', 1)
+
+@pytest.fixture
+def fake_openai():
+    server = FakeOpenAI()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,34 @@
+import pytest
+from app import create_app, db
+from app.config import Config
+from benchmarks.endpoints import CASES, api_routes, compare
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        yield app
+        db.drop_all()
+
+def test_every_route_has_a_benchmark_case(app):
+    assert sorted(set(api_routes(app)) - set(CASES)) == []
+    assert sorted(set(CASES) - set(api_routes(app))) == [] # Cases for removed routes go with them
+
+def result(**routes):
+    return {"meta": {"dataset": {"work_logs": 1000}}, "routes": {
+        name: {"p50_ms": p50, "statements": 2, "status": {"200": 50}, "peak_kb": 100.0} for name, p50 in routes.items()
+    }}
+
+def test_baseline_comparison_allows_for_machine_speed():
+    baseline = result(a=2.0, b=4.0, c=10.0)
+    assert compare(result(a=3.0, b=6.0, c=15.0), baseline, tolerance=0.5) == [] # Everything 1.5x: the machine
+    assert compare(result(a=2.0, b=4.0, c=40.0), baseline, tolerance=0.5) == ["c: p50 40.0 ms, was 10.0 ms"]
+    slower = result(a=2.0, b=4.0, c=10.0)
+    slower['routes']['b'].update(statements=3, status={"200": 49, "500": 1})
+    assert compare(slower, baseline, tolerance=0.5) == [
+        "b: 3 statements per request, was 2", "b: statuses {'200': 49, '500': 1}, were {'200': 50}"
+    ]
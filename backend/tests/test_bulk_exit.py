@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User, SystemEvent, StatsRollup, AISummary
+from app.services import task_service, stats_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+ADMIN = {'X-User-ID': '1'}
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([
+            User(name="Admin", email="admin@test.com", role="Admin"),
+            User(name="Leaver A", email="a@test.com"),
+            User(name="Leaver B", email="b@test.com"),
+            User(name="Stayer", email="stay@test.com"),
+            User(name="Former", email="former@test.com", status='Inactive'),
+            Project(name="Reorg")
+        ])
+        db.session.commit()
+        for i in range(6):
+            task_service.create_task(1, f"A{i}", 2)
+        for i in range(4):
+            task_service.create_task(1, f"B{i}", 3)
+        yield app
+        db.drop_all()
+
+def snapshot():
+    # Users emptied by the move keep an all-zero row until the next rebuild drops it
+    rows = {
+        (r.scope, r.scope_id): tuple(getattr(r, c) for c in stats_service.COUNTER_COLUMNS)
+        for r in StatsRollup.query.all()
+    }
+    return {key: counts for key, counts in rows.items() if key[0] != stats_service.USER or any(counts)}
+
+def test_team_offboarding_is_applied_in_one_transaction(app):
+    payload = {"departures": [
+        {"user_id": 2, "default_assignee": 4, "reassignments": {"1": 1}, "handover_summary": "A's notes"},
+        {"user_id": 3, "default_assignee": 1}
+    ]}
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        res = app.test_client().post('/api/users/exit/bulk', json=payload, headers=ADMIN)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert res.status_code == 200
+    assert res.json['reassigned'] == 10
+    assert res.json['by_target'] == {"1": 5, "4": 5}
+    assert len(statements) < 22 # Includes the list version bump and the change feed
+
+    assert {t.id: t.user_id for t in Task.query.all()} == {1: 1, 2: 4, 3: 4, 4: 4, 5: 4, 6: 4, 7: 1, 8: 1, 9: 1, 10: 1}
+    assert all(t.version_id == 2 for t in Task.query.all())
+    assert [u.status for u in User.query.filter(User.id.in_([2, 3]))] == ['Inactive', 'Inactive']
+    assert SystemEvent.query.filter_by(event_type='TASK_REASSIGNED').count() == 10
+    assert SystemEvent.query.filter_by(event_type='USER_EXIT').count() == 2
+    assert AISummary.query.filter_by(user_id=2, summary_type='HANDOVER').count() == 1
+
+    live = snapshot()
+    with db.engine.begin() as connection:
+        stats_service.rebuild(connection)
+    db.session.expire_all()
+    assert snapshot() == live
+
+@pytest.mark.parametrize("departures, message", [
+    ([{"user_id": 2, "default_assignee": 5}, {"user_id": 3, "default_assignee": 4}], "Target user 5 is not active"),
+    ([{"user_id": 2, "default_assignee": 3}, {"user_id": 3, "default_assignee": 4}], "Target user 3 is also leaving"),
+    ([{"user_id": 2, "default_assignee": 4}, {"user_id": 3, "reassignments": {"7": 4}}], "Task 8 must be reassigned."),
+    ([{"user_id": 2, "default_assignee": 4, "reassignments": {"7": 4}}], "Task 7 is not an open task of user 2"),
+])
+def test_any_invalid_departure_rejects_the_whole_request(app, departures, message):
+    res = app.test_client().post('/api/users/exit/bulk', json={"departures": departures}, headers=ADMIN)
+    assert res.status_code == 400
+    assert message in [e['message'] for e in res.json['errors']]
+
+    assert {t.user_id for t in Task.query.all()} == {2, 3}
+    assert User.query.filter_by(status='Inactive').count() == 1
+    assert SystemEvent.query.filter_by(event_type='USER_EXIT').count() == 0
+
+def test_single_exit_keeps_its_contract(app):
+    client = app.test_client()
+    res = client.post('/api/users/3/exit/confirm', json={"reassignments": {"7": 4}})
+    assert res.status_code == 400
+    assert res.json['message'] == "Task 8 must be reassigned."
+
+    res = client.post('/api/users/3/exit/confirm', json={"reassignments": {str(i): 4 for i in range(7, 11)}})
+    assert res.status_code == 200
+    assert db.session.get(User, 3).status == 'Inactive'
+    assert client.post('/api/users/99/exit/confirm', json={}).status_code == 404
+
+def test_bulk_exit_requires_admin(app):
+    res = app.test_client().post('/api/users/exit/bulk', json={"departures": []}, headers={'X-User-ID': '4'})
+    assert res.status_code == 403
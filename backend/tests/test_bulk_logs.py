@@ -0,0 +1,103 @@
+import json
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User, WorkLog, Decision, StatsRollup, SystemEvent
+from app.services import task_service, stats_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    OPENAI_API_KEY = 'test-key'
+    BULK_MAX_ROWS = 1000
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Imported"), Project(name="Other")])
+        db.session.commit()
+        task_service.create_task(1, "Open")
+        task_service.create_task(2, "Elsewhere")
+        done, _ = task_service.create_task(1, "Done")
+        done.status = 'DONE'
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def log(task_id=1, **overrides):
+    return {"task_id": task_id, "user_id": 1, "content": "Imported work", "hours_spent": 1.5, **overrides}
+
+def snapshot():
+    return {
+        (r.scope, r.scope_id): tuple(getattr(r, c) for c in stats_service.COUNTER_COLUMNS)
+        for r in StatsRollup.query.all()
+    }
+
+def test_mixed_batch_reports_per_row_results(app):
+    rows = [
+        log(content="first"),
+        log(task_id=3),
+        log(hours_spent=0),
+        log(task_id=99),
+        {"task_id": 1},
+        log(task_id=2, content="second", timestamp="2024-01-02T03:04:05Z"),
+    ]
+    res = app.test_client().post('/api/logs/bulk', json=rows)
+    assert res.status_code == 207
+    body = res.json
+    assert (body['total'], body['created'], body['failed']) == (6, 2, 4)
+    assert [r['status'] for r in body['results']] == [201, 400, 400, 404, 400, 201]
+    assert body['results'][1]['error'] == "InvalidState"
+
+    first, second = (db.session.get(WorkLog, r['id']) for r in body['results'] if r['status'] == 201)
+    assert (first.content, second.content) == ("first", "second")
+    assert second.timestamp.isoformat() == "2024-01-02T03:04:05"
+
+def test_ndjson_body_with_a_broken_line(app):
+    body = "\n".join([json.dumps(log()), "{not json", json.dumps(log(hours_spent=2))]) + "\n"
+    res = app.test_client().post('/api/logs/bulk', data=body, content_type='application/x-ndjson')
+    assert res.status_code == 207
+    assert [r['status'] for r in res.json['results']] == [201, 400, 201]
+    assert res.json['results'][1]['error'] == "InvalidJSON"
+
+def test_atomic_batch_writes_nothing_on_any_error(app):
+    res = app.test_client().post('/api/logs/bulk?atomic=true', json=[log(), log(hours_spent=-1)])
+    assert res.status_code == 400
+    assert WorkLog.query.count() == 0
+
+def test_bookkeeping_matches_the_single_row_path(app):
+    cache = app.extensions['summary_cache']
+    cache.put(cache.key(1, 'daily'), {"summary": "stale"})
+    rows = [log(hours_spent=2), log(task_id=2, hours_spent=3, decisions_made="Switch trackers")]
+    assert app.test_client().post('/api/logs/bulk', json=rows).status_code == 201
+
+    live = snapshot()
+    with db.engine.begin() as connection:
+        stats_service.rebuild(connection)
+    db.session.expire_all()
+    assert snapshot() == live
+    assert Decision.query.filter_by(project_id=2, title="Insight from Task 2").count() == 1
+    assert SystemEvent.query.filter_by(event_type='LOGS_IMPORTED').count() == 2
+    assert cache.get(cache.key(1, 'daily')) is None
+
+def test_statement_count_does_not_grow_with_rows(app):
+    def statements_for(n):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            res = app.test_client().post('/api/logs/bulk', json=[log(task_id=1 + i % 2) for i in range(n)])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert res.status_code == 201
+        return len(statements)
+
+    # Inserts go out as multi-row pages, so 100x the rows costs at most a page or two more
+    assert statements_for(500) <= statements_for(5) + 2
+
+def test_oversized_batch_is_rejected(app):
+    res = app.test_client().post('/api/logs/bulk', json=[log()] * 1001)
+    assert res.status_code == 413
+    assert app.test_client().post('/api/logs/bulk', json={"rows": []}).status_code == 400
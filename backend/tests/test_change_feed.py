@@ -0,0 +1,123 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import ChangeLog, Project, Task, User
+from app.services import decision_service, task_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+ADMIN = {'X-User-ID': '1'}
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([
+            User(name="Admin", email="admin@test.com", role="Admin"), User(name="Dev", email="dev@test.com"),
+            Project(name="Alpha"), Project(name="Beta")
+        ])
+        db.session.commit()
+        task_service.create_task(1, "Alpha task", 2)
+        task_service.create_task(2, "Beta task", 2)
+        yield app
+        db.drop_all()
+
+def changes(client, since, **params):
+    res = client.get('/api/changes', query_string={"since": since, **params})
+    assert res.status_code == 200, res.json
+    return res.json
+
+def summary(feed):
+    return [(c['type'], c['id'], c['op']) for c in feed['changes']]
+
+def test_feed_returns_only_what_changed_after_the_cursor(app):
+    client = app.test_client()
+    cursor = changes(client, 0)['next_cursor']
+    assert changes(client, cursor) == {"changes": [], "next_cursor": cursor, "has_more": False}
+
+    task_service.create_work_log(1, 2, "Progress", 2.0)
+    task_service.update_task(1, title="Renamed")
+    task_service.update_task(1, priority="High")
+    feed = changes(client, cursor)
+    assert summary(feed) == [('log', 1, 'upsert'), ('task', 1, 'upsert')] # One entry per entity, latest state
+    task = feed['changes'][1]['data']
+    assert (task['title'], task['priority'], task['assignee_name']) == ("Renamed", "High", "Dev")
+    assert int(feed['next_cursor']) > int(cursor)
+
+def test_project_scope_includes_users_and_members(app):
+    client = app.test_client()
+    db.session.add(User(name="Idle", email="idle@test.com"))
+    db.session.commit()
+    cursor = changes(client, 0)['next_cursor']
+    client.post('/api/projects/1/members', json={"user_id": 1, "role": "Lead"}, headers=ADMIN)
+    client.patch('/api/users/3/status', json={"status": "Inactive"})
+    task_service.update_task(2, title="Beta only")
+    decision_service.create_decision(2, 1, "Beta decision", "x", "y", "Low")
+
+    alpha = summary(changes(client, cursor, project_id=1))
+    assert ('member', 1, 'upsert') in alpha and ('user', 3, 'upsert') in alpha
+    assert not any(kind in ('task', 'decision') for kind, _, _ in alpha)
+    beta = changes(client, cursor, project_id=2)['changes']
+    assert {(c['type'], c['id']) for c in beta} >= {('task', 2), ('decision', 1), ('user', 3)}
+    assert next(c for c in beta if c['type'] == 'user')['data']['status'] == 'Inactive'
+
+def test_moving_a_task_deletes_it_from_the_old_project_feed(app):
+    client = app.test_client()
+    task_service.create_work_log(1, 2, "Before the move", 1.0)
+    cursor = changes(client, 0)['next_cursor']
+    task = db.session.get(Task, 1)
+    task.project_id = 2
+    db.session.commit()
+    assert summary(changes(client, cursor, project_id=1)) == [('task', 1, 'delete'), ('log', 1, 'delete')]
+    assert summary(changes(client, cursor, project_id=2)) == [('task', 1, 'upsert'), ('log', 1, 'upsert')]
+
+    assert client.patch('/api/tasks/1', json={"project_id": 1}).status_code == 200
+    feed = changes(client, cursor)
+    assert summary(feed) == [('task', 1, 'upsert'), ('log', 1, 'upsert')] # Moved, not deleted
+    assert feed['changes'][0]['data']['project_id'] == 1
+
+def test_deletes_and_rollbacks(app):
+    client = app.test_client()
+    cursor = changes(client, 0)['next_cursor']
+    db.session.delete(db.session.get(Task, 2))
+    db.session.commit()
+    db.session.add(Task(project_id=1, title="Never committed"))
+    db.session.flush()
+    db.session.rollback()
+    feed = changes(client, cursor)
+    assert summary(feed) == [('task', 2, 'delete')] and feed['changes'][0]['data'] is None
+
+def test_bulk_writers_record_their_rows(app):
+    client = app.test_client()
+    cursor = changes(client, 0)['next_cursor']
+    client.post('/api/tasks/import?project_id=2', json=[{"title": "Imported"}])
+    client.post('/api/logs/bulk', json=[{"task_id": 1, "user_id": 2, "content": "Bulk", "hours_spent": 1, "decisions_made": "Pivot"}])
+    client.post('/api/users/2/exit/confirm', json={"default_assignee": 1}, headers=ADMIN)
+    feed = changes(client, cursor)['changes']
+    assert {(c['type'], c['id'], c['project_id']) for c in feed} >= {
+        ('task', 3, 2), ('log', 1, 1), ('decision', 1, 1), ('task', 1, 1), ('task', 2, 2), ('user', 2, None)
+    }
+    assert next(c for c in feed if (c['type'], c['id']) == ('task', 1))['data']['user_id'] == 1
+
+def test_paging_covers_every_change_in_constant_queries(app):
+    client = app.test_client()
+    for i in range(30):
+        task_service.create_task(1 + i % 2, f"Task {i}")
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    seen, cursor, pages = set(), 0, 0
+    while True:
+        feed = changes(client, cursor, limit=7)
+        seen |= {(c['type'], c['id']) for c in feed['changes']}
+        cursor, pages = feed['next_cursor'], pages + 1
+        if not feed['has_more']:
+            break
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    assert {('task', i) for i in range(1, 33)} <= seen and pages == 5 # 32 tasks and 2 users, 7 per page
+    assert len(statements) <= 4 * pages # Change rows, their seqs and one load per entity type
+    assert ChangeLog.query.count() >= 32
+    assert client.get('/api/changes', query_string={"since": "abc"}).status_code == 400
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User, CollectionVersion
+from app.services import task_service, version_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Alpha"), Project(name="Beta")])
+        db.session.commit()
+        task_service.create_task(1, "Alpha task", 1)
+        task_service.create_task(2, "Beta task")
+        yield app
+        db.drop_all()
+
+@pytest.fixture
+def statements(app):
+    executed = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+def revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers['ETag']
+    return first.headers['ETag'], client.get(url, headers={'If-None-Match': first.headers['ETag']})
+
+@pytest.mark.parametrize("url", ['/api/tasks', '/api/tasks?project_id=1', '/api/projects', '/api/decisions?project_id=1', '/api/logs'])
+def test_unchanged_collection_answers_304_without_the_list_query(app, statements, url):
+    client = app.test_client()
+    etag, second = revalidate(client, url)
+    statements.clear()
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag and second.data == b''
+    assert len(statements) == 1 and 'collection_version' in statements[0]
+
+def test_write_changes_the_etag(app):
+    client = app.test_client()
+    etag, _ = revalidate(client, '/api/tasks?project_id=1')
+    task_service.create_task(1, "Another")
+    res = client.get('/api/tasks?project_id=1', headers={'If-None-Match': etag})
+    assert res.status_code == 200 and res.headers['ETag'] != etag
+    assert len(res.get_json()['items']) == 2
+
+def test_other_projects_keep_their_etag(app):
+    client = app.test_client()
+    etag, _ = revalidate(client, '/api/tasks?project_id=2')
+    task_service.create_task(1, "Another")
+    assert client.get('/api/tasks?project_id=2', headers={'If-None-Match': etag}).status_code == 304
+    # The unfiltered list covers every project
+    etag_all, _ = revalidate(client, '/api/tasks')
+    task_service.create_task(2, "More")
+    assert client.get('/api/tasks', headers={'If-None-Match': etag_all}).status_code == 200
+
+def test_query_string_is_part_of_the_etag(app):
+    client = app.test_client()
+    assert client.get('/api/tasks?limit=1').headers['ETag'] != client.get('/api/tasks?limit=2').headers['ETag']
+
+def test_embedded_names_invalidate_the_list(app):
+    client = app.test_client()
+    etag, _ = revalidate(client, '/api/tasks?project_id=1')
+    db.session.get(User, 1).name = "Renamed"
+    db.session.commit()
+    res = client.get('/api/tasks?project_id=1', headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.get_json()['items'][0]['assignee_name'] == "Renamed"
+
+def test_logs_of_a_task_follow_its_project_version(app):
+    client = app.test_client()
+    etag, _ = revalidate(client, '/api/logs?task_id=1')
+    task_service.create_work_log(2, 1, "Other project", 1.0)
+    assert client.get('/api/logs?task_id=1', headers={'If-None-Match': etag}).status_code == 304
+    task_service.create_work_log(1, 1, "Same project", 1.0)
+    assert client.get('/api/logs?task_id=1', headers={'If-None-Match': etag}).status_code == 200
+
+def test_bulk_writers_bump_versions(app):
+    client = app.test_client()
+    tasks_etag, _ = revalidate(client, '/api/tasks?project_id=1')
+    logs_etag, _ = revalidate(client, '/api/logs')
+    client.post('/api/tasks/import?project_id=1', json=[{"title": "Imported"}])
+    client.post('/api/logs/bulk', json=[{"task_id": 1, "user_id": 1, "content": "Imported", "hours_spent": 1}])
+    assert client.get('/api/tasks?project_id=1', headers={'If-None-Match': tasks_etag}).status_code == 200
+    assert client.get('/api/logs', headers={'If-None-Match': logs_etag}).status_code == 200
+
+def test_rolled_back_writes_leave_versions_alone(app):
+    before = {(v.collection, v.scope_id): v.version for v in CollectionVersion.query.all()}
+    db.session.add(Task(project_id=1, title="Never committed"))
+    db.session.flush()
+    db.session.rollback()
+    assert {(v.collection, v.scope_id): v.version for v in CollectionVersion.query.all()} == before
+    assert before[(version_service.TASKS, 1)] == 1
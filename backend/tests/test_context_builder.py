@@ -0,0 +1,107 @@
+import threading
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.models import User, Project
+from app.services import ai_service, task_service
+from app.services.context_builder import ContextBuilder, count_tokens
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    OPENAI_API_KEY = 'test-key'
+
+def history(n):
+    return [f"- Log {i}: wired up the billing webhook retries and documented the failure modes" for i in range(n)]
+
+def counting_summarizer(calls):
+    def summarizer(max_tokens):
+        def summarize(text):
+            calls.append(text)
+            return f"- condensed {text.count(chr(10)) + 1} entries"
+        return summarize
+    return summarizer
+
+def test_small_history_passes_through_untouched():
+    calls = []
+    builder = ContextBuilder(budget=1000, summarizer=counting_summarizer(calls))
+    context = builder.build("Project: P", [("Recent Logs", history(3))])
+    assert context == "Project: P\nRecent Logs:\n" + "\n".join(history(3))
+    assert calls == []
+
+def test_large_history_is_condensed_within_budget():
+    calls = []
+    builder = ContextBuilder(budget=300, chunk_tokens=200, summarizer=counting_summarizer(calls))
+    context = builder.build("Project: P", [("Recent Logs", history(500)), ("Recent Decisions", history(50))])
+
+    assert count_tokens(context) <= 300
+    assert context.startswith("Project: P\nRecent Logs:\n- condensed")
+    assert "Recent Decisions:" in context
+    assert builder.map_calls == len(calls) > 2
+
+def test_chunks_are_summarized_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def summarizer(max_tokens):
+        def summarize(text):
+            barrier.wait() # Deadlocks (and times out) unless two chunks run at once
+            return "- condensed"
+        return summarize
+
+    builder = ContextBuilder(budget=100, chunk_tokens=60, max_workers=2, summarizer=summarizer)
+    context = builder.build("", [("Logs", history(8))])
+    assert "- condensed" in context
+
+def test_map_failures_fall_back_to_extracts():
+    def summarizer(max_tokens):
+        def summarize(text):
+            raise RuntimeError("provider down")
+        return summarize
+
+    builder = ContextBuilder(budget=200, chunk_tokens=100, summarizer=summarizer)
+    context = builder.build("Project: P", [("Recent Logs", history(300))])
+    assert count_tokens(context) <= 200
+    assert "- Log 0:" in context
+
+def test_contributor_prompt_stays_bounded(fake_openai):
+    config = type('BudgetConfig', (TestConfig,), {
+        'OPENAI_BASE_URL': fake_openai.base_url,
+        'AI_TOKEN_BUDGETS': {**TestConfig.AI_TOKEN_BUDGETS, 'contributor': 400},
+        'AI_CONTEXT_CHUNK_TOKENS': 300
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Busy")])
+        db.session.commit()
+        task, _ = task_service.create_task(1, "Task")
+        for i in range(200):
+            task_service.create_work_log(task.id, 1, history(1)[0] + f" #{i}", 1.0)
+
+        result, status = ai_service.generate_contributor_summary(1)
+        assert status == 200
+        assert result['summary'] == "Hello from the model."
+
+        final = fake_openai.requests[-1]['messages'][-1]['content']
+        assert count_tokens(final) <= 400 + count_tokens("Analyze contributor impact:\n\n")
+        assert len(fake_openai.requests) > 2 # map calls, then the report itself
+        db.drop_all()
+
+def test_mocked_reports_do_not_condense_history_they_never_send(fake_openai):
+    config = type('BudgetConfig', (TestConfig,), {
+        'OPENAI_BASE_URL': fake_openai.base_url,
+        'AI_TOKEN_BUDGETS': {key: 50 for key in TestConfig.AI_TOKEN_BUDGETS},
+        'AI_CONTEXT_CHUNK_TOKENS': 30
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Busy")])
+        db.session.commit()
+        task, _ = task_service.create_task(1, "Task", 1)
+        for i in range(50):
+            task_service.create_work_log(task.id, 1, history(1)[0] + f" #{i}", 1.0)
+
+        assert ai_service.generate_handover_report(1, preview=True)[0]['open_task_count'] == 1
+        assert ai_service.generate_handover_report(1)[1] == 200
+        assert ai_service.build_project_evolution_summary(1, 'weekly')[0]['status'] == 'SUCCESS'
+        assert fake_openai.requests == []
+        db.drop_all()
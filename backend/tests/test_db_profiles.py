@@ -0,0 +1,48 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from app import create_app, db, db_profiles
+from app.config import Config
+
+class TestConfig(Config):
+    TESTING = True
+
+def configured(uri, profile='auto', **extra):
+    app = Flask(__name__)
+    app.config.from_object(TestConfig)
+    app.config.update(SQLALCHEMY_DATABASE_URI=uri, DB_PROFILE=profile, **extra)
+    db_profiles.configure_engine_options(app)
+    return app.config
+
+def test_auto_profile_follows_the_database_url():
+    assert configured('sqlite:///x.db')['DB_PROFILE_RESOLVED'] == 'sqlite'
+    server = configured('postgresql://u:p@db/nexus')
+    assert server['DB_PROFILE_RESOLVED'] == 'server'
+    assert server['SQLALCHEMY_ENGINE_OPTIONS'] == {
+        'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30, 'pool_recycle': 1800, 'pool_pre_ping': True
+    }
+
+def test_explicit_engine_options_win():
+    config = configured('postgresql://u:p@db/nexus', SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 2})
+    assert config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 2
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        configured('sqlite:///x.db', profile='turbo')
+
+@pytest.mark.parametrize("profile, expected", [
+    ('sqlite', ('wal', 1, 1, 5000)),
+    ('default', ('delete', 2, 0, 5000)), # pysqlite's own 5 s timeout
+])
+def test_sqlite_pragmas_are_set_on_connect(tmp_path, profile, expected):
+    config = type('FileConfig', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'profile.db'}", 'DB_PROFILE': profile
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        pragmas = tuple(
+            db.session.execute(text(f"PRAGMA {name}")).scalar()
+            for name in ('journal_mode', 'synchronous', 'foreign_keys', 'busy_timeout')
+        )
+        db.engine.dispose()
+    assert pragmas == expected
@@ -0,0 +1,125 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app import create_app, db
+from app.config import Config
+from app.models import EventArchive, Project, SystemEvent, User
+from app.services import event_service, event_store
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    EVENT_HOT_DAYS = 30
+    EVENT_ARCHIVE_BLOCK_ROWS = 10
+
+NOW = datetime(2026, 6, 15)
+ADMIN = {'X-User-ID': '1'}
+
+@pytest.fixture
+def app(tmp_path):
+    TestConfig.EVENT_ARCHIVE_PATH = str(tmp_path)
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Admin", email="admin@test.com", role="Admin")] + [Project(name=f"P{i}") for i in range(3)])
+        db.session.commit()
+        # Every 12 hours from January to mid-June
+        start = datetime(2026, 1, 1)
+        db.session.execute(insert(SystemEvent), [
+            {"event_type": "TASK_UPDATED", "description": f"Event {i}", "project_id": i % 3 + 1, "timestamp": start + timedelta(hours=12 * i),
+             "metadata_json": {"n": i}}
+            for i in range(330)
+        ])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def all_events(**kwargs):
+    return event_store.query_events(limit=10000, **kwargs)
+
+def test_compaction_moves_whole_old_months_to_archives(app, tmp_path):
+    before = all_events()
+    archives = event_store.compact(now=NOW)
+    assert [a['partition'] for a in archives] == ['2026-01', '2026-02', '2026-03', '2026-04']
+    assert sum(a['row_count'] for a in archives) == 31 * 2 + 28 * 2 + 31 * 2 + 30 * 2
+    assert SystemEvent.query.filter(SystemEvent.timestamp < datetime(2026, 5, 1)).count() == 0
+    assert sorted(os.listdir(tmp_path)) == sorted(a['path'] for a in archives)
+    # The audit trail is unchanged, archived rows keep their ids and metadata
+    assert all_events() == before
+    assert event_store.compact(now=NOW) == []
+
+def test_archive_blocks_are_independent_gzip_members(app, tmp_path):
+    event_store.compact(now=NOW)
+    archive = EventArchive.query.filter_by(partition='2026-02').one()
+    assert len(archive.block_index) == 6 # 56 rows in blocks of 10
+    ts, offset = archive.block_index[3]
+    with open(tmp_path / archive.path, 'rb') as f:
+        f.seek(offset)
+        block = gzip.decompress(f.read(archive.block_index[4][1] - offset)).decode().splitlines()
+    assert len(block) == 10 and event_store.from_line(block[0])['timestamp'].isoformat() == ts
+
+def test_range_reads_only_overlapping_partitions_and_blocks(app, monkeypatch):
+    event_store.compact(now=NOW)
+    opened, decompressed = [], []
+    read_archive, decompress = event_store.read_archive, gzip.decompress
+    monkeypatch.setattr(event_store, 'read_archive', lambda archive, *a, **k: opened.append(archive.partition) or read_archive(archive, *a, **k))
+    monkeypatch.setattr(event_store.gzip, 'decompress', lambda data: decompressed.append(len(data)) or decompress(data))
+
+    since, until = datetime(2026, 2, 10), datetime(2026, 2, 12)
+    events = all_events(since=since, until=until)
+    assert [e['timestamp'] for e in events] == [until - timedelta(hours=12 * i) for i in range(1, 5)]
+    assert opened == ['2026-02'] and len(decompressed) <= 2
+
+def test_newest_events_come_from_the_hot_table(app, monkeypatch):
+    event_store.compact(now=NOW)
+    monkeypatch.setattr(event_store, 'read_archive', None) # Any archive read would fail
+    events = event_store.query_events(limit=50)
+    assert len(events) == 50 and events[0]['description'] == "Event 329"
+
+def test_late_events_are_archived_by_the_next_compaction(app):
+    event_store.compact(now=NOW)
+    event_service.record_event('USER_EXIT', "Late arrival")
+    late = SystemEvent.query.filter_by(description="Late arrival").one()
+    late.timestamp = datetime(2026, 2, 3)
+    db.session.commit()
+    assert late.id > 330 # Ids are never reused across the hot table and the archives
+    event_service.record_event('USER_EXIT', "Newest") # The newest event always stays hot
+
+    assert [a['partition'] for a in event_store.compact(now=NOW)] == ['2026-02']
+    february = all_events(since=datetime(2026, 2, 3), until=datetime(2026, 2, 4))
+    assert [e['description'] for e in february] == ["Event 67", "Late arrival", "Event 66"]
+
+def test_events_endpoint_spans_partitions(app):
+    event_store.compact(now=NOW)
+    client = app.test_client()
+    res = client.get('/api/events', query_string={"since": "2026-04-30T00:00:00", "until": "2026-05-01T12:00:00"}, headers=ADMIN)
+    assert [e['description'] for e in res.json['items']] == ["Event 240", "Event 239", "Event 238"]
+    assert res.json['items'][0]['metadata'] == {"n": 240}
+    assert len(client.get('/api/events', headers=ADMIN).json['items']) == 50
+    assert client.get('/api/events', query_string={"since": "yesterday"}, headers=ADMIN).status_code == 400
+    assert client.get('/api/stats/events').json['archived_rows'] == 240
+
+def test_failed_catalog_write_keeps_rows_hot(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(event_store, 'insert', lambda table: (_ for _ in ()).throw(RuntimeError("disk full")))
+    with pytest.raises(RuntimeError):
+        event_store.compact(now=NOW)
+    assert SystemEvent.query.count() == 330 and os.listdir(tmp_path) == []
+
+def test_events_filter_and_page_across_partitions(app):
+    event_store.compact(now=NOW)
+    client = app.test_client()
+    seen, cursor = [], None
+    while True:
+        params = {"project_id": 2, "since": "2026-04-20T00:00:00", "until": "2026-05-10T00:00:00", "limit": 7}
+        res = client.get('/api/events', query_string={**params, **({"cursor": cursor} if cursor else {})}, headers=ADMIN).json
+        seen += res['items']
+        cursor = res['next_cursor']
+        if not cursor:
+            break
+    expected = [e for e in all_events(since=datetime(2026, 4, 20), until=datetime(2026, 5, 10)) if e['project_id'] == 2]
+    assert [e['id'] for e in seen] == [e['id'] for e in expected]
+    assert {e['timestamp'][:7] for e in seen} == {'2026-04', '2026-05'} # Archived and hot rows
+    assert {e['project_id'] for e in seen} == {2}
+    assert client.get('/api/events', query_string={"type": "USER_EXIT"}, headers=ADMIN).json['items'] == []
+    assert client.get('/api/events', query_string={"cursor": "garbage"}, headers=ADMIN).status_code == 400
@@ -0,0 +1,113 @@
+import json
+import threading
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.config import Config
+from app.models import Project, SystemEvent
+from app.services import event_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    EVENT_BATCH_SIZE = 3
+    EVENT_FLUSH_INTERVAL_SECONDS = 3600
+
+@pytest.fixture
+def app(tmp_path):
+    TestConfig.EVENT_SPILL_PATH = str(tmp_path / 'spill.jsonl')
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        yield app
+        db.drop_all()
+
+def test_event_joins_callers_transaction(app):
+    writer = app.extensions['event_writer']
+    db.session.add(Project(name="Rolled back"))
+    event_service.record_event('PROJECT_CREATED', "joined")
+    assert writer.buffer == []
+
+    db.session.rollback()
+    assert SystemEvent.query.count() == 0
+
+def test_events_outside_a_transaction_are_flushed_in_batches(app):
+    writer = app.extensions['event_writer']
+    event_service.record_event('AI_GENERATION', "one")
+    event_service.record_event('AI_GENERATION', "two")
+    assert len(writer.buffer) == 2
+    assert SystemEvent.query.count() == 0
+
+    event_service.record_event('AI_GENERATION', "three")
+    assert writer.buffer == []
+    assert SystemEvent.query.count() == 3
+
+def test_shutdown_flushes_buffer(app):
+    event_service.record_event('AI_GENERATION', "pending")
+    app.extensions['event_writer'].close()
+    assert SystemEvent.query.count() == 1
+
+def test_events_that_cannot_be_written_at_shutdown_are_replayed(app, monkeypatch):
+    writer = app.extensions['event_writer']
+    event_service.record_event('AI_GENERATION', "survivor")
+
+    def database_down(rows):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(writer, 'write', database_down)
+    writer.close()
+    assert SystemEvent.query.count() == 0
+
+    restarted = event_service.EventWriter(app)
+    restarted.flush()
+    assert [e.description for e in SystemEvent.query.all()] == ["survivor"]
+
+def test_due_check_waits_for_a_flush_in_progress(app):
+    writer = app.extensions['event_writer']
+    event_service.record_event('AI_GENERATION', "buffered")
+    due = []
+    with writer.lock: # As flush() holds it while it empties the buffer
+        writer.buffer, writer.oldest = [], None
+        checker = threading.Thread(target=lambda: due.append(writer.is_due()))
+        checker.start()
+        checker.join(0.1)
+        assert checker.is_alive()
+    checker.join()
+    assert due == [False]
+
+def bad_row():
+    return {**event_service.build_event('AI_GENERATION', "poison"), "event_type": None}
+
+def test_a_rejected_row_is_dead_lettered_and_the_rest_written(app, tmp_path):
+    writer = app.extensions['event_writer']
+    writer.dead_letter_path = str(tmp_path / 'dead.jsonl')
+    event_service.record_event('AI_GENERATION', "before")
+    writer.record(bad_row()) # Fills the batch of 3: the flush must not raise into the caller
+    event_service.record_event('AI_GENERATION', "after")
+    assert writer.buffer == [] # Not put back to block the next batches
+    assert [e.description for e in SystemEvent.query.order_by(SystemEvent.id)] == ["before", "after"]
+    dead = [json.loads(line) for line in open(tmp_path / 'dead.jsonl')]
+    assert len(dead) == 1 and dead[0]['event']['description'] == "poison" and 'NOT NULL' in dead[0]['error']
+
+def test_unavailable_database_keeps_rows_buffered_without_raising(app, monkeypatch):
+    writer = app.extensions['event_writer']
+
+    def database_locked(rows):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+    monkeypatch.setattr(writer, 'write', database_locked)
+    for i in range(4):
+        event_service.record_event('AI_GENERATION', f"held {i}")
+    assert len(writer.buffer) == 4
+    monkeypatch.undo()
+    writer.flush()
+    assert SystemEvent.query.count() == 4
+
+def test_a_spilled_poison_row_does_not_stop_the_next_start(app, tmp_path):
+    with open(TestConfig.EVENT_SPILL_PATH, 'w') as f:
+        f.write(event_service.to_json(bad_row()) + '\n')
+        f.write(event_service.to_json(event_service.build_event('AI_GENERATION', "replayed")) + '\n')
+        f.write('{"truncated\n')
+    config = type('RestartConfig', (TestConfig,), {'EVENT_DEAD_LETTER_PATH': str(tmp_path / 'dead.jsonl')})
+    restarted = create_app(config_class=config)
+    with restarted.app_context():
+        restarted.extensions['event_writer'].flush_if_due()
+        assert [e.description for e in SystemEvent.query.all()] == ["replayed"]
+    assert len(open(tmp_path / 'dead.jsonl').readlines()) == 2
@@ -0,0 +1,138 @@
+import time
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.config import Config
+from app.models import Project, User, Job, AISummary
+from app.services import job_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    JOB_RETRY_BACKOFF_SECONDS = 0
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add(User(name="Admin", email="admin@test.com", role="Admin"))
+        db.session.add(Project(name="Queued"))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def test_handover_is_enqueued_and_produced_by_worker(app):
+    client = app.test_client()
+    with app.app_context():
+        res = client.post('/api/users/1/handover', headers={'X-User-ID': '1'})
+        assert res.status_code == 202
+        job_id = res.json['job_id']
+        assert client.get(f'/api/jobs/{job_id}').json['status'] == 'QUEUED'
+
+        job_service.run_pending()
+
+        job = client.get(f'/api/jobs/{job_id}').json
+        assert job['status'] == 'SUCCEEDED'
+        assert AISummary.query.filter_by(user_id=1, summary_type='HANDOVER').count() == 1
+        assert job['result']['summary']
+
+def test_failed_job_is_retried_then_marked_failed(app, monkeypatch):
+    calls = []
+    def flaky(payload):
+        calls.append(payload)
+        raise RuntimeError("provider down")
+    monkeypatch.setitem(job_service.JOB_HANDLERS, 'PROJECT_SUMMARY', flaky)
+
+    with app.app_context():
+        job = job_service.enqueue('PROJECT_SUMMARY', {"project_id": 1})
+        for _ in range(app.config['JOB_MAX_ATTEMPTS']):
+            job_service.run_pending()
+
+        job = db.session.get(Job, job.id)
+        assert len(calls) == app.config['JOB_MAX_ATTEMPTS']
+        assert job.status == 'FAILED'
+        assert "provider down" in job.error
+
+def test_client_errors_are_not_retried(app):
+    with app.app_context():
+        job = job_service.enqueue('PROJECT_SUMMARY', {"project_id": 999})
+        job_service.run_pending()
+        job = db.session.get(Job, job.id)
+        assert (job.status, job.attempts) == ('FAILED', 1)
+
+def test_job_abandoned_by_dead_worker_is_picked_up_again(app):
+    with app.app_context():
+        job = job_service.enqueue('PROJECT_SUMMARY', {"project_id": 1})
+        job.status = 'RUNNING'
+        job.locked_by = 'worker-that-died'
+        job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LEASE_SECONDS'] + 1)
+        db.session.commit()
+
+        job_service.run_pending()
+        assert db.session.get(Job, job.id).status == 'SUCCEEDED'
+
+def test_worker_pool_drains_queue(tmp_path):
+    class PoolConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'jobs.db'}"
+
+    app = create_app(config_class=PoolConfig)
+    with app.app_context():
+        db.session.add(Project(name="Pooled"))
+        db.session.commit()
+        job_ids = [job_service.enqueue('PROJECT_SUMMARY', {"project_id": 1, "report_type": t}).id
+                   for t in ('daily', 'weekly', 'contributor_impact')]
+
+    pool = job_service.JobWorkerPool(app, workers=2, poll_interval=0.05)
+    pool.start()
+    try:
+        deadline = time.time() + 10
+        with app.app_context():
+            while time.time() < deadline:
+                db.session.expire_all()
+                if Job.query.filter(Job.id.in_(job_ids), Job.status == 'SUCCEEDED').count() == len(job_ids):
+                    break
+                time.sleep(0.05)
+            assert Job.query.filter_by(status='SUCCEEDED').count() == len(job_ids)
+    finally:
+        pool.stop(timeout=5)
+
+def test_job_that_keeps_killing_its_worker_is_failed_not_reclaimed(app):
+    with app.app_context():
+        job = job_service.enqueue('PROJECT_SUMMARY', {"project_id": 1})
+        job.status, job.locked_by, job.attempts = 'RUNNING', 'worker-that-died', job.max_attempts
+        job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LEASE_SECONDS'] + 1)
+        db.session.commit()
+
+        assert job_service.run_pending() == []
+        job = db.session.get(Job, job.id)
+        assert (job.status, job.attempts, job.locked_by) == ('FAILED', job.max_attempts, None)
+
+def test_lease_is_renewed_while_running_and_only_the_holder_records_the_outcome(tmp_path, monkeypatch):
+    class LeaseConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'lease.db'}"
+        JOB_LEASE_SECONDS = 0.3
+
+    app = create_app(config_class=LeaseConfig)
+    stolen = []
+
+    def slow(payload):
+        time.sleep(1) # Several leases long
+        assert job_service.claim_next_job('second-worker') is None # Still held by the first
+        if payload.get('steal'):
+            db.session.execute(Job.__table__.update().where(Job.status == 'RUNNING').values(locked_by='second-worker'))
+            db.session.commit()
+            stolen.append(True)
+        return {"summary": "done"}, 200
+    monkeypatch.setitem(job_service.JOB_HANDLERS, 'PROJECT_SUMMARY', slow)
+
+    with app.app_context():
+        db.session.add(Project(name="Leased"))
+        db.session.commit()
+        kept = job_service.enqueue('PROJECT_SUMMARY', {"project_id": 1})
+        [kept] = job_service.run_pending('first-worker')
+        assert (kept.status, kept.attempts) == ('SUCCEEDED', 1)
+
+        taken = job_service.enqueue('PROJECT_SUMMARY', {"project_id": 1, "steal": True})
+        [taken] = job_service.run_pending('first-worker')
+        assert stolen and (taken.status, taken.locked_by, taken.result) == ('RUNNING', 'second-worker', None)
+        db.drop_all()
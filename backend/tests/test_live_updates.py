@@ -0,0 +1,154 @@
+import json
+import time
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User
+from app.services import decision_service, live_updates, task_service
+from app.services.live_updates import Broker, LocalBackend, SQLiteBusBackend
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    PUSH_QUEUE_SIZE = 5
+    PUSH_HEARTBEAT_SECONDS = 1
+
+ADMIN = {'X-User-ID': '1'}
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([
+            User(name="Admin", email="admin@test.com", role="Admin"), User(name="Dev", email="dev@test.com"),
+            User(name="Other", email="other@test.com"), Project(name="Alpha"), Project(name="Beta")
+        ])
+        db.session.commit()
+        task_service.create_task(1, "Alpha task", 2)
+        task_service.create_task(2, "Beta task", 2)
+        yield app
+        db.drop_all()
+
+def drain(subscription):
+    messages = []
+    while (message := subscription.get(0)) is not None:
+        messages.append((message['event'], message['data']))
+    return messages
+
+def test_writes_reach_the_project_subscribers_after_commit(app):
+    broker = app.extensions['push_broker']
+    alpha, beta = broker.subscribe(1), broker.subscribe(2)
+    task_service.complete_task(1)
+    task_service.update_task(1, user_id=3)
+    task_service.create_work_log(1, 3, "Progress", 2.0, decisions_made="Pivot")
+    task_service.update_task(2, title="Quiet rename") # Not a board event
+    assert drain(alpha) == [
+        ('task_status', {"task_id": 1, "status": "IN_PROGRESS", "previous_status": "TODO"}),
+        ('task_reassigned', {"task_id": 1, "user_id": 3, "previous_user_id": 2}),
+        ('log_created', {"log_id": 1, "task_id": 1, "user_id": 3, "hours_spent": 2.0}),
+        ('decision_created', {"decision_id": 1, "title": "Insight from Task 1", "author_id": 3, "impact_level": "Medium", "task_id": 1}),
+    ]
+    assert drain(beta) == []
+
+def test_moving_a_task_updates_both_boards(app):
+    broker = app.extensions['push_broker']
+    alpha, beta = broker.subscribe(1), broker.subscribe(2)
+    res = app.test_client().patch('/api/tasks/1', json={"status": "IN_PROGRESS", "project_id": 2, "user_id": 3})
+    assert res.status_code == 200
+    moved = ('task_moved', {
+        "task_id": 1, "project_id": 2, "previous_project_id": 1, "title": "Alpha task", "status": "IN_PROGRESS", "user_id": 3
+    })
+    assert drain(alpha) == [moved]
+    assert drain(beta) == [
+        moved,
+        ('task_status', {"task_id": 1, "status": "IN_PROGRESS", "previous_status": "TODO"}),
+        ('task_reassigned', {"task_id": 1, "user_id": 3, "previous_user_id": 2}),
+    ]
+
+def test_rolled_back_writes_are_never_published(app):
+    broker = app.extensions['push_broker']
+    alpha = broker.subscribe(1)
+    task = db.session.get(Task, 1)
+    task.status = 'IN_PROGRESS'
+    live_updates.publish(db.session, 1, live_updates.TASK_STATUS, {"task_id": 1})
+    db.session.rollback()
+    decision_service.create_decision(1, 1, "Kept", "x", "y", "Low")
+    assert [name for name, _ in drain(alpha)] == ['decision_created']
+
+def test_exit_reassignments_are_published(app):
+    broker = app.extensions['push_broker']
+    alpha, beta = broker.subscribe(1), broker.subscribe(2)
+    res = app.test_client().post('/api/users/2/exit/confirm', json={"default_assignee": 3}, headers=ADMIN)
+    assert res.status_code == 200
+    assert drain(alpha) == [('task_reassigned', {"task_id": 1, "user_id": 3, "previous_user_id": 2})]
+    assert drain(beta) == [('task_reassigned', {"task_id": 2, "user_id": 3, "previous_user_id": 2})]
+
+def test_bulk_imports_ask_each_touched_project_to_resync(app):
+    broker = app.extensions['push_broker']
+    alpha, beta = broker.subscribe(1), broker.subscribe(2)
+    client = app.test_client()
+    logs = [{"task_id": task_id, "user_id": 2, "content": "Log", "hours_spent": 1.0} for task_id in (1, 1, 1, 2)]
+    assert client.post('/api/logs/bulk', json=logs).status_code == 201
+    assert drain(alpha) == [('resync', {"project_id": 1, "imported": 3})]
+    assert drain(beta) == [('resync', {"project_id": 2, "imported": 1})]
+
+    tasks = [{"title": f"Imported {i}"} for i in range(20)]
+    assert client.post('/api/tasks/import?project_id=2', json=tasks).status_code == 201
+    assert drain(alpha) == []
+    assert drain(beta) == [('resync', {"project_id": 2, "imported": 20})]
+
+    assert client.post('/api/tasks/import?project_id=1', json=[{"title": ""}]).status_code == 400
+    assert drain(alpha) == []
+
+def test_slow_subscribers_are_bounded_and_told_to_resync(app):
+    broker = app.extensions['push_broker']
+    slow, fast = broker.subscribe(1), broker.subscribe(1)
+    for i in range(12):
+        broker.publish([{"project_id": 1, "event": "task_status", "data": {"n": i}}])
+        assert fast.get(0)['data'] == {"n": i}
+    backlog = drain(slow)
+    assert len(backlog) <= 5 + 1 and backlog[0][0] == 'resync'
+    assert backlog[-1] == ('task_status', {"n": 11})
+    assert broker.stats()['overflows'] == 2 and broker.stats()['subscribers'] == 2
+
+def test_stream_endpoint(app):
+    client = app.test_client()
+    assert client.get('/api/projects/99/updates/stream').status_code == 404
+    res = client.get('/api/projects/1/updates/stream', buffered=False)
+    assert res.mimetype == 'text/event-stream'
+    frames = iter(res.response)
+
+    def frame():
+        name, data = next(frames).decode().strip().split('\n')
+        return name[len('event: '):], json.loads(data[len('data: '):])
+
+    name, ready = frame()
+    assert name == 'ready' and ready['project_id'] == 1 and int(ready['cursor']) > 0
+    assert client.post('/api/tasks/1/complete', json={}).status_code == 200
+    assert frame() == ('task_status', {"task_id": 1, "status": "IN_PROGRESS", "previous_status": "TODO"})
+    assert app.extensions['push_broker'].stats()['subscribers'] == 1
+    res.close()
+    assert app.extensions['push_broker'].stats()['subscribers'] == 0
+
+def test_heartbeat_when_quiet():
+    broker = Broker(LocalBackend(), queue_size=10)
+    stream = broker.listen(broker.subscribe(1), heartbeat=0.01)
+    assert next(stream) == ('ping', {})
+    stream.close()
+    assert broker.stats()['subscribers'] == 0
+
+def test_sqlite_bus_shares_messages_between_workers(tmp_path):
+    path = str(tmp_path / 'bus.db')
+    first = Broker(SQLiteBusBackend(path, poll_interval=0.01), queue_size=10)
+    second = Broker(SQLiteBusBackend(path, poll_interval=0.01), queue_size=10)
+    try:
+        here, there = first.subscribe(1), second.subscribe(1)
+        first.publish([{"project_id": 1, "event": "log_created", "data": {"log_id": 7}}])
+        deadline = time.monotonic() + 5
+        received = []
+        while len(received) < 2 and time.monotonic() < deadline:
+            received += [m for m in (here.get(0.05), there.get(0.05)) if m]
+        assert received == [{"project_id": 1, "event": "log_created", "data": {"log_id": 7}}] * 2
+    finally:
+        first.close()
+        second.close()
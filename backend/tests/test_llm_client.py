@@ -0,0 +1,95 @@
+import threading
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.models import User
+from app.services import ai_service
+from app.services.llm_client import LLMClient, LLMBusyError
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    OPENAI_API_KEY = 'test-key'
+    LLM_RETRY_BACKOFF_SECONDS = 0.001
+    LLM_CIRCUIT_FAILURE_THRESHOLD = 2
+    LLM_CIRCUIT_RESET_SECONDS = 60
+
+@pytest.fixture
+def app(fake_openai):
+    config = type('StubConfig', (TestConfig,), {'OPENAI_BASE_URL': fake_openai.base_url})
+    app = create_app(config_class=config)
+    with app.app_context():
+        db.session.add(User(name="Dev", email="dev@test.com"))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def test_calls_share_one_pooled_connection(app, fake_openai):
+    manager = app.extensions['llm_client']
+    assert manager.chat(MESSAGES) == "Hello from the model."
+    assert manager.chat(MESSAGES) == "Hello from the model."
+    assert ai_service.get_client() is manager.openai()
+    assert len(set(fake_openai.client_ports)) == 1
+
+def test_transient_errors_are_retried(app, fake_openai):
+    fake_openai.error_status, fake_openai.fail_times = 503, 2
+    manager = app.extensions['llm_client']
+    assert manager.chat(MESSAGES) == "Hello from the model."
+
+    stats = manager.stats()
+    assert (stats['calls'], stats['successes'], stats['retries'], stats['failures']) == (1, 1, 2, 0)
+    assert stats['latency_ms']['p50'] is not None
+
+def test_circuit_opens_and_falls_back_without_calling_the_provider(app, fake_openai):
+    fake_openai.error_status = 500
+    manager = app.extensions['llm_client']
+    for _ in range(2):
+        with pytest.raises(Exception):
+            manager.chat(MESSAGES)
+    assert manager.breaker.state == 'OPEN'
+
+    sent = len(fake_openai.requests)
+    result, _ = ai_service.generate_contributor_summary(1)
+    assert result['summary'] == "Error generating contributor analysis."
+    assert len(fake_openai.requests) == sent
+    assert manager.stats()['circuit_rejections'] == 1
+
+def test_half_open_trial_closes_the_circuit(fake_openai):
+    manager = LLMClient(api_key='test-key', base_url=fake_openai.base_url, max_retries=0, failure_threshold=1, reset_seconds=0)
+    fake_openai.error_status, fake_openai.fail_times = 500, 1
+    with pytest.raises(Exception):
+        manager.chat(MESSAGES)
+    assert manager.breaker.state == 'OPEN'
+    assert manager.chat(MESSAGES) == "Hello from the model."
+    assert manager.breaker.state == 'CLOSED'
+    manager.close()
+
+def test_client_errors_do_not_trip_the_circuit(app, fake_openai):
+    fake_openai.error_status = 400
+    manager = app.extensions['llm_client']
+    for _ in range(3):
+        with pytest.raises(Exception):
+            manager.chat(MESSAGES)
+    assert manager.breaker.state == 'CLOSED'
+    assert manager.stats()['errors'] == {"BadRequestError": 3}
+
+def test_concurrency_limit_holds_a_slot_for_the_whole_stream(fake_openai):
+    manager = LLMClient(api_key='test-key', base_url=fake_openai.base_url, max_concurrency=1, acquire_timeout=0.05)
+    fake_openai.hold = threading.Event()
+    stream = manager.stream_chat(MESSAGES)
+    assert next(stream) == "Hello"
+    with pytest.raises(LLMBusyError):
+        manager.chat(MESSAGES)
+
+    fake_openai.hold.set()
+    assert ''.join(stream) == " from the model."
+    assert manager.chat(MESSAGES) == "Hello from the model."
+    manager.close()
+
+def test_llm_stats_endpoint(app):
+    app.extensions['llm_client'].chat(MESSAGES)
+    stats = app.test_client().get('/api/stats/llm').json
+    assert stats['circuit'] == 'CLOSED'
+    assert stats['successes'] == 1
@@ -0,0 +1,67 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, WorkLog, Decision, User
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def client():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        user = User(name="Writer", email="writer@test.com")
+        project = Project(name="Paged")
+        db.session.add_all([user, project])
+        db.session.commit()
+        task = Task(project_id=project.id, title="Task", user_id=user.id)
+        db.session.add(task)
+        db.session.commit()
+
+        # Several rows share a timestamp so the id tie-breaker is exercised
+        base = datetime(2024, 1, 1)
+        for i in range(25):
+            db.session.add(WorkLog(task_id=task.id, user_id=user.id, content=f"log {i}",
+                                   hours_spent=1, timestamp=base + timedelta(minutes=i // 3)))
+            db.session.add(Decision(project_id=project.id, author_id=user.id, title=f"d {i}",
+                                    explanation="e", reasoning="r", timestamp=base + timedelta(minutes=i // 3)))
+        db.session.commit()
+        yield app.test_client()
+        db.drop_all()
+
+def collect_pages(client, url):
+    ids, cursor = [], None
+    while True:
+        res = client.get(url, query_string={"limit": 7, **({"cursor": cursor} if cursor else {})})
+        assert res.status_code == 200
+        ids += [row['id'] for row in res.json['items']]
+        cursor = res.json['next_cursor']
+        if not cursor:
+            return ids
+
+def test_logs_keyset_pages_cover_every_row_once(client):
+    ids = collect_pages(client, '/api/logs')
+    assert ids == sorted(ids)
+    assert len(ids) == 25
+
+def test_decisions_paginate_newest_first(client):
+    ids = collect_pages(client, '/api/decisions')
+    assert len(set(ids)) == 25
+    assert ids == sorted(ids, reverse=True)
+
+def test_stream_and_legacy_modes_return_full_list(client):
+    streamed = client.get('/api/logs?stream=true')
+    assert streamed.mimetype == 'application/json'
+    assert len(json.loads(streamed.get_data(as_text=True))) == 25
+
+    legacy = client.get('/api/decisions?all=true')
+    assert isinstance(legacy.json, list)
+    assert len(legacy.json) == 25
+
+def test_malformed_cursor_is_rejected(client):
+    res = client.get('/api/tasks?cursor=not-a-cursor')
+    assert res.status_code == 400
+    assert res.json['error'] == 'InvalidCursor'
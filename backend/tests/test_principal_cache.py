@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User, Project, ProjectMember
+from app.services import task_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+ADMIN = {'X-User-ID': '1'}
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([
+            User(name="Admin", email="admin@test.com", role="Admin"),
+            User(name="Member", email="member@test.com"),
+            User(name="Stayer", email="stay@test.com"),
+            Project(name="Alpha")
+        ])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+@pytest.fixture
+def user_lookups(app):
+    lookups = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'FROM user' in statement:
+            lookups.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield lookups
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+def principal_stats(client):
+    return client.get('/api/stats/cache').json['principal']
+
+def test_repeated_requests_resolve_the_principal_once(app, user_lookups):
+    client = app.test_client()
+    for _ in range(5):
+        assert client.get('/api/events', headers=ADMIN).status_code == 200
+    assert len(user_lookups) == 1
+    stats = principal_stats(client)
+    assert (stats['hits'], stats['misses']) == (4, 1)
+
+def test_missing_unknown_and_insufficient_principals_are_rejected(app):
+    client = app.test_client()
+    assert client.get('/api/events').status_code == 401
+    assert client.get('/api/events', headers={'X-User-ID': '99'}).status_code == 403
+    assert client.get('/api/events', headers={'X-User-ID': 'abc'}).status_code == 403
+    assert client.get('/api/events', headers={'X-User-ID': '2'}).status_code == 403
+
+def test_role_change_takes_effect_immediately(app):
+    client = app.test_client()
+    assert client.get('/api/events', headers={'X-User-ID': '2'}).status_code == 403
+    db.session.get(User, 2).role = 'Admin'
+    db.session.commit()
+    assert client.get('/api/events', headers={'X-User-ID': '2'}).status_code == 200
+    db.session.get(User, 2).role = 'Member'
+    db.session.flush()
+    db.session.rollback() # Changes that never commit keep the cached entry
+    assert app.extensions['principal_cache'].get(2).role == 'Admin'
+
+def test_status_change_and_exit_invalidate_the_entry(app):
+    client = app.test_client()
+    client.get('/api/events', headers={'X-User-ID': '2'})
+    assert app.extensions['principal_cache'].get(2).status == 'Active'
+
+    client.patch('/api/users/2/status', json={'status': 'Inactive'})
+    assert app.extensions['principal_cache'].get(2) is None
+
+    task_service.create_task(1, "Open", 3)
+    client.get('/api/events', headers={'X-User-ID': '3'})
+    res = client.post('/api/users/3/exit/confirm', json={"default_assignee": 1}, headers=ADMIN)
+    assert res.status_code == 200
+    assert app.extensions['principal_cache'].get(3) is None
+
+def test_handlers_use_the_resolved_principal(app, user_lookups):
+    client = app.test_client()
+    res = client.post('/api/projects', json={"name": "Beta"}, headers=ADMIN)
+    assert res.status_code == 201
+    assert len(user_lookups) == 1
+    assert [(m.user_id, m.role_in_project) for m in ProjectMember.query.filter_by(project_id=res.json['id'])] == [(1, 'Lead')]
@@ -0,0 +1,51 @@
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User
+from app.services import task_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add(User(name="Dev", email="dev@test.com"))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def test_counters_follow_status_transitions(app):
+    with app.app_context():
+        p = Project(name="Counted")
+        db.session.add(p)
+        db.session.commit()
+
+        tasks = [task_service.create_task(p.id, f"Task {i}")[0] for i in range(4)]
+        task_service.complete_task(tasks[0].id)                 # TODO -> IN_PROGRESS
+        task_service.create_work_log(tasks[1].id, 1, "Work", 2.0)
+        for _ in range(3):
+            task_service.complete_task(tasks[1].id)             # -> DONE
+        task_service.update_task(tasks[2].id, status='IN_PROGRESS')
+        task_service.update_task(tasks[2].id, status='TODO')
+
+        project = db.session.get(Project, p.id)
+        assert (project.tasks_total, project.tasks_todo, project.tasks_in_progress, project.tasks_done) == (4, 2, 1, 1)
+        assert project.completion_percentage == pytest.approx((1 + 0.5) / 4 * 100)
+        assert task_service.reconcile_project_counters(p.id) == []
+
+def test_reconcile_detects_and_repairs_drift(app):
+    with app.app_context():
+        p = Project(name="Drifted")
+        db.session.add(p)
+        db.session.commit()
+        task_service.create_task(p.id, "Task")
+
+        db.session.execute(Project.__table__.update().values(tasks_total=10, tasks_todo=0))
+        db.session.commit()
+
+        mismatches = task_service.reconcile_project_counters(p.id, repair=True)
+        assert mismatches[0]['expected']['tasks_total'] == 1
+        assert task_service.reconcile_project_counters(p.id) == []
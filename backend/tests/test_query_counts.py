@@ -0,0 +1,68 @@
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, WorkLog, Decision, User, ProjectMember
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+LIST_ENDPOINTS = [
+    '/api/users',
+    '/api/projects',
+    '/api/projects/1/members',
+    '/api/tasks?all=true',
+    '/api/tasks?project_id=1',
+    '/api/logs?all=true',
+    '/api/decisions?all=true',
+    '/api/decisions?project_id=1',
+]
+
+def seed(rows):
+    project = Project(name="Counted")
+    db.session.add(project)
+    db.session.commit()
+    for i in range(rows):
+        user = User(name=f"User {i}", email=f"user{i}@test.com")
+        other = Project(name=f"Side {i}")
+        db.session.add_all([user, other])
+        db.session.flush()
+        db.session.add_all([
+            ProjectMember(project_id=project.id, user_id=user.id),
+            ProjectMember(project_id=other.id, user_id=user.id),
+        ])
+        task = Task(project_id=project.id, title=f"Task {i}", user_id=user.id)
+        db.session.add(task)
+        db.session.flush()
+        db.session.add(WorkLog(task_id=task.id, user_id=user.id, content="Work", hours_spent=1))
+        db.session.add(Decision(project_id=project.id, author_id=user.id, title=f"D {i}", explanation="e", reasoning="r"))
+    db.session.commit()
+
+@contextmanager
+def count_statements():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def statements_per_endpoint(rows):
+    app = create_app(config_class=TestConfig)
+    client = app.test_client()
+    counts = {}
+    with app.app_context():
+        seed(rows)
+        for url in LIST_ENDPOINTS:
+            with count_statements() as statements:
+                assert client.get(url).status_code == 200
+            counts[url] = len(statements)
+        db.drop_all()
+    return counts
+
+def test_list_endpoints_issue_constant_statements():
+    assert statements_per_endpoint(2) == statements_per_endpoint(20)
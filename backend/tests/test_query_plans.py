@@ -0,0 +1,62 @@
+import re
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.config import Config
+from app.models import Task, WorkLog, Decision, SystemEvent, AISummary, ProjectMember
+from app.pagination import apply_keyset
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        yield app
+        db.drop_all()
+
+SINCE = datetime(2024, 1, 1)
+
+# The filters and orderings used by routes.py, task_service and ai_service
+HOT_QUERIES = {
+    "tasks by project (keyset)": lambda: apply_keyset(Task.query.filter_by(project_id=1), Task.created_at, Task.id).limit(100),
+    "tasks list (keyset)": lambda: apply_keyset(Task.query, Task.created_at, Task.id).limit(100),
+    "project done count": lambda: Task.query.filter_by(project_id=1, status='DONE'),
+    "open tasks of user": lambda: Task.query.filter_by(user_id=1).filter(Task.status != 'DONE'),
+    "user done count": lambda: Task.query.filter_by(user_id=1, status='DONE'),
+    "logs by task (keyset)": lambda: apply_keyset(WorkLog.query.filter_by(task_id=1), WorkLog.timestamp, WorkLog.id).limit(100),
+    "logs list (keyset)": lambda: apply_keyset(WorkLog.query, WorkLog.timestamp, WorkLog.id).limit(100),
+    "recent logs of user": lambda: WorkLog.query.filter_by(user_id=1).order_by(WorkLog.timestamp.desc()).limit(10),
+    "project logs in window": lambda: WorkLog.query.join(Task).filter(Task.project_id == 1, WorkLog.timestamp >= SINCE),
+    "milestone hours": lambda: db.session.query(db.func.sum(WorkLog.hours_spent)).join(Task).filter(Task.milestone_id == 1),
+    "decisions by project (keyset)": lambda: apply_keyset(Decision.query.filter_by(project_id=1), Decision.timestamp, Decision.id, descending=True).limit(100),
+    "decisions list (keyset)": lambda: apply_keyset(Decision.query, Decision.timestamp, Decision.id, descending=True).limit(100),
+    "project decisions in window": lambda: Decision.query.filter(Decision.project_id == 1, Decision.timestamp >= SINCE),
+    "decisions of author": lambda: Decision.query.filter_by(author_id=1).order_by(Decision.timestamp.desc()).limit(5),
+    "latest events": lambda: SystemEvent.query.order_by(SystemEvent.timestamp.desc()).limit(50),
+    "cached summary lookup": lambda: AISummary.query.filter_by(project_id=1, summary_type='DAILY', context_hash='x', status='SUCCESS'),
+    "project members": lambda: ProjectMember.query.filter_by(project_id=1),
+    "membership check": lambda: ProjectMember.query.filter_by(project_id=1, user_id=1),
+}
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+def query_plan(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = tuple(
+        str(value) if isinstance(value, datetime) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(app, name):
+    with app.app_context():
+        plan = query_plan(HOT_QUERIES[name]())
+        scans = [line for line in plan if FULL_SCAN.match(line)]
+        sorts = [line for line in plan if 'TEMP B-TREE' in line]
+        assert not scans, f"{name} falls back to a full table scan: {plan}"
+        assert not sorts, f"{name} sorts outside an index: {plan}"
@@ -0,0 +1,126 @@
+import sqlite3
+import time
+import pytest
+from flask import current_app
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.db_routing import read_replica, reset_routing
+from app.models import User
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    READ_YOUR_WRITES_SECONDS = 0.5
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+@pytest.fixture
+def app(paths):
+    primary, replica = paths
+    config = type('ReplicaConfig', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{primary}", 'DATABASE_READ_URL': f"sqlite:///{replica}"
+    })
+    app = create_app(config_class=config)
+    with app.app_context():
+        db.session.add_all([User(name="Admin", email="admin@test.com", role='Admin'), User(name="Dev", email="dev@test.com")])
+        db.session.commit()
+        replicate(paths)
+        yield app
+        db.drop_all()
+        app.extensions['read_router'].engine.dispose()
+
+def replicate(paths):
+    """Stand-in for replication: copies the primary's committed state to the replica file."""
+    primary, replica = paths
+    source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+    source.backup(target)
+    source.close()
+    target.close()
+    current_app.extensions['read_router'].engine.dispose()
+
+@pytest.fixture
+def statements(app):
+    counts = {'primary': 0, 'replica': 0}
+    listeners = []
+    for name, engine in (('primary', db.engines[None]), ('replica', current_app.extensions['read_router'].engine)):
+        def count(conn, cursor, statement, parameters, context, executemany, name=name):
+            counts[name] += 1
+        event.listen(engine, 'before_cursor_execute', count)
+        listeners.append((engine, count))
+    yield counts
+    for engine, count in listeners:
+        event.remove(engine, 'before_cursor_execute', count)
+
+def names(response):
+    return sorted(u['name'] for u in response.get_json())
+
+def test_get_requests_read_from_the_replica(app, statements):
+    response = app.test_client().get('/api/projects')
+    assert response.status_code == 200
+    assert statements['replica'] > 0 and statements['primary'] == 0
+
+def test_writes_go_to_the_primary(app, statements):
+    response = app.test_client().post('/api/users', json={"name": "New", "email": "new@test.com"})
+    assert response.status_code == 201
+    assert statements['primary'] > 0 and statements['replica'] == 0
+
+def test_lagging_replica_is_read_by_other_clients_until_it_catches_up(app, paths):
+    writer = app.test_client()
+    writer.post('/api/users', json={"name": "New", "email": "new@test.com"}, headers={'X-User-ID': '1'})
+
+    other = app.test_client()
+    assert names(other.get('/api/users', headers={'X-User-ID': '2'})) == ['Admin', 'Dev']
+    replicate(paths)
+    assert names(other.get('/api/users', headers={'X-User-ID': '2'})) == ['Admin', 'Dev', 'New']
+
+def test_writer_reads_its_own_writes_during_the_window(app):
+    writer = app.test_client()
+    writer.post('/api/users', json={"name": "New", "email": "new@test.com"}, headers={'X-User-ID': '1'})
+    assert names(writer.get('/api/users', headers={'X-User-ID': '1'})) == ['Admin', 'Dev', 'New']
+
+    # A new client with the same identity (e.g. another tab) is pinned too; the cookie covers other workers
+    assert names(app.test_client().get('/api/users', headers={'X-User-ID': '1'})) == ['Admin', 'Dev', 'New']
+
+    time.sleep(0.6)
+    assert names(writer.get('/api/users', headers={'X-User-ID': '1'})) == ['Admin', 'Dev']
+    assert app.extensions['read_router'].stats()['sticky_requests'] == 2
+
+def test_cookie_pins_reads_without_the_in_process_marker(app):
+    writer = app.test_client()
+    writer.post('/api/users', json={"name": "New", "email": "new@test.com"}, headers={'X-User-ID': '1'})
+    app.extensions['read_router'].recent_writers.invalidate(lambda key: True) # As seen by another worker
+    assert names(writer.get('/api/users', headers={'X-User-ID': '1'})) == ['Admin', 'Dev', 'New']
+
+def test_session_stays_on_the_primary_after_writing(app):
+    with read_replica():
+        db.session.add(User(name="New", email="new@test.com"))
+        db.session.commit()
+        # Refreshing the committed row must not hit the lagging replica
+        assert db.session.query(User).count() == 3
+    reset_routing(db.session)
+    with read_replica():
+        assert db.session.query(User).count() == 2
+
+def test_pinned_session_ignores_read_replica(app):
+    with db.engines[None].begin() as conn:
+        conn.execute(User.__table__.insert().values(name="New", email="new@test.com"))
+    reset_routing(db.session, pin_primary=True)
+    with read_replica():
+        assert db.session.query(User).count() == 3
+    reset_routing(db.session)
+
+def test_without_replica_everything_uses_the_primary():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        assert app.extensions['read_router'].engine is None
+        with read_replica():
+            db.session.add(User(name="Dev", email="dev@test.com"))
+            db.session.commit()
+            assert db.session.query(User).count() == 1
+        client = app.test_client()
+        assert client.get('/api/stats/db').get_json()['read_routing']['replica_configured'] is False
+        assert 'read_primary_until' not in client.post('/api/users', json={"name": "B", "email": "b@test.com"}).headers.get('Set-Cookie', '')
+        db.drop_all()
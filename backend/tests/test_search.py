@@ -0,0 +1,110 @@
+import time
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User, Decision
+from app.services import task_service, decision_service, search_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Alpha"), Project(name="Beta")])
+        db.session.commit()
+        task_service.create_task(1, "Login page", 1, description="OAuth redirect flow")
+        task_service.create_task(2, "Billing export", 1, description="CSV for finance")
+        task_service.create_work_log(1, 1, "Fixed the token refresh bug in login", 2.0, blockers="Waiting on identity provider")
+        task_service.create_work_log(2, 1, "Exported invoices, login not involved", 1.0)
+        decision_service.create_decision(1, 1, "Adopt OAuth2", "Replace sessions with OAuth2 tokens", "Security review", "High", 1)
+        yield app
+        db.drop_all()
+
+def search(client, **params):
+    res = client.get('/api/search', query_string=params)
+    assert res.status_code == 200, res.json
+    return res.json
+
+def test_matches_across_types_ranked_with_snippets(app):
+    result = search(app.test_client(), q="login")
+    hits = [(item['type'], item['id']) for item in result['items']]
+    assert set(hits) == {('task', 1), ('log', 1), ('log', 2)}
+    assert hits[0] == ('task', 1) # Title matches weigh more
+    assert result['items'][0]['title'] == "**Login** page"
+    log = next(item for item in result['items'] if item['type'] == 'log' and item['id'] == 1)
+    assert "**login**" in log['snippet'] and log['project_id'] == 1
+
+def test_project_and_type_filters(app):
+    client = app.test_client()
+    assert [(i['type'], i['id']) for i in search(client, q="login", project_id=2)['items']] == [('log', 2)]
+    assert [(i['type'], i['id']) for i in search(client, q="oauth", type="decision")['items']] == [('decision', 1)]
+    assert client.get('/api/search', query_string={"q": "login", "type": "email"}).status_code == 400
+    assert client.get('/api/search', query_string={"q": "  !! "}).status_code == 400
+
+def test_stemming_and_prefix(app):
+    client = app.test_client()
+    assert {i['id'] for i in search(client, q="export", type="log")['items']} == {2} # "Exported"
+    assert {i['type'] for i in search(client, q="invo")['items']} == {'log'} # Prefix of the last word
+
+def test_pagination(app):
+    client = app.test_client()
+    first = search(client, q="login", limit=2)
+    assert len(first['items']) == 2 and first['next_offset'] == 2
+    second = search(client, q="login", limit=2, offset=2)
+    assert len(second['items']) == 1 and second['next_offset'] is None
+    assert {(i['type'], i['id']) for i in first['items'] + second['items']} == {('task', 1), ('log', 1), ('log', 2)}
+
+def test_index_follows_updates_deletes_and_rollbacks(app):
+    client = app.test_client()
+    task_service.update_task(2, title="Invoice export")
+    assert ('task', 2) in {(i['type'], i['id']) for i in search(client, q="invoice")['items']}
+
+    db.session.delete(db.session.get(Decision, 1))
+    db.session.commit()
+    assert search(client, q="oauth2", type="decision")['items'] == []
+
+    db.session.add(Task(project_id=1, title="Never committed"))
+    db.session.flush()
+    db.session.rollback()
+    assert search(client, q="committed")['items'] == []
+
+def test_moving_a_task_moves_its_logs(app):
+    task = db.session.get(Task, 1)
+    task.project_id = 2
+    db.session.commit()
+    hits = search(app.test_client(), q="token", project_id=2)['items']
+    assert {(i['type'], i['id']) for i in hits} == {('log', 1)}
+
+def test_bulk_imports_are_indexed(app):
+    client = app.test_client()
+    client.post('/api/logs/bulk', json=[
+        {"task_id": 1, "user_id": 1, "content": "Rotated signing keys", "hours_spent": 1, "decisions_made": "Quarterly key rotation"}
+    ])
+    client.post('/api/tasks/import?project_id=2', json=[{"title": "Reconcile ledgers"}])
+    assert {i['type'] for i in search(client, q="rotation")['items']} >= {'decision'}
+    assert [i['type'] for i in search(client, q="signing")['items']] == ['log']
+    assert [i['type'] for i in search(client, q="ledgers", project_id=2)['items']] == ['task']
+
+def test_rebuild_matches_incremental_index(app):
+    connection = db.session.connection()
+    before = connection.execute(text("SELECT rowid, kind, project, title, body FROM search_index ORDER BY rowid")).all()
+    connection.execute(text("DELETE FROM search_index"))
+    search_service.rebuild(connection)
+    assert connection.execute(text("SELECT rowid, kind, project, title, body FROM search_index ORDER BY rowid")).all() == before
+    db.session.rollback()
+
+def test_large_index_stays_fast(app):
+    connection = db.session.connection()
+    docs = [search_service.document('log', i, i % 50, '', [f"routine update number {i} on module {i % 997}"], None) for i in range(101, 50101)]
+    docs.append(search_service.document('log', 50101, 7, '', ["rare zeppelin incident"], None))
+    search_service.INDEXES['sqlite'].insert(connection, docs)
+    db.session.commit()
+    client = app.test_client()
+    started = time.perf_counter()
+    assert [i['id'] for i in search(client, q="zeppelin", project_id=7)['items']] == [50101]
+    search(client, q="routine update", project_id=3, limit=20)
+    assert time.perf_counter() - started < 0.5
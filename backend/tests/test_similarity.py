@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Task, User, WorkLog
+from app.services import ai_service, decision_service, task_service, search_service, similarity_index
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+DECISIONS = [
+    ("Adopt PostgreSQL", "Move the primary database from SQLite to PostgreSQL", "Concurrent writers and replication"),
+    ("Database migrations", "Schema migrations run at startup against the database", "Keeps PostgreSQL and SQLite in step"),
+    ("Dark mode", "Ship a dark colour theme for the dashboard", "Users asked for a night theme"),
+    ("Theme tokens", "Colours of the dashboard theme come from design tokens", "One place to change the palette"),
+]
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Alpha"), Project(name="Beta")])
+        db.session.commit()
+        task_service.create_task(1, "Database work", 1)
+        task_service.create_task(2, "Frontend work", 1)
+        for i, (title, explanation, reasoning) in enumerate(DECISIONS):
+            decision_service.create_decision(1 if i < 2 else 2, 1, title, explanation, reasoning, "High", 1 if i < 2 else 2)
+        yield app
+        db.drop_all()
+
+def similar(client, **params):
+    res = client.get('/api/similar', query_string=params)
+    assert res.status_code == 200, res.json
+    return res.json['results']
+
+def test_similar_decisions_rank_the_related_one_first(app):
+    results = similar(app.test_client(), type="decision", id="1,3")
+    assert [(r['type'], r['id']) for r in results] == [('decision', 1), ('decision', 3)]
+    assert results[0]['items'][0]['id'] == 2 and results[1]['items'][0]['id'] == 4
+    assert all(item['id'] != source['id'] for source in results for item in source['items']) # Never itself
+    assert results[0]['items'][0]['title'] == "Database migrations" and results[0]['items'][0]['score'] > 0
+
+def test_free_text_and_filters(app):
+    client = app.test_client()
+    items = similar(client, q="dashboard colour palette")[0]['items']
+    assert [i['id'] for i in items[:2]] in ([4, 3], [3, 4])
+    assert {i['project_id'] for i in similar(client, q="database theme", project_id=1)[0]['items']} == {1}
+    assert similar(client, q="database", result_type="log")[0]['items'] == []
+    assert client.get('/api/similar').status_code == 400
+    assert client.get('/api/similar', query_string={"type": "task", "id": "1"}).status_code == 400
+    assert client.get('/api/similar', query_string={"type": "decision", "id": "99"}).status_code == 404
+
+def test_index_follows_commits_but_not_rollbacks(app):
+    client = app.test_client()
+    similar(client, q="database") # Builds the index
+    task_service.create_work_log(1, 1, "Tuned PostgreSQL replication lag on the database", 2.0)
+    items = similar(client, type="decision", id="1", result_type="log")[0]['items']
+    assert [(i['type'], i['id']) for i in items] == [('log', 1)]
+
+    db.session.add(WorkLog(task_id=1, user_id=1, content="PostgreSQL never committed", hours_spent=1))
+    db.session.flush()
+    db.session.rollback()
+    assert similarity_index.get_similarity_index().docs == 5
+
+    client.post('/api/logs/bulk', json=[{"task_id": 2, "user_id": 1, "content": "Dark theme palette tokens", "hours_spent": 1}])
+    assert similar(client, type="decision", id="4", result_type="log")[0]['items'][0]['id'] == 2
+
+def test_index_is_refreshed_once_per_flush_under_its_lock(app, monkeypatch):
+    similar(app.test_client(), q="database")
+    index = similarity_index.get_similarity_index()
+    refreshes = []
+
+    def refresh():
+        assert index.lock._is_owned()
+        refreshes.append(True)
+    monkeypatch.setattr(index, 'refresh', refresh)
+
+    db.session.add_all([WorkLog(task_id=1, user_id=1, content=f"Index log {i}", hours_spent=1) for i in range(20)])
+    db.session.commit()
+    assert len(refreshes) == 1 and index.docs == 24
+
+def test_moving_a_task_moves_its_logs(app):
+    client = app.test_client()
+    task_service.create_work_log(1, 1, "Database vacuum", 1.0)
+    similar(client, q="database")
+    db.session.get(Task, 1).project_id = 2
+    db.session.commit()
+    assert [i['id'] for i in similar(client, q="vacuum", project_id=2)[0]['items']] == [1]
+
+def test_blocked_top_k_matches_brute_force(app, monkeypatch):
+    index = similarity_index.SimilarityIndex(64)
+    rng = np.random.default_rng(7)
+    words = [f"w{i}" for i in range(200)]
+    index.add([search_service.document(
+        'log', i, i % 3, '', [" ".join(rng.choice(words, 12))], None
+    ) for i in range(1, 301)])
+    queries = index.vectorize(["w1 w2 w3 w4", "w150 w151"])
+    monkeypatch.setattr(similarity_index, 'BLOCK_ROWS', 37)
+    hits = index.top_k(queries, 5, project_id=1)
+    scores = queries @ index.vectors[:index.count].T
+    scores[:, index.projects[:index.count] != 1] = -np.inf
+    for query, found in enumerate(hits):
+        expected = np.argsort(-scores[query], kind='stable')[:5]
+        assert [key for key, _ in found] == [int(index.keys[row]) for row in expected]
+
+def test_persisted_index_is_memory_mapped_and_shared(tmp_path):
+    class PersistedConfig(TestConfig):
+        SIMILARITY_INDEX_PATH = str(tmp_path)
+    first = create_app(config_class=PersistedConfig)
+    with first.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Alpha")])
+        db.session.commit()
+        task_service.create_task(1, "Database work", 1)
+        decision_service.create_decision(1, 1, *DECISIONS[0], "High")
+        similar(first.test_client(), q="database")
+        decision_service.create_decision(1, 1, *DECISIONS[1], "High")
+
+        second = similarity_index.SimilarityIndex(first.config['SIMILARITY_DIMENSIONS'], str(tmp_path))
+        assert second.ready and isinstance(second.vectors, np.memmap) and second.docs == 2
+        first_index = similarity_index.get_similarity_index()
+        assert np.array_equal(second.vectors[:2], first_index.vectors[:2])
+
+        # Writes by another process are picked up on the next read
+        second.add([search_service.document('log', 9, 1, '', ["PostgreSQL database failover"], None)])
+        first_index.refresh()
+        assert first_index.docs == 3 and similarity_index.key_of('log', 9) in first_index.rows
+        db.drop_all()
+
+def test_handover_prefers_history_relevant_to_open_tasks(app):
+    task_service.create_task(1, "Finish PostgreSQL migration", 1, description="Cut over the database")
+    task_service.create_work_log(1, 1, "Planned the PostgreSQL migration and database cutover", 1.0)
+    for i in range(12):
+        task_service.create_work_log(2, 1, f"Routine frontend polish {i}", 1.0)
+    context, _ = ai_service.handover_context(db.session.get(User, 1))
+    assert "Planned the PostgreSQL migration" in context
+    assert context.count("Routine frontend polish") == 9
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Milestone, Task, User, StatsRollup
+from app.services import task_service, decision_service, stats_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        yield app
+        db.drop_all()
+
+def snapshot():
+    return {
+        (r.scope, r.scope_id): tuple(getattr(r, c) for c in stats_service.COUNTER_COLUMNS)
+        for r in StatsRollup.query.all()
+    }
+
+def test_rollups_match_rebuild_and_serve_endpoints(app):
+    client = app.test_client()
+    alice = User(name="Alice", email="alice@test.com")
+    bob = User(name="Bob", email="bob@test.com")
+    project = Project(name="Rolled")
+    db.session.add_all([alice, bob, project])
+    db.session.commit()
+    milestone = Milestone(project_id=project.id, title="M1")
+    empty_milestone = Milestone(project_id=project.id, title="M2")
+    db.session.add_all([milestone, empty_milestone])
+    db.session.commit()
+
+    t1, _ = task_service.create_task(project.id, "T1", alice.id)
+    t2, _ = task_service.create_task(project.id, "T2", bob.id)
+    db.session.get(Task, t1.id).milestone_id = milestone.id
+    db.session.commit()
+    task_service.create_work_log(t1.id, alice.id, "Work", 3.0)
+    task_service.create_work_log(t2.id, bob.id, "Work", 1.5, decisions_made="Use rollups")
+    for _ in range(3):
+        task_service.complete_task(t1.id)
+    task_service.update_task(t2.id, user_id=alice.id)
+    decision_service.create_decision(project.id, bob.id, "D", "E", "R", "Low")
+    bob.status = 'Inactive'
+    db.session.commit()
+
+    live = snapshot()
+    with db.engine.begin() as connection:
+        stats_service.rebuild(connection)
+    db.session.expire_all()
+    assert snapshot() == live
+
+    overview = client.get('/api/stats/overview').json
+    assert overview == {"totalTasks": 2, "doneTasks": 1, "totalHours": 4.5, "contributors": 1}
+
+    stats = client.get(f'/api/projects/{project.id}/stats').json
+    assert (stats['totalTasks'], stats['doneTasks'], stats['totalHours']) == (2, 1, 4.5)
+    assert {m['title']: m['hours'] for m in stats['milestones']} == {"M1": 3.0, "M2": 0.0}
+
+    profile = client.get(f'/api/users/{bob.id}/profile').json
+    assert (profile['decisionsMade'], profile['logsCreated'], profile['totalHours']) == (2, 1, 1.5)
+
+def test_project_stats_is_a_single_statement(app):
+    from sqlalchemy import event
+    project = Project(name="One read")
+    db.session.add(project)
+    db.session.commit()
+    db.session.add_all([Milestone(project_id=project.id, title=f"M{i}") for i in range(5)])
+    db.session.commit()
+    project_id = project.id
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result, status = stats_service.project_stats(project_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert status == 200
+    assert len(result['milestones']) == 5
+    assert len(statements) == 1
+
+def test_unknown_project_stats_is_404(app):
+    assert app.test_client().get('/api/projects/42/stats').status_code == 404
+
+def test_deltas_are_one_upsert_that_creates_or_adds(app):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    changes = lambda: {(stats_service.GLOBAL, 0): (None, {'log_count': 1}), (stats_service.PROJECT, 7): (7, {'hours_logged': 2.5})}
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        stats_service.apply_deltas(db.session.connection(), changes()) # Neither row exists yet
+        stats_service.apply_deltas(db.session.connection(), changes()) # As if a concurrent writer created them first
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    db.session.commit()
+    assert len(statements) == 2 and all("ON CONFLICT (scope, scope_id) DO UPDATE" in s for s in statements)
+    rows = {(r.scope, r.scope_id): (r.log_count, r.hours_logged) for r in StatsRollup.query.all()}
+    assert rows == {('GLOBAL', 0): (2, 0.0), ('PROJECT', 7): (0, 5.0)}
@@ -0,0 +1,96 @@
+import json
+import threading
+import pytest
+from app import create_app, db
+from app.config import Config
+from app.models import Project, User, AISummary
+from app.services import task_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    OPENAI_API_KEY = 'test-key'
+
+@pytest.fixture
+def app(fake_openai):
+    config = type('StreamingConfig', (TestConfig,), {'OPENAI_BASE_URL': fake_openai.base_url})
+    app = create_app(config_class=config)
+    with app.app_context():
+        db.session.add_all([
+            User(name="Admin", email="admin@test.com", role="Admin"),
+            User(name="Dev", email="dev@test.com"),
+            Project(name="Streamed")
+        ])
+        db.session.commit()
+        task, _ = task_service.create_task(1, "Task", 2)
+        task_service.create_work_log(task.id, 2, "Initial work", 2.0)
+        yield app
+        db.drop_all()
+
+def parse_events(body):
+    events = []
+    for frame in body.strip().split('\n\n'):
+        name, data = frame.split('\n')
+        events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+def test_project_summary_streams_chunks_then_persists(app, fake_openai):
+    res = app.test_client().get('/api/projects/1/summary/stream?type=weekly')
+    assert res.status_code == 200
+    assert res.mimetype == 'text/event-stream'
+
+    events = parse_events(res.get_data(as_text=True))
+    assert [data['text'] for name, data in events if name == 'chunk'] == fake_openai.tokens
+    name, done = events[-1]
+    assert name == 'done'
+    assert done['summary'] == "Hello from the model."
+
+    stored = db.session.get(AISummary, done['version'])
+    assert (stored.summary_type, stored.status, stored.content) == ('WEEKLY', 'SUCCESS', "Hello from the model.")
+    assert fake_openai.requests[0]['stream'] is True
+
+def test_unchanged_project_replays_without_calling_the_model(app, fake_openai):
+    client = app.test_client()
+    client.get('/api/projects/1/summary/stream').get_data()
+    app.extensions['summary_cache'].entries.clear()
+
+    events = parse_events(client.get('/api/projects/1/summary/stream').get_data(as_text=True))
+    assert len(fake_openai.requests) == 1
+    assert events[0] == ('chunk', {"text": "Hello from the model."})
+    assert events[-1][1]['type'] == "Generated Summary (Cached)"
+
+def test_first_chunk_arrives_before_the_completion_finishes(app, fake_openai):
+    fake_openai.hold = threading.Event()
+    res = app.test_client().get('/api/projects/1/summary/stream', buffered=False)
+    frames = iter(res.response)
+    first = next(frames)
+    first = first.decode() if isinstance(first, bytes) else first
+    assert parse_events(first) == [('chunk', {"text": "Hello"})]
+    assert AISummary.query.count() == 0
+
+    fake_openai.hold.set()
+    rest = ''.join(f.decode() if isinstance(f, bytes) else f for f in frames)
+    assert parse_events(rest)[-1][0] == 'done'
+    res.close()
+
+def test_model_error_is_reported_and_recorded_as_failed(app, fake_openai):
+    fake_openai.error_status = 400
+    events = parse_events(app.test_client().get('/api/projects/1/summary/stream').get_data(as_text=True))
+    name, data = events[-1]
+    assert name == 'error'
+    assert db.session.get(AISummary, data['version']).status == 'FAILED'
+
+def test_handover_stream_requires_admin_and_persists(app, fake_openai):
+    client = app.test_client()
+    assert client.get('/api/users/2/handover/stream').status_code == 401
+
+    res = client.get('/api/users/2/handover/stream', headers={'X-User-ID': '1'})
+    events = parse_events(res.get_data(as_text=True))
+    name, done = events[-1]
+    assert name == 'done'
+    assert done['open_task_count'] == 1
+    stored = db.session.get(AISummary, done['id'])
+    assert (stored.user_id, stored.summary_type, stored.content) == (2, 'HANDOVER', "Hello from the model.")
+
+def test_unknown_project_is_404_not_a_stream(app):
+    assert app.test_client().get('/api/projects/42/summary/stream').status_code == 404
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.cache import TTLCache
+from app.config import Config
+from app.models import Project, User
+from app.services import ai_service, task_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    OPENAI_API_KEY = 'test-key'
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Cached")])
+        db.session.commit()
+        task, _ = task_service.create_task(1, "Task")
+        task_service.create_work_log(task.id, 1, "Initial work", 2.0)
+        yield app
+        db.drop_all()
+
+def count_statements(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+def test_repeated_summary_is_served_without_the_database(app):
+    first, _ = ai_service.generate_project_evolution_summary(1, 'weekly')
+    (second, status), statements = count_statements(lambda: ai_service.generate_project_evolution_summary(1, 'weekly'))
+
+    assert status == 200
+    assert statements == 0
+    assert second['summary'] == first['summary']
+    assert second['type'] == "Generated Summary (Cached)"
+
+def test_work_log_write_invalidates_project_entries(app):
+    cache = app.extensions['summary_cache']
+    ai_service.generate_project_evolution_summary(1, 'daily')
+    assert ai_service.cached_project_summary(1, 'daily') is not None
+
+    task_service.create_work_log(1, 1, "More work", 1.0)
+    assert ai_service.cached_project_summary(1, 'daily') is None
+    assert cache.stats()['invalidations'] == 1
+
+def test_cache_stats_endpoint_reports_counters(app):
+    client = app.test_client()
+    client.post('/api/projects/1/summary', json={"type": "daily"})
+    ai_service.generate_project_evolution_summary(1, 'daily')
+    res = client.post('/api/projects/1/summary', json={"type": "daily"})
+    assert res.status_code == 200
+
+    stats = client.get('/api/stats/cache').json['summary']
+    assert stats['hits'] == 1
+    assert stats['misses'] >= 2
+
+def test_lru_eviction_and_ttl_expiry(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('app.cache.time.monotonic', lambda: clock[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+    clock[0] += 11
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
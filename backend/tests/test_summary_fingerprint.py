@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, User, AISummary
+from app.services import ai_service, task_service, decision_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    OPENAI_API_KEY = 'test-key'
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([User(name="Dev", email="dev@test.com"), Project(name="Watermarked")])
+        db.session.commit()
+        task, _ = task_service.create_task(1, "Task")
+        task_service.create_work_log(task.id, 1, "Initial work", 2.0)
+        yield app
+        db.drop_all()
+
+def build(report_type='daily'):
+    # Skips the in-process L1 cache so every call goes through the fingerprint check
+    return ai_service.build_project_evolution_summary(1, report_type)
+
+def test_unchanged_project_is_answered_from_the_fingerprint(app):
+    first, _ = build()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        second, status = build()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert status == 200
+    assert second['type'] == "Generated Summary (Cached)"
+    assert second['version'] == first['version']
+    # Project lookup, watermarks, AISummary lookup; no work log or decision rows are loaded
+    assert len(statements) == 3
+    assert not any('FROM work_log' in s and 'count' not in s for s in statements)
+
+@pytest.mark.parametrize("change", [
+    lambda: task_service.create_work_log(1, 1, "More work", 1.0),
+    lambda: decision_service.create_decision(1, 1, "D", "E", "R", "Low"),
+    lambda: task_service.update_task(1, title="Renamed"),
+])
+def test_any_source_change_moves_the_fingerprint(app, change):
+    build()
+    change()
+    build()
+    assert AISummary.query.filter_by(project_id=1, summary_type='DAILY').count() == 2
+
+def test_project_without_activity_skips_generation(app):
+    db.session.add(Project(name="Quiet"))
+    db.session.commit()
+    result, status = ai_service.build_project_evolution_summary(2, 'daily')
+    assert status == 200
+    assert result['summary'] == "No significant activity recorded."
@@ -0,0 +1,93 @@
+import json
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import Project, Milestone, Task, User, StatsRollup
+from app.services import task_service, stats_service
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.session.add_all([
+            User(name="Active", email="active@test.com"),
+            User(name="Gone", email="gone@test.com", status='Inactive'),
+            Project(name="Backlog"),
+            Project(name="Closed", status='COMPLETED')
+        ])
+        db.session.commit()
+        db.session.add(Milestone(project_id=1, title="M1"))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def snapshot():
+    return {
+        (r.scope, r.scope_id): tuple(getattr(r, c) for c in stats_service.COUNTER_COLUMNS)
+        for r in StatsRollup.query.all()
+    }
+
+def test_csv_import_validates_each_row(app):
+    body = (
+        "title,user_id,priority,milestone_id,description\n"
+        "Set up CI,1,High,1,Pipelines\n"
+        ",1,Low,,\n"
+        "Assigned to leaver,2,Medium,,\n"
+        "Unknown user,42,,,\n"
+        "Odd priority,,Urgent,,\n"
+        "Unassigned,,,,\n"
+    )
+    res = app.test_client().post('/api/tasks/import?project_id=1', data=body, content_type='text/csv')
+    assert res.status_code == 207
+    assert [r['status'] for r in res.json['results']] == [201, 400, 400, 404, 400, 201]
+
+    ci = db.session.get(Task, res.json['results'][0]['id'])
+    assert (ci.title, ci.user_id, ci.priority, ci.milestone_id, ci.status) == ("Set up CI", 1, "High", 1, "TODO")
+
+def test_jsonl_rows_can_target_their_own_project(app):
+    body = "\n".join(json.dumps(r) for r in [{"title": "A", "project_id": 1}, {"title": "B", "project_id": 2}])
+    res = app.test_client().post('/api/tasks/import', data=body, content_type='application/x-ndjson')
+    assert [r.get('error') for r in res.json['results']] == [None, "InvalidState"]
+
+def test_counters_and_rollups_match_a_recount(app):
+    task_service.create_task(1, "Existing", 1)
+    rows = [{"title": f"T{i}", "user_id": 1 if i % 2 else None, "milestone_id": 1 if i % 3 else None} for i in range(30)]
+    assert app.test_client().post('/api/tasks/import?project_id=1', json=rows).status_code == 201
+
+    assert task_service.reconcile_project_counters() == []
+    project = db.session.get(Project, 1)
+    assert (project.tasks_total, project.tasks_todo) == (31, 31)
+
+    live = snapshot()
+    with db.engine.begin() as connection:
+        stats_service.rebuild(connection)
+    db.session.expire_all()
+    assert snapshot() == live
+
+def test_large_import_uses_a_fixed_number_of_statements(app):
+    rows = [{"title": f"Task {i}", "user_id": 1} for i in range(5000)]
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        res = app.test_client().post('/api/tasks/import?project_id=1', json=rows)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert res.json['created'] == 5000
+    assert len(statements) < 25
+
+def test_imports_are_not_held_to_the_bulk_log_limit(app):
+    rows = [{"title": f"Task {i}"} for i in range(app.config['BULK_MAX_ROWS'] + 2000)]
+    body = "\n".join(json.dumps(r) for r in rows)
+    res = app.test_client().post('/api/tasks/import?project_id=1', data=body, content_type='application/x-ndjson')
+    assert res.status_code == 201 and res.json['created'] == len(rows)
+    assert db.session.get(Project, 1).tasks_total == len(rows)
+
+    app.config['BULK_IMPORT_MAX_TASKS'] = 10
+    res = app.test_client().post('/api/tasks/import?project_id=1', json=rows[:11])
+    assert res.status_code == 413
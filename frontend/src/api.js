@@ -16,4 +16,17 @@ api.interceptors.request.use((config) => {
     return config;
 });
 
+// AI generations run as background jobs: the API answers 202 with a job id
+// and the result is polled from /jobs/<id> until the job settles.
+export const waitForJob = async (response, intervalMs = 1000) => {
+    if (response.status !== 202) return response.data;
+    const jobId = response.data.job_id;
+    for (;;) {
+        const { data: job } = await api.get(`/jobs/${jobId}`);
+        if (job.status === 'SUCCEEDED') return job.result;
+        if (job.status === 'FAILED') throw new Error(job.error || 'Job failed');
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+};
+
 export default api;
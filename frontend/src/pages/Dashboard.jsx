@@ -33,9 +33,9 @@ const Dashboard = () => {
         try {
             const [pRes, dRes, sRes, tRes] = await Promise.all([
                 api.get('/projects'),
-                api.get('/decisions'),
+                api.get('/decisions', { params: { all: true } }),
                 api.get('/stats/overview'),
-                api.get('/tasks')
+                api.get('/tasks', { params: { all: true } })
             ]);
             setProjects(pRes.data);
             setDecisions(dRes.data);
@@ -18,7 +18,7 @@ const Decisions = () => {
     const fetchData = async () => {
         try {
             const [dRes, pRes, uRes] = await Promise.all([
-                api.get('/decisions'),
+                api.get('/decisions', { params: { all: true } }),
                 api.get('/projects'),
                 api.get('/users')
             ]);
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { User, Activity, Clock, ShieldAlert, Sparkles, Plus, Mail, ShieldCheck, ClipboardList, Lightbulb, Users, Target, ChevronRight } from 'lucide-react';
-import api from '../api';
+import api, { waitForJob } from '../api';
 import { useAuth } from '../context/AuthContext';
 
 const Members = () => {
@@ -91,7 +91,7 @@ const Members = () => {
         setLoading(true);
         try {
             const res = await api.post(`/users/${id}/handover`);
-            setHandover(res.data);
+            setHandover(await waitForJob(res));
         } catch (e) {
             console.error('Failed to generate report');
         } finally {
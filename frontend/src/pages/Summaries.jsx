@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { motion } from 'framer-motion';
 import { Sparkles, BarChart3, Clock, Users, ArrowRight } from 'lucide-react';
-import api from '../api';
+import api, { waitForJob } from '../api';
 
 import ReactMarkdown from 'react-markdown';
 
@@ -30,7 +30,7 @@ const Summaries = () => {
         setLoading(true);
         try {
             const res = await api.post(`/projects/${selectedProject}/summary`, { type: reportType });
-            setSummary(res.data);
+            setSummary(await waitForJob(res));
         } catch (e) {
             console.error('Failed to generate summary');
         } finally {
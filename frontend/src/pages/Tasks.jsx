@@ -36,7 +36,7 @@ const Tasks = () => {
 
     const fetchData = async () => {
         try {
-            const [tRes, pRes, uRes] = await Promise.all([api.get('/tasks'), api.get('/projects'), api.get('/users')]);
+            const [tRes, pRes, uRes] = await Promise.all([api.get('/tasks', { params: { all: true } }), api.get('/projects'), api.get('/users')]);
             setTasks(tRes.data || []);
             setProjects(pRes.data);
             setUsers(uRes.data);
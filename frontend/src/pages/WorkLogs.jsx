@@ -24,7 +24,7 @@ const WorkLogs = () => {
             const [pRes, uRes, tRes] = await Promise.all([
                 api.get('/projects'),
                 api.get('/users'),
-                api.get('/tasks')
+                api.get('/tasks', { params: { all: true } })
             ]);
             setProjects(pRes.data);
             setUsers(uRes.data);